@@ -0,0 +1,132 @@
+import netCDF4 as nc4
+import numpy as np
+import pytest
+
+from pynhm.base.adapter import (
+    AdapterNetcdf,
+    AdapterNpy,
+    AdapterZarr,
+    adapter_factory,
+)
+from pynhm.base.control import Control
+from pynhm.utils.netcdf_utils import (
+    close_pooled_netcdf_reads,
+    pooled_netcdf_read,
+)
+from pynhm.utils.npy_utils import cbh_netcdf_to_npy
+from pynhm.utils.parameters import PrmsParameters
+from pynhm.utils.zarr_utils import cbh_netcdf_to_zarr
+
+
+@pytest.fixture(scope="function")
+def params(domain):
+    return PrmsParameters.load(domain["param_file"])
+
+
+@pytest.fixture(scope="function")
+def control(domain, params):
+    return Control.load(domain["control_file"], params=params)
+
+
+@pytest.mark.parametrize("variable", ["gwres_stor", "seg_outflow"])
+def test_adapter_netcdf_prefetch(domain, control, variable):
+    nc_path = domain["prms_output_dir"] / f"{variable}.nc"
+    adapter = adapter_factory(nc_path, variable, control=control)
+    adapter_prefetch = adapter_factory(
+        nc_path, variable, control=control, prefetch=True
+    )
+    assert isinstance(adapter_prefetch, AdapterNetcdf)
+    assert adapter_prefetch._prefetch
+
+    # the current value is updated in place
+    current_id = id(adapter_prefetch.current)
+    for istep in range(control.n_times):
+        control.advance()
+        adapter.advance()
+        adapter_prefetch.advance()
+        # a second advance in a time step does nothing
+        adapter_prefetch.advance()
+        assert np.array_equal(adapter_prefetch.current, adapter.current)
+        assert id(adapter_prefetch.current) == current_id
+
+    return
+
+
+def test_adapter_netcdf_pooled(domain, control, tmp_path):
+    # a file with several variables
+    variables = ["gwres_stor", "pkwater_equiv"]
+    nc_path = tmp_path / "combined.nc"
+    with nc4.Dataset(nc_path, "w") as combined:
+        for ii, var in enumerate(variables):
+            with nc4.Dataset(domain["prms_output_dir"] / f"{var}.nc") as ds:
+                if ii == 0:
+                    for name, dim in ds.dimensions.items():
+                        combined.createDimension(name, len(dim))
+                    for name in ["datetime", "nhm_id"]:
+                        combined_var = combined.createVariable(
+                            name,
+                            ds[name].dtype,
+                            ds[name].dimensions,
+                        )
+                        combined_var.setncatts(ds[name].__dict__)
+                        combined_var[:] = ds[name][:]
+                combined.createVariable(var, "f8", ds[var].dimensions)
+                combined[var][:] = ds[var][:]
+
+    adapters = {}
+    adapters_pooled = {}
+    for var in variables:
+        adapters[var] = adapter_factory(
+            domain["prms_output_dir"] / f"{var}.nc", var, control=control
+        )
+        adapters_pooled[var] = adapter_factory(
+            nc_path, var, control=control, pooled=True
+        )
+        assert adapters_pooled[var]._dataset is pooled_netcdf_read(nc_path)
+
+    for istep in range(control.n_times):
+        control.advance()
+        for var in variables:
+            adapters[var].advance()
+            adapters_pooled[var].advance()
+            assert np.array_equal(
+                adapters_pooled[var].current, adapters[var].current
+            )
+
+    # both variables are read for each time step
+    assert list(pooled_netcdf_read(nc_path)._time_step_data.keys()) == (
+        variables
+    )
+
+    close_pooled_netcdf_reads()
+    return
+
+
+@pytest.mark.parametrize("file_format", ["npy", "zarr"])
+@pytest.mark.parametrize("variable", ["gwres_stor", "seg_outflow"])
+def test_adapter_converted(domain, control, tmp_path, variable, file_format):
+    nc_path = domain["prms_output_dir"] / f"{variable}.nc"
+    if file_format == "npy":
+        path = cbh_netcdf_to_npy(nc_path, tmp_path) / f"{variable}.npy"
+        adapter_class = AdapterNpy
+    else:
+        pytest.importorskip("zarr")
+        path = cbh_netcdf_to_zarr(nc_path, tmp_path / f"{variable}.zarr")
+        adapter_class = AdapterZarr
+
+    adapter = adapter_factory(nc_path, variable, control=control)
+    adapter_converted = adapter_factory(path, variable, control=control)
+    assert isinstance(adapter_converted, adapter_class)
+    for istep in range(control.n_times):
+        control.advance()
+        adapter.advance()
+        adapter_converted.advance()
+        # a second advance in a time step does nothing
+        adapter_converted.advance()
+        assert np.array_equal(adapter_converted.current, adapter.current)
+        if file_format == "npy":
+            # a view of the memory map
+            assert adapter_converted.current.base is not None
+            assert not adapter_converted.current.flags.writeable
+
+    return
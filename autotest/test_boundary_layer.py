@@ -6,7 +6,9 @@ import pytest
 from pynhm.atmosphere.PRMSBoundaryLayer import PRMSBoundaryLayer
 from pynhm.base.adapter import adapter_factory
 from pynhm.base.control import Control
+from pynhm.utils.npy_utils import cbh_netcdf_to_npy
 from pynhm.utils.parameters import PrmsParameters
+from pynhm.utils.zarr_utils import cbh_netcdf_to_zarr
 
 
 @pytest.fixture(scope="function")
@@ -86,3 +88,132 @@ class TestPRMSBoundaryLayer:
 
         if not all_success:
             raise Exception("pynhm results do not match prms results")
+
+
+@pytest.mark.parametrize("time_chunk", [1, 30])
+def test_time_chunk(domain, params, time_chunk):
+    cbh_dir = domain["cbh_inputs"]["prcp"].parent.resolve()
+    input_variables = {}
+    for key in PRMSBoundaryLayer.get_inputs():
+        input_variables[key] = cbh_dir / f"{key}.nc"
+
+    controls = {}
+    atms = {}
+    for chunk in [None, time_chunk]:
+        controls[chunk] = Control.load(domain["control_file"], params=params)
+        atms[chunk] = PRMSBoundaryLayer(
+            control=controls[chunk],
+            **input_variables,
+            time_chunk=chunk,
+        )
+
+    for istep in range(controls[None].n_times):
+        for chunk, atm in atms.items():
+            controls[chunk].advance()
+            atm.advance()
+            atm.calculate(1.0)
+        for var in PRMSBoundaryLayer.get_variables():
+            assert np.array_equal(
+                atms[time_chunk][var], atms[None][var], equal_nan=True
+            )
+
+    for atm in atms.values():
+        atm.finalize()
+
+    return
+
+
+@pytest.mark.parametrize("file_format", ["npy", "zarr"])
+def test_input_formats(domain, params, tmp_path, file_format):
+    if file_format == "zarr":
+        pytest.importorskip("zarr")
+    cbh_dir = domain["cbh_inputs"]["prcp"].parent.resolve()
+    input_variables = {}
+    converted_variables = {}
+    for key in PRMSBoundaryLayer.get_inputs():
+        input_variables[key] = cbh_dir / f"{key}.nc"
+        if file_format == "npy":
+            converted_variables[key] = (
+                cbh_netcdf_to_npy(input_variables[key], tmp_path, [key])
+                / f"{key}.npy"
+            )
+        else:
+            converted_variables[key] = cbh_netcdf_to_zarr(
+                input_variables[key], tmp_path / f"{key}.zarr"
+            )
+
+    controls = []
+    atms = []
+    for inputs in [input_variables, converted_variables]:
+        controls.append(Control.load(domain["control_file"], params=params))
+        atms.append(
+            PRMSBoundaryLayer(control=controls[-1], **inputs, time_chunk=30)
+        )
+
+    for istep in range(controls[0].n_times):
+        for control, atm in zip(controls, atms):
+            control.advance()
+            atm.advance()
+            atm.calculate(1.0)
+        for var in PRMSBoundaryLayer.get_variables():
+            assert np.array_equal(atms[1][var], atms[0][var], equal_nan=True)
+
+    for atm in atms:
+        atm.finalize()
+
+    return
+
+
+def test_cache(domain, params, tmp_path, monkeypatch):
+    cbh_dir = domain["cbh_inputs"]["prcp"].parent.resolve()
+    input_variables = {}
+    for key in PRMSBoundaryLayer.get_inputs():
+        input_variables[key] = cbh_dir / f"{key}.nc"
+    cache_dir = tmp_path / "cache"
+
+    def forcings(parameters, cache_dir):
+        control = Control.load(
+            domain["control_file"], params=PrmsParameters(parameters)
+        )
+        atm = PRMSBoundaryLayer(
+            control=control, **input_variables, cache_dir=cache_dir
+        )
+        result = {
+            var: atm[f"_{var}"] for var in PRMSBoundaryLayer.get_variables()
+        }
+        atm.finalize()
+        return result
+
+    n_processed = []
+    process_window = PRMSBoundaryLayer._process_window
+
+    def counting_process_window(self, **kwargs):
+        n_processed.append(1)
+        return process_window(self, **kwargs)
+
+    monkeypatch.setattr(
+        PRMSBoundaryLayer, "_process_window", counting_process_window
+    )
+
+    ans = forcings(params.parameters, None)
+
+    # miss, then hit
+    for n_calc in [2, 2]:
+        result = forcings(params.parameters, cache_dir)
+        assert len(n_processed) == n_calc
+        # the forcings and the solar geometry
+        assert len(list(cache_dir.glob("*.npz"))) == 2
+        for var, val in ans.items():
+            assert np.array_equal(result[var], val, equal_nan=True)
+
+    # a parameter change invalidates the cached forcings
+    parameters = dict(params.parameters)
+    parameters["jh_coef"] = params.parameters["jh_coef"] * 1.1
+    ans = forcings(parameters, None)
+    result = forcings(parameters, cache_dir)
+    assert len(n_processed) == 4
+    assert len(list(cache_dir.glob("*.npz"))) == 3
+    for var, val in ans.items():
+        assert np.array_equal(result[var], val, equal_nan=True)
+
+    return
@@ -63,7 +63,8 @@ def control(domain, params):
 
 
 class TestPRMSCanopyDomain:
-    def test_init(self, domain, control, tmp_path):
+    @pytest.mark.parametrize("vectorized", [True, False])
+    def test_init(self, domain, control, vectorized, tmp_path):
         tmp_path = pl.Path(tmp_path)
         output_dir = domain["prms_output_dir"]
 
@@ -100,7 +101,7 @@ class TestPRMSCanopyDomain:
         for istep in range(control.n_times):
             control.advance()
             cnp.advance()
-            cnp.calculate(1.0)
+            cnp.calculate(1.0, vectorized=vectorized)
             # print(cnp.budget)
 
             # compare along the way
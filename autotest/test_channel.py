@@ -1,7 +1,10 @@
 import pathlib as pl
 
+import numpy as np
+import pytest
+
 from pynhm.base.control import Control
-from pynhm.hydrology.PRMSChannel import PRMSChannel
+from pynhm.hydrology.PRMSChannel import PRMSChannel, calculate_segment_order
 from pynhm.utils.netcdf_utils import NetCdfCompare
 from pynhm.utils.parameters import PrmsParameters
 
@@ -62,3 +65,46 @@ class TestPRMSChannelDomain:
         assert not assert_error, "comparison failed"
 
         return
+
+
+@pytest.mark.parametrize("calc_method", ["numba_parallel"])
+def test_calc_method(domain, calc_method):
+    # the parallel routing must be bit-identical to the serial routing
+    output_dir = domain["prms_output_dir"]
+    input_variables = {}
+    for key in PRMSChannel.get_inputs():
+        input_variables[key] = output_dir / f"{key}.nc"
+
+    channels = {}
+    controls = {}
+    for cm in ["numba", calc_method]:
+        params = PrmsParameters.load(domain["param_file"])
+        controls[cm] = Control.load(domain["control_file"], params=params)
+        channels[cm] = PRMSChannel(
+            controls[cm], **input_variables, calc_method=cm
+        )
+
+    for istep in range(controls["numba"].n_times):
+        for cm, channel in channels.items():
+            controls[cm].advance()
+            channel.advance()
+            channel.calculate(float(istep))
+
+        for key in PRMSChannel.get_variables():
+            assert np.array_equal(
+                channels["numba"][key], channels[calc_method][key]
+            ), f"{key} differs at time step {istep}"
+
+    return
+
+
+def test_calculate_segment_order():
+    to_segment = np.array([2, 2, 3, -1, 3])
+    segment_order, segment_level = calculate_segment_order(to_segment)
+    assert np.array_equal(segment_order, [0, 1, 4, 2, 3])
+    assert np.array_equal(segment_level, [0, 0, 1, 2, 0])
+
+    with pytest.raises(ValueError):
+        calculate_segment_order(np.array([1, 0, -1]))
+
+    return
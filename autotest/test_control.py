@@ -144,3 +144,27 @@ def test_control_advance(control_simple):
 def test_init_load(domain):
     control = Control.load(domain["control_file"])
     return None
+
+
+def test_control_precision(params_simple):
+    with pytest.raises(ValueError, match="precision"):
+        Control(**time_dict, params=params_simple, precision="half")
+
+    control = Control(**time_dict, params=params_simple, precision="single")
+    input_variables = {}
+    for key in PRMSCanopy.get_inputs():
+        input_variables[key] = np.ones([nhru])
+    canopy = PRMSCanopy(control, **input_variables)
+    var_types = control.meta.get_types(PRMSCanopy.get_variables())
+    for var, var_type in var_types.items():
+        if var_type == "F":
+            assert canopy[var].dtype == np.float32
+    assert canopy.covden_sum.dtype == np.float32
+    # integer parameters are not demoted
+    assert canopy.cov_type.dtype == params_simple.parameters["cov_type"].dtype
+
+    control.advance()
+    canopy.advance()
+    canopy.calculate(1.0)
+    assert canopy.intcp_stor.dtype == np.float32
+    return
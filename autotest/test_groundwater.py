@@ -1,13 +1,19 @@
 import pathlib as pl
 
+import netCDF4 as nc4
+import numpy as np
+import pytest
+
 from pynhm.base.control import Control
 from pynhm.hydrology.PRMSGroundwater import PRMSGroundwater
 from pynhm.utils.netcdf_utils import NetCdfCompare
 from pynhm.utils.parameters import PrmsParameters
+from pynhm.utils.time_utils import datetime_water_year
 
 
 class TestPRMSGroundwaterDomain:
-    def test_init(self, domain, tmp_path):
+    @pytest.mark.parametrize("async_write", [False, True])
+    def test_init(self, domain, tmp_path, async_write):
         tmp_path = pl.Path(tmp_path)
         params = PrmsParameters.load(domain["param_file"])
 
@@ -23,7 +29,7 @@ class TestPRMSGroundwaterDomain:
 
         gw = PRMSGroundwater(control, **input_variables)
         nc_parent = tmp_path / domain["domain_name"]
-        gw.initialize_netcdf(nc_parent)
+        gw.initialize_netcdf(nc_parent, async_write=async_write)
 
         output_compare = {}
         for key in PRMSGroundwater.get_variables():
@@ -60,3 +66,118 @@ class TestPRMSGroundwaterDomain:
         assert not assert_error, "comparison failed"
 
         return
+
+    def test_output_spec(self, domain, tmp_path):
+        tmp_path = pl.Path(tmp_path)
+        output_spec = {
+            "gwres_stor": {"statistic": "mean", "period": "monthly"},
+            "gwres_flow": {"statistic": "sum", "period": "water_year"},
+            "gwres_sink": {"statistic": "max", "period": "monthly"},
+            "gwres_in": None,
+        }
+
+        def run(out_dir, spec, separate_files=True):
+            params = PrmsParameters.load(domain["param_file"])
+            control = Control.load(domain["control_file"], params=params)
+            input_variables = {
+                key: domain["prms_output_dir"] / f"{key}.nc"
+                for key in PRMSGroundwater.get_inputs()
+            }
+            gw = PRMSGroundwater(control, **input_variables)
+            gw.initialize_netcdf(
+                out_dir, separate_files=separate_files, output_spec=spec
+            )
+            dates = []
+            for istep in range(control.n_times):
+                control.advance()
+                gw.advance()
+                gw.calculate(float(istep))
+                gw.output()
+                dates.append(control.current_time)
+            gw.finalize()
+            return np.array(dates)
+
+        dates = run(tmp_path / "all", None)
+        run(tmp_path / "spec", output_spec)
+
+        def read(path, variable):
+            with nc4.Dataset(path) as ds:
+                return ds[variable][:].data
+
+        assert sorted(p.name for p in (tmp_path / "spec").glob("*.nc")) == [
+            f"{key}.nc" for key in sorted(output_spec.keys())
+        ]
+        for key, spec in output_spec.items():
+            full = read(tmp_path / "all" / f"{key}.nc", key)
+            result = read(tmp_path / "spec" / f"{key}.nc", key)
+            if spec is None:
+                assert np.array_equal(full, result)
+                continue
+            if spec["period"] == "monthly":
+                periods = dates.astype("datetime64[M]")
+            else:
+                periods = datetime_water_year(dates)
+            reduce = {"mean": np.mean, "sum": np.sum, "max": np.max}[
+                spec["statistic"]
+            ]
+            expected = np.array(
+                [
+                    reduce(full[periods == period], axis=0)
+                    for period in np.unique(periods)
+                ]
+            )
+            assert result.shape == expected.shape
+            assert np.allclose(result, expected)
+
+            # the time of each statistic is the start of its period
+            with nc4.Dataset(tmp_path / "spec" / f"{key}.nc") as ds:
+                times = nc4.num2date(
+                    ds["datetime"][:],
+                    units=ds["datetime"].units,
+                    only_use_cftime_datetimes=False,
+                )
+            period_starts = [
+                dates[periods == p][0] for p in np.unique(periods)
+            ]
+            assert np.array_equal(
+                np.array(times, dtype="datetime64[s]"),
+                np.array(period_starts, dtype="datetime64[s]"),
+            )
+
+        # variables in a single file must share the output period
+        with pytest.raises(ValueError):
+            run(tmp_path / "single.nc", output_spec, separate_files=False)
+        return
+
+    @pytest.mark.parametrize("async_write", [False, True])
+    def test_zarr_output(self, domain, tmp_path, async_write):
+        zarr = pytest.importorskip("zarr")
+        tmp_path = pl.Path(tmp_path)
+        params = PrmsParameters.load(domain["param_file"])
+        control = Control.load(domain["control_file"], params=params)
+        input_variables = {
+            key: domain["prms_output_dir"] / f"{key}.nc"
+            for key in PRMSGroundwater.get_inputs()
+        }
+        gw = PRMSGroundwater(control, **input_variables)
+        gw.initialize_netcdf(
+            tmp_path, output_format="zarr", async_write=async_write
+        )
+        for istep in range(control.n_times):
+            control.advance()
+            gw.advance()
+            gw.calculate(float(istep))
+            gw.output()
+        gw.finalize()
+
+        for key in PRMSGroundwater.get_variables():
+            store = zarr.open_group(str(tmp_path / f"{key}.zarr"), mode="r")
+            with nc4.Dataset(domain["prms_output_dir"] / f"{key}.nc") as ds:
+                base = ds[key][:].data
+                base_hru_id = ds["nhm_id"][:].data
+            assert store[key].shape == base.shape
+            assert np.allclose(store[key][:], base, atol=1.0e-5)
+            assert np.array_equal(store["hru_id"][:], base_hru_id)
+            assert store["datetime"].shape == (control.n_times,)
+            assert store[key].attrs["units"] == gw.var_meta[key]["units"]
+        return
@@ -1,14 +1,20 @@
+import json
 import pathlib as pl
 from copy import deepcopy
 from pprint import pprint
 
 import numpy as np
 import pytest
+import xarray as xr
 
 from pynhm.atmosphere.PRMSSolarGeometry import PRMSSolarGeometry
 from pynhm.base.adapter import adapter_factory
 from pynhm.base.control import Control
-from pynhm.base.model import Model
+from pynhm.base.model import (
+    Model,
+    get_component_dependencies,
+    get_component_order,
+)
 from pynhm.hydrology.PRMSCanopy import PRMSCanopy
 from pynhm.hydrology.PRMSEt import PRMSEt
 from pynhm.hydrology.PRMSGroundwater import PRMSGroundwater
@@ -188,3 +194,240 @@ def check_timestep_results(
             if failfast:
                 raise (ValueError)
     return all_success
+
+
+def test_component_order():
+    # produced inputs, file inputs and a lagged input (pkwater_ante)
+    inputs_from = {
+        "PRMSSnow": {"net_rain": ["PRMSCanopy"], "swrad": []},
+        "PRMSCanopy": {"pkwater_ante": ["PRMSSnow"], "potet": []},
+        "PRMSRunoff": {"snowmelt": ["PRMSSnow"], "net_rain": ["PRMSCanopy"]},
+        "PRMSSolarGeometry": {},
+        "Other": {"infil": ["PRMSRunoff"]},
+    }
+    dependencies = get_component_dependencies(inputs_from)
+    assert dependencies == {
+        "PRMSSnow": {"PRMSCanopy"},
+        "PRMSCanopy": set(),
+        "PRMSRunoff": {"PRMSSnow", "PRMSCanopy"},
+        "PRMSSolarGeometry": set(),
+        "Other": {"PRMSRunoff"},
+    }
+    assert get_component_order(dependencies) == [
+        "PRMSSolarGeometry",
+        "PRMSCanopy",
+        "PRMSSnow",
+        "PRMSRunoff",
+        "Other",
+    ]
+
+    # a cycle of same time step inputs
+    inputs_from["PRMSCanopy"]["snowmelt"] = ["PRMSSnow"]
+    with pytest.raises(ValueError, match="circular"):
+        get_component_order(get_component_dependencies(inputs_from))
+    return
+
+
+def test_model_concurrent(domain, params):
+    components = test_models["et_canopy_runoff"]
+    models = []
+    for max_workers in [None, 2]:
+        control = Control.load(domain["control_file"], params=params)
+        models.append(
+            Model(
+                *components,
+                control=control,
+                input_dir=domain["prms_output_dir"],
+                max_workers=max_workers,
+            )
+        )
+    assert models[0].component_order == ["PRMSCanopy", "PRMSRunoff", "PRMSEt"]
+    assert models[0].component_dependencies["PRMSEt"] == {
+        "PRMSCanopy",
+        "PRMSRunoff",
+    }
+
+    for istep in range(60):
+        for model in models:
+            model.advance()
+            model.calculate()
+        for cls in models[0].component_order:
+            for var in models[0].components[cls].variables:
+                assert np.array_equal(
+                    models[1].components[cls][var],
+                    models[0].components[cls][var],
+                    equal_nan=True,
+                )
+    return
+
+
+def test_model_run(domain, control, tmp_path):
+    components = test_models["et_canopy_runoff"]
+    model = Model(
+        *components,
+        control=control,
+        input_dir=domain["prms_output_dir"],
+        max_workers=2,
+        timing=True,
+    )
+    output_dir = pl.Path(tmp_path) / "output"
+    model.initialize_netcdf(output_dir)
+    n_time_steps = 30
+    model.run(n_time_steps=n_time_steps)
+    assert control.itime_step == n_time_steps - 1
+    assert model._executor is None
+
+    # the output of the last time step is the current state
+    with xr.open_dataset(output_dir / "intcp_stor.nc") as ds:
+        assert ds.sizes["time"] == n_time_steps
+        assert np.allclose(
+            ds["intcp_stor"][-1].values,
+            model.components["PRMSCanopy"]["intcp_stor"],
+            equal_nan=True,
+        )
+
+    timing = json.loads(model.timers.to_json(tmp_path / "timing.json"))
+    assert timing == json.loads((tmp_path / "timing.json").read_text())
+    assert timing["n_steps"] == n_time_steps
+    canopy = timing["components"]["PRMSCanopy"]
+    assert set(canopy.keys()) == {
+        "advance",
+        "inputs",
+        "calculate",
+        "budget",
+        "output",
+    }
+    for stats in canopy.values():
+        assert stats["n_steps"] == n_time_steps
+        assert stats["n_calls"] == n_time_steps
+        assert stats["min_step_seconds"] <= stats["mean_step_seconds"]
+        assert stats["mean_step_seconds"] <= stats["max_step_seconds"]
+    for component in model.component_order:
+        assert "calculate" in timing["components"][component]
+    fractions = [
+        stats["fraction"]
+        for phases in timing["components"].values()
+        for stats in phases.values()
+    ]
+    assert np.isclose(sum(fractions), 1.0)
+    return
+
+
+def test_model_input_aliasing(domain, control):
+    components = test_models["et_canopy_runoff"]
+    model = Model(
+        *components,
+        control=control,
+        input_dir=domain["prms_output_dir"],
+        check_aliasing=True,
+    )
+    # the file and component inputs all alias their sources
+    for cls, component in model.components.items():
+        assert component.aliased_inputs == set(component.inputs)
+    for istep in range(10):
+        model.advance()
+        model.calculate()
+
+    # replacing a produced array disconnects its consumers
+    canopy = model.components["PRMSCanopy"]
+    canopy.net_rain = canopy.net_rain.copy()
+    with pytest.raises(RuntimeError, match="net_rain"):
+        model.advance()
+    return
+
+
+def test_model_state_store(domain, params):
+    components = test_models["et_canopy_runoff"]
+    models = []
+    for state_store in [False, True]:
+        control = Control.load(domain["control_file"], params=params)
+        models.append(
+            Model(
+                *components,
+                control=control,
+                input_dir=domain["prms_output_dir"],
+                state_store=state_store,
+            )
+        )
+    assert models[0].state_store is None
+    store = models[1].state_store
+    n_variables = sum(
+        len(group_vars) for group_vars in store.group_variables.values()
+    )
+    assert n_variables == sum(
+        len(component.variables) for component in models[1].components.values()
+    )
+
+    for istep in range(30):
+        for model in models:
+            model.advance()
+            model.calculate()
+        for cls in models[0].component_order:
+            for var in models[0].components[cls].variables:
+                assert np.array_equal(
+                    models[1].components[cls][var],
+                    models[0].components[cls][var],
+                    equal_nan=True,
+                )
+
+    # the variables are still the views of the store
+    for cls, component in models[1].components.items():
+        assert store.unbound_variables(component) == []
+        for var in component.variables:
+            assert any(
+                np.shares_memory(component[var], block)
+                for block in store.blocks.values()
+            )
+
+    snapshot = store.snapshot()
+    intcp_stor = models[1].components["PRMSCanopy"]["intcp_stor"].copy()
+    for istep in range(5):
+        models[1].advance()
+        models[1].calculate()
+    store.restore(snapshot)
+    assert np.array_equal(
+        models[1].components["PRMSCanopy"]["intcp_stor"],
+        intcp_stor,
+        equal_nan=True,
+    )
+    return
+
+
+def test_model_single_precision(domain, params):
+    components = test_models["et_canopy_runoff"]
+    models = []
+    for precision in ["double", "single"]:
+        control = Control.load(domain["control_file"], params=params)
+        models.append(
+            Model(
+                *components,
+                control=control,
+                input_dir=domain["prms_output_dir"],
+                precision=precision,
+            )
+        )
+    assert models[1].control.precision == "single"
+
+    for cls, component in models[1].components.items():
+        var_types = control.meta.get_types(component.variables)
+        for var in component.variables:
+            if var_types[var] == "F":
+                assert component[var].dtype == np.float32
+            elif var_types[var] == "D":
+                assert component[var].dtype == np.float64
+
+    # the tolerances documented in Control
+    for istep in range(60):
+        for model in models:
+            model.advance()
+            model.calculate()
+        for cls in models[0].component_order:
+            for var in models[0].components[cls].variables:
+                assert np.allclose(
+                    models[1].components[cls][var],
+                    models[0].components[cls][var],
+                    rtol=1e-4,
+                    atol=1e-5,
+                    equal_nan=True,
+                )
+    return
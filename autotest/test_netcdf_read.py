@@ -1,4 +1,10 @@
-from pynhm.utils.netcdf_utils import NetCdfRead
+import netCDF4 as nc4
+import numpy as np
+import pytest
+
+from pynhm.base.control import Control
+from pynhm.utils.netcdf_utils import NetCdfCompare, NetCdfRead, NetCdfWrite
+from pynhm.utils.parameters import PrmsParameters
 
 
 def test_netcdf(domain):
@@ -20,3 +26,112 @@ def test_netcdf(domain):
     shape = (ntimes, nhru)
     arr = nc_data.get_data(variable)
     assert arr.shape == shape, f"shape is {arr.shape} but should be {shape}"
+
+
+@pytest.mark.parametrize("async_write", [False, True])
+@pytest.mark.parametrize("buffer_size", [None, 1, 7])
+def test_netcdf_write_buffered(domain, tmp_path, buffer_size, async_write):
+    variable = "gwres_stor"
+    params = PrmsParameters.load(domain["param_file"])
+    control = Control.load(domain["control_file"], params=params)
+    nc_data = NetCdfRead(domain["prms_output_dir"] / f"{variable}.nc")
+    data = nc_data.get_data(variable).data
+
+    nc_pth = tmp_path / f"{variable}.nc"
+    var_meta = control.meta.get_vars([variable])
+    nc_write = NetCdfWrite(
+        nc_pth,
+        params.nhm_coordinates,
+        [variable],
+        var_meta,
+        buffer_size=buffer_size,
+        async_write=async_write,
+    )
+    for itime in range(data.shape[0]):
+        nc_write.add_simulation_time(itime, float(itime))
+        nc_write.add_data(variable, itime, data[itime, :])
+    nc_write.close()
+
+    with nc4.Dataset(nc_pth) as ds:
+        assert np.array_equal(ds["datetime"][:], np.arange(data.shape[0]))
+        assert np.array_equal(
+            ds[variable][:].data, data.astype(ds[variable].dtype)
+        )
+
+
+def test_netcdf_write_async_error(domain, tmp_path, monkeypatch):
+    variable = "gwres_stor"
+    params = PrmsParameters.load(domain["param_file"])
+    control = Control.load(domain["control_file"], params=params)
+
+    def failing_write_buffer(self, buffer):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(NetCdfWrite, "_write_buffer", failing_write_buffer)
+
+    nc_write = NetCdfWrite(
+        tmp_path / f"{variable}.nc",
+        params.nhm_coordinates,
+        [variable],
+        control.meta.get_vars([variable]),
+        async_write=True,
+    )
+    nc_write.add_data(
+        variable, 0, np.zeros(params.nhm_coordinates["nhm_id"].shape)
+    )
+    with pytest.raises(RuntimeError, match="disk full"):
+        nc_write.close()
+    assert not nc_write.dataset.isopen()
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_netcdf_compare(domain, tmp_path, max_workers):
+    variables = ["gwres_stor", "pkwater_equiv"]
+    params = PrmsParameters.load(domain["param_file"])
+    control = Control.load(domain["control_file"], params=params)
+    data = {}
+    for variable in variables:
+        nc_data = NetCdfRead(domain["prms_output_dir"] / f"{variable}.nc")
+        data[variable] = nc_data.get_data(variable).data
+        nc_data.close()
+    ntimes, nhru = data[variables[0]].shape
+
+    # perturb gwres_stor in a later time chunk
+    itime, ihru = ntimes - 2, nhru - 1
+    perturbed = {key: val.copy() for key, val in data.items()}
+    perturbed["gwres_stor"][itime, ihru] += 2.0
+    perturbed["gwres_stor"][itime - 40, 0] += 1.0
+
+    for name, values in [("base", data), ("compare", perturbed)]:
+        nc_write = NetCdfWrite(
+            tmp_path / f"{name}.nc",
+            params.nhm_coordinates,
+            variables,
+            control.meta.get_vars(variables),
+        )
+        for istep in range(ntimes):
+            nc_write.add_simulation_time(istep, float(istep))
+            for variable in variables:
+                nc_write.add_data(variable, istep, values[variable][istep])
+        nc_write.close()
+
+    comparison = NetCdfCompare(tmp_path / "base.nc", tmp_path / "compare.nc")
+    success, failures = comparison.compare(max_workers=max_workers)
+    assert not success
+    assert list(failures.keys()) == ["gwres_stor"]
+
+    stats = comparison.statistics["gwres_stor"]
+    assert stats["n_over_tolerance"] == 2
+    assert stats["n_values"] == ntimes * nhru
+    assert np.isclose(stats["max_abs_error"], 2.0, rtol=1.0e-5)
+    assert stats["worst_time_index"] == itime
+    assert stats["worst_space_index"] == ihru
+    assert stats["worst_space_id"] == params.nhm_coordinates["nhm_id"][ihru]
+    assert stats["worst_time"] == np.datetime64("1970-01-01") + itime
+    assert failures["gwres_stor"][0] == stats["max_abs_error"]
+    assert failures["gwres_stor"][2] == ihru
+
+    stats = comparison.statistics["pkwater_equiv"]
+    assert stats["n_over_tolerance"] == 0
+    assert stats["max_abs_error"] == 0.0
+    assert stats["max_rel_error"] == 0.0
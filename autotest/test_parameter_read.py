@@ -91,3 +91,60 @@ def test_parameter_access(domain, canopy_parameters):
 
     with pytest.raises(KeyError):
         del parameters.parameters["srain_intcp"]
+
+
+def test_parameter_read_values(tmp_path):
+    param_file = tmp_path / "values.param"
+    lines = [
+        "Written by test",
+        "** Dimensions **",
+        "####",
+        "nhru",
+        "3",
+        "** Parameters **",
+        "####",
+        "flt 10",
+        "1",
+        "nhru",
+        "3",
+        "2",
+        "1.5",
+        "-2e-3  extra",
+        "3",
+        "####",
+        "int 10",
+        "1",
+        "nhru",
+        "3",
+        "1",
+        "1",
+        "2",
+        "3",
+        "####",
+        "chr 10",
+        "1",
+        "nhru",
+        "3",
+        "4",
+        "a",
+        "b",
+        "c",
+    ]
+    param_file.write_text("\n".join(lines))
+    parameters = PrmsParameters.load(param_file).parameters
+    assert parameters["nhru"] == 3
+    assert np.array_equal(parameters["flt"], [1.5, -2e-3, 3.0])
+    assert parameters["flt"].dtype == float
+    assert np.array_equal(parameters["int"], [1, 2, 3])
+    assert parameters["int"].dtype == int
+    assert list(parameters["chr"]) == ["a", "b", "c"]
+
+    # integer parameters with float values are an error
+    param_file.write_text("\n".join(lines).replace("\n2\n3\n", "\n2.5\n3\n"))
+    with pytest.raises(ValueError):
+        PrmsParameters.load(param_file)
+
+    # so are missing values
+    param_file.write_text("\n".join(lines[:-1]))
+    with pytest.raises(ValueError):
+        PrmsParameters.load(param_file)
@@ -77,3 +77,23 @@ def test_multiple_csv_to_netcdf(domain, tmp_path):
     csv.to_netcdf(nc_file)
     compare_netcdf(csv, nc_file)
     return
+
+
+def test_csv_arrays(domain):
+    csv = CsvFile()
+    for var in csv_test_vars:
+        csv.add_path(domain["prms_output_dir"] / f"{var}.csv")
+
+    # the dense arrays are read without building the recarray
+    arrays = csv.arrays
+    assert csv._data is None
+
+    np_data = csv.data
+    assert np.array_equal(csv.dates, np_data["date"].astype("datetime64[s]"))
+    for variable in csv.variable_names:
+        assert arrays[variable].shape == (len(csv.dates), len(csv.nhm_id))
+        for idx, hru in enumerate(csv.nhm_id):
+            assert np.array_equal(
+                arrays[variable][:, idx], np_data[f"{variable}_{hru}"]
+            )
+    return
@@ -20,7 +20,8 @@ def control(domain, params):
 
 
 class TestPRMSRunoffDomain:
-    def test_init(self, domain, control, tmp_path):
+    @pytest.mark.parametrize("vectorized", [False, True])
+    def test_init(self, domain, control, tmp_path, vectorized):
         tmp_path = pl.Path(tmp_path)
 
         # get the answer data
@@ -60,7 +61,7 @@ class TestPRMSRunoffDomain:
 
             control.advance()
             runoff.advance()
-            runoff.calculate(1.0)
+            runoff.calculate(1.0, vectorized=vectorized)
 
             # advance the answer, which is being read from a netcdf file
             for key, val in ans.items():
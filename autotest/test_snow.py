@@ -209,3 +209,33 @@ class TestPRMSSnow:
             raise Exception("pynhm results do not match prms results")
 
         return
+
+
+@pytest.mark.parametrize("calc_method", ["numba"])
+def test_calc_method(domain, params, calc_method):
+    # compare against the python calc_method for the full simulation
+    output_dir = domain["prms_output_dir"]
+    input_variables = {}
+    for key in PRMSSnow.get_inputs():
+        input_variables[key] = output_dir / f"{key}.nc"
+
+    snows = {}
+    controls = {}
+    for cm in ["python", calc_method]:
+        controls[cm] = Control.load(domain["control_file"], params=params)
+        snows[cm] = PRMSSnow(controls[cm], **input_variables, calc_method=cm)
+
+    for istep in range(controls["python"].n_times):
+        for cm, snow in snows.items():
+            controls[cm].advance()
+            snow.advance()
+            snow.calculate(float(istep))
+
+        for key in PRMSSnow.get_variables():
+            a1 = snows["python"][key].astype(float)
+            a2 = snows[calc_method][key].astype(float)
+            assert np.allclose(
+                a2, a1, rtol=1e-10, atol=zero
+            ), f"{key} differs at time step {istep}"
+
+    return
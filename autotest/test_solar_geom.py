@@ -3,7 +3,10 @@ from datetime import datetime, timedelta
 import numpy as np
 import pytest
 
-from pynhm.atmosphere.PRMSSolarGeometry import PRMSSolarGeometry
+from pynhm.atmosphere.PRMSSolarGeometry import (
+    PRMSSolarGeometry,
+    clear_soltab_cache,
+)
 from pynhm.base.adapter import adapter_factory
 from pynhm.base.control import Control
 from pynhm.utils.parameters import PrmsParameters
@@ -85,3 +88,47 @@ def test_solar_geom(domain, control, from_prms_file, tmp_path):
         assert id(solar_geom.soltab_sunhrs) == sunhrs_id
 
     return
+
+
+def test_soltab_cache(domain, control, tmp_path, monkeypatch):
+    n_computed = []
+    compute_solar_geometry = PRMSSolarGeometry._compute_solar_geometry
+
+    def counting_compute_solar_geometry(self):
+        n_computed.append(1)
+        return compute_solar_geometry(self)
+
+    monkeypatch.setattr(
+        PRMSSolarGeometry,
+        "_compute_solar_geometry",
+        counting_compute_solar_geometry,
+    )
+
+    clear_soltab_cache()
+    solar_geom_0 = PRMSSolarGeometry(control)
+    solar_geom_1 = PRMSSolarGeometry(control, cache_dir=tmp_path)
+    assert len(n_computed) == 1
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    for vv in solar_geom_0.variables:
+        assert solar_geom_1[f"_{vv}"] is solar_geom_0[f"_{vv}"]
+        assert not solar_geom_1[f"_{vv}"].flags.writeable
+
+    # from disk
+    clear_soltab_cache()
+    solar_geom_2 = PRMSSolarGeometry(control, cache_dir=tmp_path)
+    assert len(n_computed) == 1
+    for vv in solar_geom_0.variables:
+        assert np.array_equal(solar_geom_2[f"_{vv}"], solar_geom_0[f"_{vv}"])
+
+    # a geometry change is a cache miss
+    control.params.parameters["hru_lat"] = (
+        control.params.parameters["hru_lat"] + 1.0
+    )
+    solar_geom_3 = PRMSSolarGeometry(control, cache_dir=tmp_path)
+    assert len(n_computed) == 2
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+    assert not np.array_equal(
+        solar_geom_3._soltab_potsw, solar_geom_0._soltab_potsw
+    )
+
+    return
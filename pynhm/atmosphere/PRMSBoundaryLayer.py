@@ -1,10 +1,18 @@
 import pathlib as pl
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
 
 import numpy as np
 
+from pynhm.base.adapter import input_file_reader
 from pynhm.base.storageUnit import StorageUnit
-from pynhm.utils.netcdf_utils import NetCdfRead, NetCdfWrite
+from pynhm.utils.cache_utils import (
+    cache_key,
+    cache_path,
+    load_cached_arrays,
+    save_cached_arrays,
+)
+from pynhm.utils.netcdf_utils import NetCdfWrite
 
 from ..base.control import Control
 from ..constants import inch2cm, nan, one, zero
@@ -36,6 +44,8 @@ class PRMSBoundaryLayer(StorageUnit):
         verbose: bool = False,
         netcdf_output_dir: fileish = None,
         from_file_dir: fileish = None,
+        time_chunk: int = None,
+        cache_dir: fileish = None,
     ):
         """PRMS atmospheric boundary layer model.
 
@@ -50,20 +60,40 @@ class PRMSBoundaryLayer(StorageUnit):
         then be skipped in subsequent model calls (unless the parameters are
         changing).
 
+        When time_chunk is specified, the forcings are instead read and
+        processed in windows of time_chunk time steps starting at the control
+        start time. While the model runs on the current window, the next
+        window is read and processed in a background thread. Peak memory then
+        scales with time_chunk rather than with the length of the input
+        files.
+
+        When cache_dir is specified, the processed forcings are cached on disk
+        and loaded instead of recomputed by subsequent instances, e.g. in
+        repeated calibration runs. The cache is keyed on the input files
+        (name, size and modification time), all the parameters of this class,
+        the solar geometry and the window of time, so any change to these
+        results in a new computation and cache entry.
+
         PRMS adjustments to temperature and precipitation are applied here to
         the inputs. Shortwave radiation (using degree day method) and potential
         evapotranspiration (Jensen and Haise ,1963) are also calculated.
 
         Args:
             control: control object
-            prcp: precipitation cbh netcdf file
-            tmax: maximum daily temperature cbh netcdf file
-            tmin: minimum daily temperature cbh netcdf file
+            prcp: precipitation cbh netcdf file, zarr store or .npy file
+            tmax: maximum daily temperature cbh netcdf file, zarr store or
+                .npy file
+            tmin: minimum daily temperature cbh netcdf file, zarr store or
+                .npy file
             budget_type: [None | "diagnostic" |  "strict"].
             verbose: bool indicating amount of output to terminal.
             netcdf_output_dir: an existing directory to which to write all
-                variables for all time.
-
+                variables for all time. Not available with time_chunk.
+            time_chunk: the number of time steps in each window of forcings
+                processed at once, e.g. 366 for about one water year. The
+                default (None) processes all times on initialization.
+            cache_dir: a directory in which to cache the processed forcings
+                and the solar geometry. It is created if it does not exist.
 
         """
         self.netcdf_output_dir = netcdf_output_dir
@@ -75,13 +105,15 @@ class PRMSBoundaryLayer(StorageUnit):
         self.name = "PRMSBoundaryLayer"
 
         # Override self.set_inputs(locals())
-        # Get all data at all times: do all forcings up front
         # There will be no inputs to advance
         self._input_variables_dict = {}
+        self._input_nc = {}
+        self._input_files = {}
         self._datetime = None
         for input in self.get_inputs():
-            nc_data = NetCdfRead(locals()[input])
-            self[input] = nc_data.dataset[input][:].data
+            self._input_files[input] = pl.Path(locals()[input])
+            nc_data = input_file_reader(self._input_files[input])
+            self._input_nc[input] = nc_data
             # Get the datetimes or check against the first
             if self._datetime is None:
                 self._datetime = nc_data._datetime
@@ -95,17 +127,39 @@ class PRMSBoundaryLayer(StorageUnit):
             raise ValueError(msg)
         self._init_time_ind = start_time_ind[0]
 
-        # atm/boundary layer has a solar geometry
-        self.solar_geom = PRMSSolarGeometry(control)
+        self._cache_dir = None
+        if cache_dir is not None:
+            self._cache_dir = pl.Path(cache_dir)
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
 
-        # Solve all variables for all time
-        self._month_ind_12 = datetime_month(self._datetime) - 1  # (time)
-        self._month_ind_1 = np.zeros(self._datetime.shape, dtype=int)  # (time)
+        # atm/boundary layer has a solar geometry
+        self.solar_geom = PRMSSolarGeometry(control, cache_dir=self._cache_dir)
+
+        self._time_chunk = time_chunk
+        self._executor = None
+        self._next_window = None
+        if time_chunk is None:
+            # Get all data at all times: do all forcings up front
+            self._window_start = 0
+            self._window_end = len(self._datetime)
+        else:
+            if time_chunk < 1:
+                msg = f"Invalid time_chunk: {time_chunk}"
+                raise ValueError(msg)
+            if netcdf_output_dir:
+                msg = "netcdf_output_dir is not available with time_chunk"
+                raise ValueError(msg)
+            self._window_start = self._init_time_ind
+            self._window_end = min(
+                self._window_start + time_chunk, len(self._datetime)
+            )
+            self._executor = ThreadPoolExecutor(max_workers=1)
 
-        self.adjust_temperature()
-        self.adjust_precip()
-        self.calculate_sw_rad_degree_day()
-        self.calculate_potential_et_jh()
+        window_func, window_kwargs = self._window_job(
+            self._window_start, self._window_end
+        )
+        self._set_window(window_func(**window_kwargs))
+        self._prefetch_next_window()
 
         # Budget is not for all time
         # self.set_budget(budget_type)
@@ -213,25 +267,212 @@ class PRMSBoundaryLayer(StorageUnit):
 
         """
         current_ind = self._init_time_ind + self._itime_step
+        if current_ind >= self._window_end:
+            self._advance_window()
+        window_ind = current_ind - self._window_start
         for var in self.variables:
-            self[var][:] = self[f"_{var}"][current_ind, :]
+            self[var][:] = self[f"_{var}"][window_ind, :]
+        return
+
+    def finalize(self) -> None:
+        """Finalize PRMSBoundaryLayer
+
+        Shuts down the prefetching of forcing windows and closes the input
+        files.
+
+        Returns:
+            None
+
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._next_window = None
+        for nc_data in self._input_nc.values():
+            nc_data.close()
+        super().finalize()
+        return
+
+    def _read_window(self, start: int, end: int) -> dict:
+        """Read the raw inputs for the times [start, end) of the input files."""
+        window = {
+            input: nc_data.get_block(input, start, end)
+            for input, nc_data in self._input_nc.items()
+        }
+        window["dates"] = self._datetime[start:end]
+        return window
+
+    def _process_window(
+        self,
+        dates: np.ndarray,
+        prcp: np.ndarray,
+        tmax: np.ndarray,
+        tmin: np.ndarray,
+        save_key: str = None,
+    ) -> dict:
+        """Solve all variables for a window of time.
+
+        This does not modify self and is safe to call in a background thread.
+        If save_key is passed, the result is saved to the cache under it.
+
+        Returns:
+            dict of the attributes for the window, keyed by attribute name.
+        """
+        month_ind_12 = datetime_month(dates) - 1  # (time)
+        month_ind_1 = np.zeros(dates.shape, dtype=int)  # (time)
+
+        tmaxf, tminf = self._adjust_temperature_run(
+            tmax=tmax,
+            tmin=tmin,
+            month_ind_12=month_ind_12,
+            month_ind_1=month_ind_1,
+            tmax_cbh_adj=self.tmax_cbh_adj,
+            tmin_cbh_adj=self.tmin_cbh_adj,
+        )
+        prmx, hru_ppt, hru_rain, hru_snow = self._adjust_precip_run(
+            prcp=prcp,
+            tmaxf=tmaxf,
+            tminf=tminf,
+            month_ind_12=month_ind_12,
+            month_ind_1=month_ind_1,
+            tmax_allsnow=self.tmax_allsnow,
+            tmax_allrain_offset=self.tmax_allrain_offset,
+            snow_cbh_adj=self.snow_cbh_adj,
+            rain_cbh_adj=self.rain_cbh_adj,
+            adjmix_rain=self.adjmix_rain,
+        )
+        swrad = self._ddsolrad_run(
+            dates=dates,
+            tmax_hru=tmaxf,
+            hru_ppt=hru_ppt,
+            soltab_potsw=self.solar_geom._soltab_potsw,
+            **self._solar_params(),
+        )
+        potet = self._potet_jh_run(
+            dates=dates,
+            tmax_hru=tmaxf,
+            tmin_hru=tminf,
+            swrad=swrad,
+            jh_coef=self.jh_coef,
+            jh_coef_hru=self.jh_coef_hru,
+        )
+
+        window = {
+            "prcp": prcp,
+            "tmax": tmax,
+            "tmin": tmin,
+            "_month_ind_12": month_ind_12,
+            "_month_ind_1": month_ind_1,
+            "_tmaxf": tmaxf,
+            "_tminf": tminf,
+            "_prmx": prmx,
+            "_hru_ppt": hru_ppt,
+            "_hru_rain": hru_rain,
+            "_hru_snow": hru_snow,
+            "_swrad": swrad,
+            "_potet": potet,
+        }
+        if save_key is not None:
+            save_cached_arrays(self._cache_dir, save_key, window)
+        return window
+
+    def _window_cache_key(self, start: int, end: int) -> str:
+        return cache_key(
+            self.name,
+            self._input_files,
+            self._datetime[start:end],
+            {name: self[name] for name in self.parameters},
+            self.solar_geom._soltab_potsw,
+        )
+
+    def _read_and_process_window(
+        self, start: int, end: int, save_key: str = None
+    ) -> dict:
+        return self._process_window(
+            **self._read_window(start, end), save_key=save_key
+        )
+
+    def _window_job(self, start: int, end: int) -> tuple:
+        """Get the function and its kwargs which return the window [start,
+        end), from the cache when possible."""
+        job_kwargs = {"start": start, "end": end}
+        if self._cache_dir is None:
+            return self._read_and_process_window, job_kwargs
+        key = self._window_cache_key(start, end)
+        if cache_path(self._cache_dir, key).exists():
+            if self.verbose:
+                print(f"Loading cached forcings for times [{start}, {end})")
+            return load_cached_arrays, {
+                "cache_dir": self._cache_dir,
+                "key": key,
+            }
+        return self._read_and_process_window, {**job_kwargs, "save_key": key}
+
+    def _set_window(self, window: dict) -> None:
+        for name, value in window.items():
+            self[name] = value
+        return
+
+    def _prefetch_next_window(self) -> None:
+        """Start processing the window following the current one."""
+        if self._executor is None or self._window_end >= len(self._datetime):
+            self._next_window = None
+            return
+        start = self._window_end
+        end = min(start + self._time_chunk, len(self._datetime))
+        window_func, window_kwargs = self._window_job(start, end)
+        self._next_window = self._executor.submit(window_func, **window_kwargs)
+        return
+
+    def _advance_window(self) -> None:
+        """Swap in the prefetched window and start prefetching the next."""
+        if self._next_window is None:
+            msg = "Current time is beyond the end of the input data"
+            raise ValueError(msg)
+        # The current window is released before the next is requested
+        self._set_window(self._next_window.result())
+        self._window_start = self._window_end
+        self._window_end = min(
+            self._window_start + self._time_chunk, len(self._datetime)
+        )
+        self._prefetch_next_window()
         return
 
     def adjust_temperature(self):
         """Input temperature adjustments using calibrated parameters."""
 
+        self._tmaxf, self._tminf = self._adjust_temperature_run(
+            tmax=self.tmax,
+            tmin=self.tmin,
+            month_ind_12=self._month_ind_12,
+            month_ind_1=self._month_ind_1,
+            tmax_cbh_adj=self.tmax_cbh_adj,
+            tmin_cbh_adj=self.tmin_cbh_adj,
+        )
+        return
+
+    @staticmethod
+    def _adjust_temperature_run(
+        tmax: np.ndarray,  # [n_time, n_hru]
+        tmin: np.ndarray,  # [n_time, n_hru]
+        month_ind_12: np.ndarray,  # [n_time]
+        month_ind_1: np.ndarray,  # [n_time]
+        tmax_cbh_adj: np.ndarray,  # param [12 or 1, n_hru]
+        tmin_cbh_adj: np.ndarray,  # param [12 or 1, n_hru]
+    ) -> tuple:  # ([n_time, n_hru], [n_time, n_hru])
+
         # throw an error if these have different shapes
-        if self["tmax_cbh_adj"].shape != self["tmin_cbh_adj"].shape:
+        if tmax_cbh_adj.shape != tmin_cbh_adj.shape:
             msg = (
                 "Not implemented: tmin/tmax cbh adj parameters "
                 "with different shapes"
             )
             raise NotImplementedError(msg)
 
-        if self["tmax_cbh_adj"].shape[0] == 12:
-            month_ind = self._month_ind_12
-        elif self["tmax_cbh_adj"].shape[0] == 1:
-            month_ind = self._month_ind_1
+        if tmax_cbh_adj.shape[0] == 12:
+            month_ind = month_ind_12
+        elif tmax_cbh_adj.shape[0] == 1:
+            month_ind = month_ind_1
         else:
             msg = (
                 "Unexpected month dimension for cbh "
@@ -240,12 +481,10 @@ class PRMSBoundaryLayer(StorageUnit):
             raise ValueError(msg)
 
         # (time, space) dimensions on these variables
-        self._tmaxf = np.zeros(self.tmax.shape, dtype=self.tmax.dtype)
-        self._tminf = np.zeros(self.tmin.shape, dtype=self.tmin.dtype)
-        self._tmaxf = self["tmax"] + self["tmax_cbh_adj"][month_ind]
-        self._tminf = self["tmin"] + self["tmin_cbh_adj"][month_ind]
+        tmaxf = tmax + tmax_cbh_adj[month_ind]
+        tminf = tmin + tmin_cbh_adj[month_ind]
 
-        return
+        return tmaxf, tminf
 
     def adjust_precip(self):
         """Input precipitation adjustments using calibrated parameters.
@@ -254,14 +493,47 @@ class PRMSBoundaryLayer(StorageUnit):
         in addition to depending on additonal parameters.
         """
 
+        (
+            self._prmx,
+            self._hru_ppt,
+            self._hru_rain,
+            self._hru_snow,
+        ) = self._adjust_precip_run(
+            prcp=self.prcp,
+            tmaxf=self._tmaxf,
+            tminf=self._tminf,
+            month_ind_12=self._month_ind_12,
+            month_ind_1=self._month_ind_1,
+            tmax_allsnow=self.tmax_allsnow,
+            tmax_allrain_offset=self.tmax_allrain_offset,
+            snow_cbh_adj=self.snow_cbh_adj,
+            rain_cbh_adj=self.rain_cbh_adj,
+            adjmix_rain=self.adjmix_rain,
+        )
+        return
+
+    @staticmethod
+    def _adjust_precip_run(
+        prcp: np.ndarray,  # [n_time, n_hru]
+        tmaxf: np.ndarray,  # [n_time, n_hru]
+        tminf: np.ndarray,  # [n_time, n_hru]
+        month_ind_12: np.ndarray,  # [n_time]
+        month_ind_1: np.ndarray,  # [n_time]
+        tmax_allsnow: np.ndarray,  # param [12, n_hru]
+        tmax_allrain_offset: np.ndarray,  # "    "
+        snow_cbh_adj: np.ndarray,
+        rain_cbh_adj: np.ndarray,
+        adjmix_rain: np.ndarray,
+    ) -> tuple:  # (prmx, hru_ppt, hru_rain, hru_snow) [n_time, n_hru]
+
         # throw an error shapes are inconsistent
         shape_list = np.array(
             [
-                self.tmax_allsnow.shape[0],
-                self.tmax_allrain_offset.shape[0],
-                self.snow_cbh_adj.shape[0],
-                self.rain_cbh_adj.shape[0],
-                self.adjmix_rain.shape[0],
+                tmax_allsnow.shape[0],
+                tmax_allrain_offset.shape[0],
+                snow_cbh_adj.shape[0],
+                rain_cbh_adj.shape[0],
+                adjmix_rain.shape[0],
             ]
         )
         if not (shape_list == 12).all():
@@ -271,75 +543,81 @@ class PRMSBoundaryLayer(StorageUnit):
             )
             raise NotImplementedError(msg)
 
-        tmax_allrain = self.tmax_allsnow + self.tmax_allrain_offset
+        tmax_allrain = tmax_allsnow + tmax_allrain_offset
 
-        if self.tmax_allsnow.shape[0] == 12:
-            month_ind = self._month_ind_12
-        elif self.tmax_allsnow.shape[0] == 1:
-            month_ind = self._month_ind_1
+        if tmax_allsnow.shape[0] == 12:
+            month_ind = month_ind_12
+        elif tmax_allsnow.shape[0] == 1:
+            month_ind = month_ind_1
         else:
             msg = "Unexpected month dimension for cbh precip adjustment params"
             raise ValueError(msg)
 
         # (time, space) dimensions
-        self._hru_ppt = np.zeros(self.prcp.shape, dtype=self.prcp.dtype)
-        self._hru_rain = np.zeros(self.prcp.shape, dtype=self.prcp.dtype)
-        self._hru_snow = np.zeros(self.prcp.shape, dtype=self.prcp.dtype)
+        hru_ppt = np.zeros(prcp.shape, dtype=prcp.dtype)
+        hru_rain = np.zeros(prcp.shape, dtype=prcp.dtype)
+        hru_snow = np.zeros(prcp.shape, dtype=prcp.dtype)
 
-        self._prmx = np.zeros(self.prcp.shape, dtype=self.prcp.dtype)
+        prmx = np.zeros(prcp.shape, dtype=prcp.dtype)
         # Order MATTERS in calculating the prmx mask
         # The logic in PRMS is if(all_snow),elif(all_rain),else(mixed)
         # so we set the mask in the reverse order
         # Calculate the mix everywhere, then set the precip/rain/snow amounts
         # from the conditions.
-        tdiff = self._tmaxf - self._tminf
-        self._prmx = (
-            (self._tmaxf - self.tmax_allsnow[month_ind]) / tdiff
-        ) * self.adjmix_rain[month_ind]
+        tdiff = tmaxf - tminf
+        prmx = ((tmaxf - tmax_allsnow[month_ind]) / tdiff) * adjmix_rain[
+            month_ind
+        ]
         del tdiff
 
-        wh_all_snow = np.where(self._tmaxf <= self.tmax_allsnow[month_ind])
+        wh_all_snow = np.where(tmaxf <= tmax_allsnow[month_ind])
         wh_all_rain = np.where(
             np.logical_or(
-                self._tminf > self.tmax_allsnow[month_ind],
-                self._tmaxf >= tmax_allrain[month_ind],
+                tminf > tmax_allsnow[month_ind],
+                tmaxf >= tmax_allrain[month_ind],
             )
         )
-        self._prmx[wh_all_rain] = one
-        self._prmx[wh_all_snow] = zero
+        prmx[wh_all_rain] = one
+        prmx[wh_all_snow] = zero
 
         # Recalculate/redefine these now based on prmx instead of the
         # temperature logic
-        wh_all_snow = np.where(self._prmx <= zero)
-        wh_all_rain = np.where(self._prmx >= one)
+        wh_all_snow = np.where(prmx <= zero)
+        wh_all_rain = np.where(prmx >= one)
 
         # Mixed case (everywhere, to be overwritten by the all-snow/rain-fall
         # cases)
-        self._hru_ppt = self.prcp * self.snow_cbh_adj[month_ind]
-        self._hru_rain = self._prmx * self._hru_ppt
-        self._hru_snow = self._hru_ppt - self._hru_rain
+        hru_ppt = prcp * snow_cbh_adj[month_ind]
+        hru_rain = prmx * hru_ppt
+        hru_snow = hru_ppt - hru_rain
 
         # All precip is snow case
         # The condition to be used later:
-        self._hru_ppt[wh_all_snow] = (
-            self.prcp * self.snow_cbh_adj[month_ind]
-        )[wh_all_snow]
-        self._hru_snow[wh_all_snow] = self._hru_ppt[wh_all_snow]
-        self._hru_rain[wh_all_snow] = zero
+        hru_ppt[wh_all_snow] = (prcp * snow_cbh_adj[month_ind])[wh_all_snow]
+        hru_snow[wh_all_snow] = hru_ppt[wh_all_snow]
+        hru_rain[wh_all_snow] = zero
 
         # All precip is rain case
         # The condition to be used later:
-        self._hru_ppt[wh_all_rain] = (
-            self.prcp * self.rain_cbh_adj[month_ind]
-        )[wh_all_rain]
-        self._hru_rain[wh_all_rain] = self._hru_ppt[wh_all_rain]
-        self._hru_snow[wh_all_rain] = zero
-        return
+        hru_ppt[wh_all_rain] = (prcp * rain_cbh_adj[month_ind])[wh_all_rain]
+        hru_rain[wh_all_rain] = hru_ppt[wh_all_rain]
+        hru_snow[wh_all_rain] = zero
+        return prmx, hru_ppt, hru_rain, hru_snow
 
     def calculate_sw_rad_degree_day(self) -> None:
         """Calculate shortwave radiation using the degree day method."""
 
-        solar_params = {}
+        self._swrad = self._ddsolrad_run(
+            dates=self._datetime[self._window_start : self._window_end],
+            tmax_hru=self._tmaxf,
+            hru_ppt=self._hru_ppt,
+            soltab_potsw=self.solar_geom._soltab_potsw,
+            **self._solar_params(),
+        )
+
+        return
+
+    def _solar_params(self) -> dict:
         solar_param_names = (
             "radadj_intcp",
             "radadj_slope",
@@ -356,18 +634,7 @@ class PRMSBoundaryLayer(StorageUnit):
             "hru_lat",
             "hru_area",
         )
-        for name in solar_param_names:
-            solar_params[name] = self.solar_geom[name]
-
-        self._swrad = self._ddsolrad_run(
-            dates=self._datetime,
-            tmax_hru=self._tmaxf,
-            hru_ppt=self._hru_ppt,
-            soltab_potsw=self.solar_geom._soltab_potsw,
-            **solar_params,
-        )
-
-        return
+        return {name: self.solar_geom[name] for name in solar_param_names}
 
     # @jit
     @staticmethod
@@ -525,7 +792,7 @@ class PRMSBoundaryLayer(StorageUnit):
         (1963)."""
 
         self._potet = self._potet_jh_run(
-            dates=self._datetime,
+            dates=self._datetime[self._window_start : self._window_end],
             tmax_hru=self._tmaxf,
             tmin_hru=self._tminf,
             swrad=self._swrad,
@@ -11,6 +11,12 @@ from pynhm.utils.netcdf_utils import NetCdfWrite
 
 from ..base.control import Control
 from ..constants import epsilon32, nan, one, zero
+from ..utils.cache_utils import (
+    cache_key,
+    cache_path,
+    load_cached_arrays,
+    save_cached_arrays,
+)
 from ..utils.prms5util import load_soltab_debug
 from .solar_constants import (  # eccentricy,; julian_days,; n_days_per_year_flt,; obliquity,; r0,; rad_day,
     n_days_per_year,
@@ -41,6 +47,20 @@ def tile_space_to_time(arr: np.ndarray) -> np.ndarray:
 # def tile_time_to_space(arr: np.ndarray, n_hru) -> np.ndarray:
 #    return np.transpose(np.tile(arr, (n_hru, 1)))
 
+# The solar geometry tables only depend on the hru_slope, hru_aspect and
+# hru_lat parameters. They are cached per process by a hash of these so that
+# instances with the same geometry (e.g. in a model and in its boundary layer
+# or in ensemble members) share a single computation. Cached tables are
+# read-only.
+_soltab_cache = {}
+
+
+def clear_soltab_cache() -> None:
+    """Clear the in-memory cache of solar geometry tables."""
+    _soltab_cache.clear()
+    return
+
+
 # trying to not subclass storageUnit
 
 
@@ -52,8 +72,13 @@ class PRMSSolarGeometry(StorageUnit):
         netcdf_output_dir: fileish = None,
         from_prms_file: fileish = None,
         from_nc_files_dir: fileish = None,
+        cache_dir: fileish = None,
     ):
-        """PRMS Solar Geometry."""
+        """PRMS Solar Geometry.
+
+        Computed solar geometry tables are cached in memory for the process
+        and, if cache_dir is specified, on disk in cache_dir.
+        """
 
         self.set_inputs(locals())
         budget_type = None
@@ -76,7 +101,7 @@ class PRMSSolarGeometry(StorageUnit):
         else:
             # compute
             self._hru_cossl = np.cos(np.arctan(self["hru_slope"]))
-            self._compute_solar_geometry()
+            self._cached_solar_geometry(cache_dir)
 
         if self.netcdf_output_dir:
             self.netcdf_output_dir = pl.Path(netcdf_output_dir)
@@ -135,6 +160,32 @@ class PRMSSolarGeometry(StorageUnit):
     def set_initial_conditions(self):
         return
 
+    def _cached_solar_geometry(self, cache_dir: fileish = None) -> None:
+        """Get the solar geometry tables from the cache or compute them."""
+        key = cache_key(
+            self.name,
+            self["hru_slope"],
+            self["hru_aspect"],
+            self["hru_lat"],
+        )
+        soltab = _soltab_cache.get(key)
+        if soltab is None and cache_dir is not None:
+            soltab = load_cached_arrays(cache_dir, key)
+        if soltab is None:
+            self._compute_solar_geometry()
+            soltab = {
+                f"_{var}": self[f"_{var}"] for var in self.get_variables()
+            }
+        if (cache_dir is not None) and (
+            not cache_path(cache_dir, key).exists()
+        ):
+            save_cached_arrays(cache_dir, key, soltab)
+        for name, value in soltab.items():
+            value.setflags(write=False)
+            self[name] = value
+        _soltab_cache[key] = soltab
+        return
+
     def _compute_solar_geometry(self):
         # The potential radiation on horizontal surfce
         self._soltab_horad_potsw, _ = self.compute_soltab(
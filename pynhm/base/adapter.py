@@ -1,15 +1,23 @@
 import pathlib as pl
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
 
 import numpy as np
 
 from pynhm.base.control import Control
-from pynhm.utils.netcdf_utils import NetCdfRead
+from pynhm.utils.netcdf_utils import NetCdfRead, pooled_netcdf_read
+from pynhm.utils.npy_utils import NpyRead
+from pynhm.utils.time_utils import datetime_doy
+from pynhm.utils.zarr_utils import ZarrRead
 
 fileish = Union[str, pl.Path]
 
 
 class Adapter:
+    # The current value is a single array updated in place, so the inputs of
+    # components can alias it instead of copying it every time step
+    current_in_place = False
+
     def __init__(
         self,
         variable: str,
@@ -29,36 +37,205 @@ class Adapter:
         return self._current_value
 
 
+# The number of time steps read at once by a prefetching AdapterNetcdf when
+# the variable is not chunked in the file
+DEFAULT_TIME_BLOCK = 30
+
+
 class AdapterNetcdf(Adapter):
+    current_in_place = True
+
     def __init__(
         self,
         fname: fileish,
         variable: str,
         control: Control,
+        prefetch: bool = False,
+        pooled: bool = False,
     ) -> None:
+        """Adapt a variable in a netcdf file.
+
+        With pooled, the file is read through a NetCdfRead shared with all
+        other pooled adapters of the same file, which is opened once and
+        reads all the variables requested from it for a time step at once.
+
+        With prefetch, the variable is read in blocks of time steps aligned
+        to the time chunks of the variable in the file, so each compressed
+        chunk is only decompressed once, instead of being read one time step
+        at a time. While the model runs on the current block, the next block
+        is read in a background thread. The rows of the current block are
+        copied into the current value, which components reference.
+        Prefetching is not used for variables indexed by day of year.
+
+        Args:
+            fname: netcdf file
+            variable: the name of the variable in the file
+            control: control object
+            prefetch: read blocks of time steps in a background thread.
+            pooled: use the shared NetCdfRead of the file.
+        """
         super().__init__(variable)
         self.name = "AdapterNetcdf"
 
         self._fname = fname
-        self._dataset = NetCdfRead(fname)
+        self._dataset = self._open_dataset(fname, pooled)
+        # The time is tracked here as the NetCdfRead may be shared
+        self._itime_step = 0
+        self._doy_indexed = "doy" in self._dataset.variables
 
         self.control = control
         self._start_time = self.control.start_time
         self._current_value = control.get_var_nans(self._variable)
+
+        self._prefetch = prefetch and not self._doy_indexed
+        self._executor = None
+        if self._prefetch:
+            self._block_size = self._dataset.time_chunk_size(self._variable)
+            if self._block_size is None:
+                self._block_size = DEFAULT_TIME_BLOCK
+            self._block = None
+            self._block_start = 0
+            self._block_end = 0
+            self._next_block = None
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        return
+
+    @staticmethod
+    def _open_dataset(fname: fileish, pooled: bool):
+        if pooled:
+            return pooled_netcdf_read(fname)
+        return NetCdfRead(fname)
+
+    def __del__(self):
+        if getattr(self, "_executor", None) is not None:
+            self._executor.shutdown(wait=True)
         return
 
     def advance(self):
         # JLM: Seems like the time of the ncdf dataset or variable
         # should be public
-        if self._dataset._itime_step[self._variable] > self.control.itime_step:
+        if self._itime_step > self.control.itime_step:
+            return
+        if self._prefetch:
+            self._current_value[:] = self._advance_block()
+        elif self._doy_indexed:
+            self._current_value[:] = self._dataset.get_data(
+                self._variable,
+                itime_step=datetime_doy(self.control.current_time) - 1,
+            )
+        else:
+            self._current_value[:] = self._dataset.get_time_step(
+                self._variable, self._itime_step
+            )
+        self._itime_step += 1
+        return None
+
+    def _advance_block(self) -> np.ndarray:
+        """Get a view of the next time step from the current block."""
+        itime_step = self._itime_step
+        if not (self._block_start <= itime_step < self._block_end):
+            self._block_start = (
+                itime_step // self._block_size
+            ) * self._block_size
+            self._block_end = min(
+                self._block_start + self._block_size, self._dataset.ntimes
+            )
+            if self._next_block is not None and (
+                self._next_block[0] == self._block_start
+            ):
+                self._block = self._next_block[1].result()
+            else:
+                self._block = self._dataset.get_block(
+                    self._variable, self._block_start, self._block_end
+                )
+            self._next_block = None
+            if self._block_end < self._dataset.ntimes:
+                next_end = min(
+                    self._block_end + self._block_size, self._dataset.ntimes
+                )
+                self._next_block = (
+                    self._block_end,
+                    self._executor.submit(
+                        self._dataset.get_block,
+                        self._variable,
+                        self._block_end,
+                        next_end,
+                    ),
+                )
+        return self._block[itime_step - self._block_start]
+
+
+class AdapterZarr(AdapterNetcdf):
+    def __init__(
+        self,
+        fname: fileish,
+        variable: str,
+        control: Control,
+        prefetch: bool = True,
+    ) -> None:
+        """Adapt a variable in a zarr store.
+
+        The store is read through ZarrRead. As for AdapterNetcdf, prefetch
+        reads blocks of time steps aligned to the time chunks in a
+        background thread, which zarr decompresses without a global lock.
+
+        Args:
+            fname: zarr store
+            variable: the name of the variable in the store
+            control: control object
+            prefetch: read blocks of time steps in a background thread.
+        """
+        super().__init__(fname, variable, control, prefetch=prefetch)
+        self.name = "AdapterZarr"
+        return
+
+    @staticmethod
+    def _open_dataset(fname: fileish, pooled: bool):
+        return ZarrRead(fname)
+
+
+class AdapterNpy(Adapter):
+    def __init__(
+        self,
+        fname: fileish,
+        variable: str,
+        control: Control,
+    ) -> None:
+        """Adapt a variable in a .npy file.
+
+        The file is memory mapped read-only by NpyRead and the current
+        value of each time step is a view of its row in the memory map, so
+        nothing is decoded or copied until the value is used.
+
+        Args:
+            fname: the .npy file of the variable in a npy directory
+            variable: the name of the variable
+            control: control object
+        """
+        super().__init__(variable)
+        self.name = "AdapterNpy"
+
+        self._fname = fname
+        self._dataset = NpyRead(fname)
+        self._data = self._dataset.get_variable(self._variable)
+        self._itime_step = 0
+
+        self.control = control
+        self._current_value = control.get_var_nans(self._variable)
+        return
+
+    def advance(self):
+        if self._itime_step > self.control.itime_step:
             return
-        self._current_value[:] = self._dataset.advance(
-            self._variable, self.control.current_time
-        )
+        self._current_value = self._data[self._itime_step]
+        self._itime_step += 1
         return None
 
 
 class AdapterOnedarray(Adapter):
+    # the current value is the array of the producer
+    current_in_place = True
+
     def __init__(
         self,
         data: np.ndarray,
@@ -80,18 +257,35 @@ def adapter_factory(
     var: adaptable,
     variable_name: str = None,
     control: Control = None,
+    prefetch: bool = False,
+    pooled: bool = False,
 ):
     if isinstance(var, Adapter):
         """Adapt an adapter"""
         return var
 
     elif isinstance(var, (str, pl.Path)):
-        """Paths and strings are considered paths to netcdf files"""
+        """Paths and strings are considered paths to netcdf files, zarr
+        stores or .npy files"""
         if pl.Path(var).suffix == ".nc":
             return AdapterNetcdf(
                 var,
                 variable=variable_name,
                 control=control,
+                prefetch=prefetch,
+                pooled=pooled,
+            )
+        elif pl.Path(var).suffix == ".zarr":
+            return AdapterZarr(
+                var,
+                variable=variable_name,
+                control=control,
+            )
+        elif pl.Path(var).suffix == ".npy":
+            return AdapterNpy(
+                var,
+                variable=variable_name,
+                control=control,
             )
 
     elif isinstance(var, np.ndarray) and len(var.shape) == 1:
@@ -104,3 +298,24 @@ def adapter_factory(
 
     else:
         raise TypeError("oops you screwed up")
+
+
+def input_file_reader(fname: fileish):
+    """Open a reader of a netcdf file, zarr store or npy directory
+
+    The readers have the datetimes of the time steps and get blocks of time
+    steps of variables with get_block.
+
+    Args:
+        fname: netcdf file (.nc), zarr store (.zarr) or .npy file of a npy
+            directory
+
+    Returns:
+        reader: NetCdfRead, ZarrRead or NpyRead
+    """
+    suffix = pl.Path(fname).suffix
+    if suffix == ".zarr":
+        return ZarrRead(fname)
+    elif suffix == ".npy":
+        return NpyRead(fname)
+    return NetCdfRead(fname)
@@ -19,6 +19,9 @@ from .accessor import Accessor
 
 fileish = Union[str, pl.PosixPath]
 
+# The floating point precisions of the storage units
+precisions = ["double", "single"]
+
 
 class Control(Accessor):
     """The control class."""
@@ -32,6 +35,7 @@ class Control(Accessor):
         config: dict = None,
         params: PrmsParameters = None,
         verbosity: int = 0,
+        precision: str = "double",
         **kwargs,
     ):
         """Initialize time with data and parameters.
@@ -42,11 +46,28 @@ class Control(Accessor):
             time_step: the length fo the time step
             config: a PRMS config file to read and use for contorl
             verbosity: the level of verbosity in [0,10]
+            precision: the floating point precision of the storage units,
+                one of precisions. "double" (the default) allocates float
+                parameters, inputs and variables as float64. "single"
+                allocates those with metadata type "F" as float32, halving
+                their memory and memory bandwidth, while those of type "D"
+                remain float64. Single precision results differ from double
+                precision ones by float32 rounding, accumulated over the
+                time steps, and by the thresholds it flips. Over the two
+                years of the drb_2yr and hru_1 test domains, the variables
+                of PRMSCanopy, PRMSRunoff and PRMSEt agree with double
+                precision to a relative tolerance of 1e-4 and an absolute
+                tolerance of 1e-5 (inches), except for isolated time steps
+                where depression storage overflow switches on or off
+                (dprst_insroff_hru, and dprst_vol_open to a relative
+                tolerance of 1e-3). PRMSSnow is threshold driven (e.g. the
+                melting of thin packs) and does not agree to a tolerance.
         """
         super().__init__(**kwargs)
         self.name = "Control"
 
         self.verbosity = verbosity
+        self.precision = precision
 
         if end_time <= start_time:
             raise ValueError("end_time <= start_time")
@@ -72,6 +93,9 @@ class Control(Accessor):
         self.config = config
         self.params = params
 
+        # A StateStore of the variables of the storage units, if any
+        self.state_store = None
+
         self.meta = Meta()
         # This will have the time dimension name
         # This will have the time coordimate name
@@ -82,12 +106,14 @@ class Control(Accessor):
         control_file: fileish,
         params: PrmsParameters = None,
         verbosity: int = 0,
+        precision: str = "double",
     ) -> "Time":
         """Initialize a control object from a PRMS control file
 
         Args:
             control_file: PRMS control file
             verbosity: output verbosity level
+            precision: the floating point precision, "double" or "single"
 
         Returns:
             Time: Time object initialized from a PRMS control file
@@ -102,8 +128,24 @@ class Control(Accessor):
             config=control.control,
             params=params,
             verbosity=verbosity,
+            precision=precision,
         )
 
+    @property
+    def precision(self) -> str:
+        """Get the floating point precision of the storage units"""
+        return self._precision
+
+    @precision.setter
+    def precision(self, precision: str) -> None:
+        if precision not in precisions:
+            raise ValueError(
+                f"Invalid precision '{precision}', must be one of "
+                f"{precisions}"
+            )
+        self._precision = precision
+        return
+
     @property
     def current_time(self):
         """Get the current time."""
@@ -1,4 +1,8 @@
+import pathlib as pl
 import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from contextlib import nullcontext
 from copy import deepcopy
 from pprint import pprint
 
@@ -6,6 +10,101 @@ import numpy as np
 
 from pynhm.base.adapter import adapter_factory
 from pynhm.base.control import Control
+from pynhm.base.state_store import StateStore
+from pynhm.utils.netcdf_utils import pooled_netcdf_read
+from pynhm.utils.timing import PhaseTimers
+
+# Inputs that are values of the previous time step
+lagged_input_regex = re.compile(".*_(ante|prev|old)$")
+
+# The PRMS order of components, which orders components that do not depend
+# on each other
+component_order_prms = [
+    "PRMSSolarGeometry",
+    "PRMSBoundaryLayer",
+    "PRMSCanopy",
+    "PRMSSnow",
+    "PRMSRunoff",
+    "PRMSSoilzone",
+    "PRMSEt",
+    "PRMSGroundwater",
+    "PRMSChannel",
+]
+
+
+def get_component_dependencies(inputs_from: dict) -> dict:
+    """Get the components each component must wait for in a time step
+
+    A component waits for the components producing its inputs. An input of
+    the previous time step (a lagged input, e.g. pkwater_ante) is the other
+    way around: its producer waits for the component, which has to use the
+    value before the producer updates it.
+
+    Args:
+        inputs_from: dictionary of the components producing each input of
+            each component
+
+    Returns:
+        dependencies: dictionary of the sets of components each component
+            must wait for
+    """
+    dependencies = {component: set() for component in inputs_from.keys()}
+    for component, inputs in inputs_from.items():
+        for input, producers in inputs.items():
+            for producer in producers:
+                if lagged_input_regex.match(input):
+                    dependencies[producer].add(component)
+                else:
+                    dependencies[component].add(producer)
+    return dependencies
+
+
+def get_component_order(
+    dependencies: dict, priority: list = component_order_prms
+) -> list:
+    """Order components so that each comes after those it waits for
+
+    Components that do not depend on each other are ordered by their
+    position in priority, then by name.
+
+    Args:
+        dependencies: dictionary of the sets of components each component
+            must wait for, from get_component_dependencies
+        priority: the preferred order of the components
+
+    Returns:
+        order: list of the components in execution order
+
+    Raises:
+        ValueError: if the dependencies have a cycle
+    """
+
+    def rank(component):
+        if component in priority:
+            return (priority.index(component), component)
+        return (len(priority), component)
+
+    waiting = {
+        component: set(waits_for)
+        for component, waits_for in dependencies.items()
+    }
+    order = []
+    while waiting:
+        ready = [comp for comp, waits in waiting.items() if not waits]
+        if not ready:
+            raise ValueError(
+                "Components have circular dependencies: "
+                + ", ".join(
+                    f"{comp} waits for {sorted(waits)}"
+                    for comp, waits in waiting.items()
+                )
+            )
+        component = min(ready, key=rank)
+        order.append(component)
+        del waiting[component]
+        for waits in waiting.values():
+            waits.discard(component)
+    return order
 
 
 class Model:
@@ -16,11 +115,56 @@ class Model:
         input_dir: str = None,
         budget_type: str = "strict",  # also pass dict
         verbose: bool = False,
+        max_workers: int = None,
+        timing: bool = False,
+        check_aliasing: bool = False,
+        state_store: bool = False,
+        precision: str = None,
     ):
+        """A model of components connected by their inputs and variables
+
+        The components are run in the order of their dependencies, which
+        are solved from the inputs and variables of the component classes.
+
+        Args:
+            component_classes: the classes of the components
+            control: control object
+            input_dir: directory of the input files of inputs that no
+                component produces
+            budget_type: the budget type of the components
+            verbose: print progress
+            max_workers: the number of threads calculating components that
+                do not depend on each other at the same time. The default
+                (None) calculates components one at a time. Components only
+                run in parallel to the extent their calculations release the
+                GIL. Advancing is always done one component at a time.
+            timing: time the phases of the components: advance (of the
+                component variables), inputs (advance of the component
+                inputs), calculate, budget and output. The times are
+                accumulated in the timers attribute, a PhaseTimers, and
+                can be exported with timers.to_json.
+            check_aliasing: debug mode checking, after each advance and
+                calculate, that the inputs from other components are still
+                the arrays of the producing components and the inputs from
+                files are the arrays of their adapters (see
+                check_input_aliasing). Inputs aliasing these arrays are not
+                copied when advanced, so replacing an array, instead of
+                updating it in place, silently disconnects the components.
+            state_store: keep the variables of all the components in a
+                StateStore, the state_store attribute, with a contiguous
+                block for each dimension and type of the variables. The
+                components' variables are views of the blocks.
+            precision: the floating point precision of the components,
+                "double" or "single", setting the precision of the control
+                (see Control). By default, the precision of the control.
+        """
 
         self.control = control
+        if precision is not None:
+            self.control.precision = precision
         self.input_dir = input_dir
         self.verbose = verbose
+        self.check_aliasing = check_aliasing
 
         class_dict = {comp.__name__: comp for comp in component_classes}
         class_inputs = {kk: vv.get_inputs() for kk, vv in class_dict.items()}
@@ -48,33 +192,16 @@ class Model:
                         # this should be a list of length one
                         # check?
 
-        # determine component order
-        # for now this is sufficient. when more classes exist, we can analyze
-        # dependencies, might inputs_from_prev above.
-        component_order_prms = [
-            "PRMSSolarGeometry",
-            "PRMSBoundaryLayer",
-            "PRMSCanopy",
-            "PRMSSnow",
-            "PRMSRunoff",
-            "PRMSSoilzone",
-            "PRMSEt",
-            "PRMSGroundwater",
-            "PRMSChannel",
-        ]
-        self.component_order = []
-        for comp in component_order_prms:
-            if comp in class_dict.keys():
-                self.component_order += [comp]
-
-        missing_components = set(self.component_order).difference(
-            set(class_dict.keys())
-        )
-        if missing_components:
-            raise ValueError(
-                f"Component {missing_components} not currently "
-                f"handled by Model class."
-            )
+        # determine component order from the dependencies
+        self.inputs_from = inputs_from
+        self.component_dependencies = get_component_dependencies(inputs_from)
+        self.component_order = get_component_order(self.component_dependencies)
+
+        self.timers = PhaseTimers() if timing else None
+
+        self._executor = None
+        if max_workers is not None and max_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers)
 
         # If inputs dont come from other components, assume they come from
         # file in input_dir
@@ -85,10 +212,20 @@ class Model:
                     file_input_names = file_input_names.union([k1])
 
         # initiate the file inputs here rather than in the components
+        # inputs from the same file share one pooled reader of the file
         file_inputs = {}
         for name in file_input_names:
-            nc_path = input_dir / f"{name}.nc"
-            file_inputs[name] = adapter_factory(nc_path, name, control=control)
+            nc_path = self._find_input_file(name)
+            file_inputs[name] = adapter_factory(
+                nc_path, name, control=control, pooled=True
+            )
+
+        # the components take the views of their variables from the store
+        # of the control
+        self.state_store = None
+        if state_store:
+            self.state_store = StateStore(control, class_vars)
+        control.state_store = self.state_store
 
         # instantiate components: instance dict
         self.components = {}
@@ -105,6 +242,9 @@ class Model:
             if component not in ["PRMSSolarGeometry"]:
                 args["budget_type"] = budget_type
             self.components[component] = class_dict[component](**args)
+            if self.state_store is not None:
+                # variables set other than by initialize_var
+                self.state_store.bind(self.components[component])
 
         for component in self.component_order:
             print(f"{component}:")
@@ -123,17 +263,186 @@ class Model:
                         ),  # drop list above
                     )
 
+        if self.timers is not None:
+            for component in self.components.values():
+                component.set_timers(self.timers)
+
+    def _find_input_file(self, name: str) -> pl.Path:
+        """Find the file in input_dir for an input variable.
+
+        This is input_dir/name.nc, if it exists, otherwise the first netcdf
+        file in input_dir containing the variable (e.g. a cbh.nc file with
+        several inputs).
+        """
+        input_dir = pl.Path(self.input_dir)
+        nc_path = input_dir / f"{name}.nc"
+        if nc_path.exists():
+            return nc_path
+        for other_path in sorted(input_dir.glob("*.nc")):
+            if name in pooled_netcdf_read(other_path).variables:
+                return other_path
+        return nc_path
+
+    def check_input_aliasing(self) -> None:
+        """Check that the inputs of the components alias their sources
+
+        Inputs from other components must be the arrays of the variables of
+        the producing components and all aliased inputs must be the current
+        values of their adapters (StorageUnit.check_input_aliasing).
+
+        Raises:
+            RuntimeError: if an input no longer aliases its source
+        """
+        for component in self.component_order:
+            self.components[component].check_input_aliasing()
+            for input, frm in self.inputs_from[component].items():
+                if not frm:
+                    continue
+                if (
+                    self.components[component][input]
+                    is not self.components[frm[0]][input]
+                ):
+                    raise RuntimeError(
+                        f"Input '{input}' of {component} is no longer the "
+                        f"variable of {frm[0]}"
+                    )
+        return
+
+    def _time_phase(self, component: str, phase: str):
+        if self.timers is None:
+            return nullcontext()
+        return self.timers.time(component, phase)
+
+    def initialize_netcdf(
+        self,
+        output_dir: str,
+        separate_files: bool = True,
+        **kwargs,
+    ) -> None:
+        """Initialize the output of all the components
+
+        Args:
+            output_dir: the directory of the output files. With separate
+                files, the files of all the variables of all the components
+                are in output_dir. Otherwise, each component writes a
+                single file named after the component.
+            separate_files: write a file for each variable
+            kwargs: other arguments of StorageUnit.initialize_netcdf, e.g.
+                buffer_size, async_write or output_format, used for all the
+                components
+
+        Returns:
+            None
+        """
+        output_dir = pl.Path(output_dir)
+        for cls in self.component_order:
+            name = output_dir
+            if not separate_files:
+                name = output_dir / f"{cls}.nc"
+            self.components[cls].initialize_netcdf(
+                name, separate_files=separate_files, **kwargs
+            )
+        return
+
+    def run(
+        self,
+        n_time_steps: int = None,
+        finalize: bool = True,
+    ) -> None:
+        """Run the model: advance, calculate and output each time step
+
+        Args:
+            n_time_steps: the number of time steps to run, by default the
+                time steps remaining in the control
+            finalize: finalize the model after the last time step
+
+        Returns:
+            None
+        """
+        if n_time_steps is None:
+            n_time_steps = self.control.n_times - self.control.itime_step - 1
+        for istep in range(n_time_steps):
+            if self.verbose:
+                print(f"running time step: {istep}")
+            self.advance()
+            self.calculate()
+            self.output()
+            if self.timers is not None:
+                self.timers.end_step()
+        if finalize:
+            self.finalize()
+        return
+
     def advance(self):
-        self.control.advance()
+        with self._time_phase("Control", "advance"):
+            self.control.advance()
         for cls in self.component_order:
             if self.verbose:
                 print(f"advancing component: {cls}")
-            self.components[cls].advance()
+            with self._time_phase(cls, "advance"):
+                self.components[cls].advance()
+        if self.check_aliasing:
+            self.check_input_aliasing()
         return
 
     def calculate(self):
+        if self._executor is not None:
+            self._calculate_concurrent()
+        else:
+            for cls in self.component_order:
+                if self.verbose:
+                    print(f"calculating component: {cls}")
+                self._calculate_component(cls)
+        if self.check_aliasing:
+            self.check_input_aliasing()
+        return
+
+    def output(self):
         for cls in self.component_order:
             if self.verbose:
-                print(f"calculating component: {cls}")
+                print(f"output component: {cls}")
+            with self._time_phase(cls, "output"):
+                self.components[cls].output()
+        return
+
+    def finalize(self):
+        """Finalize the components and stop the calculation threads"""
+        for cls in self.component_order:
+            if self.verbose:
+                print(f"finalizing component: {cls}")
+            self.components[cls].finalize()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        return
+
+    def _calculate_component(self, cls: str) -> None:
+        with self._time_phase(cls, "calculate"):
             self.components[cls].calculate(1.0)
         return
+
+    def _calculate_concurrent(self):
+        """Calculate each component as soon as the components it waits for
+        are calculated"""
+        waiting = {
+            component: set(self.component_dependencies[component])
+            for component in self.component_order
+        }
+        running = {}
+        while waiting or running:
+            for cls in [comp for comp, waits in waiting.items() if not waits]:
+                if self.verbose:
+                    print(f"calculating component: {cls}")
+                del waiting[cls]
+                future = self._executor.submit(self._calculate_component, cls)
+                running[future] = cls
+            done, _ = wait_futures(running.keys(), return_when=FIRST_COMPLETED)
+            for future in done:
+                cls = running.pop(future)
+                if future.exception() is not None:
+                    # let the running calculations finish before raising
+                    wait_futures(running.keys())
+                    raise future.exception()
+                for waits in waiting.values():
+                    waits.discard(cls)
+        return
@@ -0,0 +1,192 @@
+import numpy as np
+
+from .control import Control
+from .storageUnit import precision_type_translation
+
+# The dimensions of the variables kept in a StateStore
+state_store_dimensions = ["nhru", "nsegment"]
+
+
+class StateStore:
+    def __init__(
+        self,
+        control: Control,
+        component_variables: dict,
+    ) -> "StateStore":
+        """A structure of arrays store of the variables of components
+
+        The variables of all the components are kept in one contiguous 2-D
+        block per group of variables with the same dimension (nhru or
+        nsegment) and type, with a row for each variable. Components use
+        views of their rows as their variables, so that the state of a
+        model can be snapshot, restored or written a block at a time and
+        compiled kernels can be passed whole blocks.
+
+        Variables that are not 1-D on a store dimension (per the metadata)
+        are not stored.
+
+        Args:
+            control: control object, with the parameters giving the sizes
+                of the dimensions
+            component_variables: dictionary of the lists of variables of
+                each component, e.g. from the get_variables of the component
+                classes
+
+        Examples:
+            store = StateStore(control, {"PRMSCanopy": ["intcp_stor"]})
+            intcp_stor = store.view("PRMSCanopy", "intcp_stor")
+            snapshot = store.snapshot()
+            store.restore(snapshot)
+        """
+        self.control = control
+        self._index = {}
+        self._group_variables = {}
+        translation = precision_type_translation[control.precision]
+        for component, variables in component_variables.items():
+            var_meta = control.meta.get_vars(variables)
+            for variable in variables:
+                if variable not in var_meta.keys():
+                    continue
+                dimensions = var_meta[variable]["dimensions"]
+                if len(dimensions) != 1:
+                    continue
+                dimension = dimensions[0]
+                if dimension not in state_store_dimensions:
+                    continue
+                dtype = translation[var_meta[variable]["type"]]
+                group = (dimension, dtype)
+                group_vars = self._group_variables.setdefault(group, [])
+                self._index[(component, variable)] = (group, len(group_vars))
+                group_vars.append((component, variable))
+
+        self._blocks = {}
+        for group, group_vars in self._group_variables.items():
+            dimension, dtype = group
+            size = control.params.parameters[dimension]
+            self._blocks[group] = np.zeros((len(group_vars), size), dtype)
+
+        # the views are made once, so variables can be checked by identity
+        self._views = {
+            key: self._blocks[group][row]
+            for key, (group, row) in self._index.items()
+        }
+        return
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._index
+
+    @property
+    def blocks(self) -> dict:
+        """The 2-D blocks of the variables, by (dimension, dtype)"""
+        return self._blocks
+
+    @property
+    def group_variables(self) -> dict:
+        """The (component, variable) of the rows of each block"""
+        return self._group_variables
+
+    def view(self, component: str, variable: str) -> np.ndarray:
+        """Get the view of the row of a variable of a component
+
+        Args:
+            component: the component name
+            variable: the variable name
+
+        Returns:
+            view: a 1-D view of the block of the variable
+        """
+        return self._views[(component, variable)]
+
+    def bind(self, storage_unit) -> list:
+        """Bind the variables of a storage unit to their views
+
+        Variables that are not already views of the store (e.g. set by
+        set_initial_conditions) are copied into their views, which replace
+        them in the storage unit and its budget. Variables of a different
+        shape or type than their views are left unbound.
+
+        Args:
+            storage_unit: the storage unit
+
+        Returns:
+            unbound: list of the variables of the storage unit that are not
+                views of the store
+        """
+        component = type(storage_unit).__name__
+        replaced = {}
+        for variable in storage_unit.variables:
+            if (component, variable) not in self._index:
+                continue
+            view = self.view(component, variable)
+            value = getattr(storage_unit, variable, None)
+            if value is view:
+                continue
+            if not isinstance(value, np.ndarray) or (
+                value.shape != view.shape or value.dtype != view.dtype
+            ):
+                continue
+            view[:] = value
+            storage_unit[variable] = view
+            replaced[id(value)] = view
+
+        budget = getattr(storage_unit, "budget", None)
+        if budget is not None and replaced:
+            for budget_component in budget.components:
+                terms = budget[budget_component]
+                for term, value in terms.items():
+                    if id(value) in replaced:
+                        terms[term] = replaced[id(value)]
+
+        return self.unbound_variables(storage_unit)
+
+    def unbound_variables(self, storage_unit) -> list:
+        """Get the variables of a storage unit that are not views of the
+        store, e.g. because they were replaced instead of updated in place
+
+        Args:
+            storage_unit: the storage unit
+
+        Returns:
+            unbound: list of variable names
+        """
+        component = type(storage_unit).__name__
+        return [
+            variable
+            for variable in storage_unit.variables
+            if (component, variable) in self._index
+            and getattr(storage_unit, variable, None)
+            is not self.view(component, variable)
+        ]
+
+    def snapshot(self) -> dict:
+        """Get a copy of the blocks
+
+        Returns:
+            snapshot: dictionary of copies of the blocks by group
+        """
+        return {group: block.copy() for group, block in self._blocks.items()}
+
+    def restore(self, snapshot: dict) -> None:
+        """Restore the blocks from a snapshot, in place
+
+        Args:
+            snapshot: a snapshot from snapshot
+
+        Returns:
+            None
+        """
+        for group, block in snapshot.items():
+            self._blocks[group][:] = block
+        return
+
+    def to_dict(self) -> dict:
+        """Get views of all the variables
+
+        Returns:
+            variables: dictionary of dictionaries of the views of the
+                variables of each component
+        """
+        variables = {}
+        for (component, variable), view in self._views.items():
+            variables.setdefault(component, {})[variable] = view
+        return variables
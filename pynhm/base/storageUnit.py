@@ -1,5 +1,7 @@
 import os
 import pathlib as pl
+from contextlib import nullcontext
+from typing import Union
 
 import numpy as np
 
@@ -7,6 +9,9 @@ from pynhm.base.budget import Budget
 
 from ..base.adapter import Adapter, adapter_factory
 from ..utils.netcdf_utils import NetCdfWrite
+from ..utils.time_utils import datetime_water_year
+from ..utils.timing import PhaseTimers
+from ..utils.zarr_utils import ZarrWrite
 from .accessor import Accessor
 from .control import Control
 
@@ -18,6 +23,35 @@ type_translation = {
     "B": "bool",  # not used despite the popularity of "flags"
 }
 
+# The type translations of the precisions of Control. In single precision,
+# "F" (float) parameters, inputs and variables are float32 while "D"
+# (double) ones remain float64.
+precision_type_translation = {
+    "double": type_translation,
+    "single": {**type_translation, "F": "float32"},
+}
+
+# Output writers by format name. A writer class takes the same arguments as
+# NetCdfWrite and implements add_simulation_time, add_data and close.
+output_backends = {
+    "netcdf": NetCdfWrite,
+    "zarr": ZarrWrite,
+}
+
+# Statistics of variables over periods of time available for netcdf output
+# and their CF cell_methods names
+output_statistics = {
+    "mean": "mean",
+    "sum": "sum",
+    "min": "minimum",
+    "max": "maximum",
+}
+output_periods = {
+    "daily": lambda time: time.astype("datetime64[D]"),
+    "monthly": lambda time: time.astype("datetime64[M]"),
+    "water_year": datetime_water_year,
+}
+
 
 class StorageUnit(Accessor):
     def __init__(
@@ -38,6 +72,11 @@ class StorageUnit(Accessor):
         self._separate_netcdf = True
         self._itime_step = -1
 
+        # phase timing, see set_timers
+        self._timers = None
+        # inputs aliasing their adapter's current value, see set_inputs
+        self._aliased_inputs = set()
+
         self.get_metadata()
         self.initialize_self_variables()
         self.set_initial_conditions()
@@ -106,10 +145,27 @@ class StorageUnit(Accessor):
         return self.get_init_values()
 
     def initialize_self_variables(self, restart: bool = False):
+        translation = precision_type_translation[self.control.precision]
+        single = self.control.precision == "single"
+        param_meta = self.control.meta.get_params(self.parameters)
         for name in self.parameters:
-            setattr(self, name, self.params.parameters[name])
+            value = self.params.parameters[name]
+            # demote float parameters to single precision
+            if (
+                single
+                and isinstance(value, np.ndarray)
+                and value.dtype.kind == "f"
+                and name in param_meta.keys()
+                and param_meta[name]["type"] == "F"
+            ):
+                value = value.astype(translation["F"], copy=False)
+            setattr(self, name, value)
+        input_meta = self.control.meta.get_vars(self.inputs)
         for name in self.inputs:
-            setattr(self, name, np.zeros(self.nhru, dtype=float) + np.nan)
+            input_type = float
+            if name in input_meta.keys() and input_meta[name]["type"] == "F":
+                input_type = translation["F"]
+            setattr(self, name, np.full(self.nhru, np.nan, dtype=input_type))
         # skip restart variables if restart (for speed) ?
         # the code is below but commented.
         # restart_variables = self.restart_variables
@@ -118,16 +174,6 @@ class StorageUnit(Accessor):
             #     continue
             self.initialize_var(name)
 
-        # demote any self variables to single?
-        # for vv in self.__dict__.keys():
-        # for vv in self.parameters:
-        #     if (
-        #         isinstance(self[vv], np.ndarray)
-        #         and self[vv].dtype == "float64"
-        #     ):
-        #         print(f"converting {vv} from float64 to float32")
-        #         self[vv] = self[vv].astype("float32")
-
         return
 
     def initialize_var(self, var_name):
@@ -137,12 +183,21 @@ class StorageUnit(Accessor):
             nsize = self.nhru
         init_vals = self.get_init_values()
         if var_name in init_vals.keys():
-            init_type = type_translation[self.var_meta[var_name]["type"]]
-            setattr(
-                self,
-                var_name,
-                np.full(nsize, init_vals[var_name], dtype=init_type),
-            )
+            init_type = precision_type_translation[self.control.precision][
+                self.var_meta[var_name]["type"]
+            ]
+            store = self.control.state_store
+            if store is not None and (type(self).__name__, var_name) in store:
+                # use the view of the variable in the shared state store
+                view = store.view(type(self).__name__, var_name)
+                view[:] = init_vals[var_name]
+                setattr(self, var_name, view)
+            else:
+                setattr(
+                    self,
+                    var_name,
+                    np.full(nsize, init_vals[var_name], dtype=init_type),
+                )
         elif self.verbose:
             print(f"{var_name} not initialized (no initial value specified)")
 
@@ -157,19 +212,61 @@ class StorageUnit(Accessor):
     def _advance_inputs(self):
         for key, value in self._input_variables_dict.items():
             value.advance()
-            self[key][:] = value.current
+            # aliased inputs are already the current value of their adapter
+            if key not in self._aliased_inputs:
+                self[key][:] = value.current
 
         return
 
     def set_inputs(self, args):
         self._input_variables_dict = {}
+        self._aliased_inputs = set()
         for ii in self.inputs:
             self._input_variables_dict[ii] = adapter_factory(
                 args[ii], ii, args["control"]
             )
             if self._input_variables_dict[ii]:
                 self[ii] = self._input_variables_dict[ii].current
+                if self._input_variables_dict[ii].current_in_place:
+                    self._aliased_inputs.add(ii)
+
+        return
 
+    @property
+    def aliased_inputs(self) -> set:
+        """The inputs that alias the current value of their adapter
+
+        These inputs are not copied when they are advanced. The other
+        inputs, from adapters that replace their current value each time
+        step, are copied.
+        """
+        return self._aliased_inputs
+
+    def check_input_aliasing(self) -> None:
+        """Check that the aliased inputs are the current values of their
+        adapters, and the arrays used by the budget
+
+        Raises:
+            RuntimeError: if an aliased input is not its adapter's current
+                value, e.g. because either array was replaced instead of
+                updated in place.
+        """
+        for key in self._aliased_inputs:
+            if self[key] is not self._input_variables_dict[key].current:
+                raise RuntimeError(
+                    f"Input '{key}' of {self.name} is no longer the current "
+                    f"value of its adapter"
+                )
+            if self.budget is None:
+                continue
+            for comp in self.budget.components:
+                if key in self.budget[comp].keys() and (
+                    self.budget[comp][key] is not self[key]
+                ):
+                    raise RuntimeError(
+                        f"Input '{key}' of {self.name} is no longer the "
+                        f"array of its budget"
+                    )
         return
 
     def set_input_to_adapter(self, input_variable_name: str, adapter: Adapter):
@@ -181,6 +278,10 @@ class StorageUnit(Accessor):
         # advance of this storage unit. But that gives the incorrect budget
         # for et.
         self[input_variable_name] = adapter.current
+        if adapter.current_in_place:
+            self._aliased_inputs.add(input_variable_name)
+        else:
+            self._aliased_inputs.discard(input_variable_name)
 
         # Using a pointer between boxes means that the same pointer has to
         # be used for the budget, so there's no way to have a preestablished
@@ -229,7 +330,8 @@ class StorageUnit(Accessor):
             return
 
         self._advance_variables()
-        self._advance_inputs()
+        with self._time_phase("inputs"):
+            self._advance_inputs()
         self._itime_step += 1
         return
 
@@ -243,15 +345,34 @@ class StorageUnit(Accessor):
             None
         """
         # self._calculate must be implemented by the subclass
-        self._calculate(time_length, *kwargs)
+        self._calculate(time_length, **kwargs)
 
         # move to a timestep finalization method at some future date.
         if self.budget is not None:
-            self.budget.advance()
-            self.budget.calculate()
+            with self._time_phase("budget"):
+                self.budget.advance()
+                self.budget.calculate()
 
         return
 
+    def set_timers(self, timers: PhaseTimers) -> None:
+        """Time the inputs and budget phases of the storage unit
+
+        Args:
+            timers: the timers to accumulate the time of the phases in, None
+                to stop timing
+
+        Returns:
+            None
+        """
+        self._timers = timers
+        return
+
+    def _time_phase(self, phase: str):
+        if self._timers is None:
+            return nullcontext()
+        return self._timers.time(type(self).__name__, phase)
+
     def get_metadata(self):
         self.var_meta = self.control.meta.get_vars(self.variables)
         self.input_meta = self.control.meta.get_vars(self.inputs)
@@ -292,6 +413,10 @@ class StorageUnit(Accessor):
         self,
         name: str,
         separate_files: bool = True,
+        buffer_size: int = None,
+        async_write: bool = False,
+        output_spec: dict = None,
+        output_format: Union[str, type] = "netcdf",
     ) -> None:
         """Initialize
 
@@ -301,11 +426,45 @@ class StorageUnit(Accessor):
             separate_files: boolean indicating if storage component output
                 variables should be written to a separate file for each
                 variable
+            buffer_size: the number of time steps buffered in memory before
+                they are written to file, the time chunk size by default.
+                Buffered time steps are written on finalize.
+            async_write: write the output in a background thread. finalize
+                waits for the writes to finish and raises any exception from
+                them.
+            output_spec: the variables to output. A dict with variable names
+                as keys and values of either None, to output the value at
+                every time step, or a dict with a "statistic" ("mean",
+                "sum", "min" or "max") and a "period" ("daily", "monthly" or
+                "water_year") to output the statistic of the variable for
+                each period. The time of a statistic is the start of its
+                period. By default, all variables are output at every time
+                step.
+            output_format: the name of an output backend in
+                output_backends ("netcdf" or "zarr") or a writer class with
+                the interface of NetCdfWrite. Separate files are named with
+                the file_extension of the writer class.
 
         Returns:
             None
 
         """
+        if isinstance(output_format, str):
+            if output_format not in output_backends.keys():
+                raise ValueError(
+                    f"Unknown output format '{output_format}', must be one "
+                    f"of {list(output_backends.keys())}"
+                )
+            writer = output_backends[output_format]
+        else:
+            writer = output_format
+
+        self._initialize_output_spec(output_spec, separate_files)
+        output_meta = {
+            variable: self._output_meta(variable)
+            for variable in self._output_variables
+        }
+
         self._output_netcdf = True
         self._netcdf = {}
         if separate_files:
@@ -313,27 +472,94 @@ class StorageUnit(Accessor):
             # make working directory
             working_path = pl.Path(name)
             working_path.mkdir(parents=True, exist_ok=True)
-            for variable_name in self.variables:
-                nc_path = pl.Path(working_path) / f"{variable_name}.nc"
-                self._netcdf[variable_name] = NetCdfWrite(
+            for variable_name in self._output_variables:
+                nc_path = (
+                    pl.Path(working_path)
+                    / f"{variable_name}{writer.file_extension}"
+                )
+                self._netcdf[variable_name] = writer(
                     nc_path,
                     self.params.nhm_coordinates,
                     [variable_name],
-                    {variable_name: self.var_meta[variable_name]},
+                    {variable_name: output_meta[variable_name]},
+                    buffer_size=buffer_size,
+                    async_write=async_write,
                 )
         else:
-            initial_variable = self.variables[0]
-            pl.Path(name).mkdir(parents=True, exist_ok=True)
-            self._netcdf[initial_variable] = NetCdfWrite(
+            self._separate_netcdf = False
+            initial_variable = self._output_variables[0]
+            pl.Path(name).parent.mkdir(parents=True, exist_ok=True)
+            self._netcdf[initial_variable] = writer(
                 name,
                 self.params.nhm_coordinates,
-                self.variables,
-                self.var_meta,
+                self._output_variables,
+                output_meta,
+                buffer_size=buffer_size,
+                async_write=async_write,
             )
-            for variable in self.variables[1:]:
+            for variable in self._output_variables[1:]:
                 self._netcdf[variable] = self._netcdf[initial_variable]
         return
 
+    def _initialize_output_spec(
+        self, output_spec: dict, separate_files: bool
+    ) -> None:
+        if output_spec is None:
+            output_spec = {variable: None for variable in self.variables}
+        if not len(output_spec):
+            raise ValueError("output_spec has no variables")
+
+        self._output_variables = list(output_spec.keys())
+        self._output_spec = {}
+        self._output_accumulators = {}
+        for variable, spec in output_spec.items():
+            if variable not in self.variables:
+                raise ValueError(
+                    f"'{variable}' is not a variable of {self.name}"
+                )
+            self._output_spec[variable] = spec
+            if spec is None:
+                continue
+            if spec.get("statistic") not in output_statistics.keys():
+                raise ValueError(
+                    f"Invalid output statistic for '{variable}': "
+                    f"'{spec.get('statistic')}'"
+                )
+            if spec.get("period") not in output_periods.keys():
+                raise ValueError(
+                    f"Invalid output period for '{variable}': "
+                    f"'{spec.get('period')}'"
+                )
+            self._output_accumulators[variable] = {
+                "value": None,
+                "count": 0,
+                "period": None,
+                "start": None,
+                "index": 0,
+            }
+
+        # All variables in a file share its time dimension
+        if not separate_files:
+            periods = set(
+                None if spec is None else spec["period"]
+                for spec in self._output_spec.values()
+            )
+            if len(periods) > 1:
+                raise ValueError(
+                    "Variables output to a single file must have the same "
+                    "output period"
+                )
+        return
+
+    def _output_meta(self, variable: str) -> dict:
+        spec = self._output_spec[variable]
+        if spec is None:
+            return self.var_meta[variable]
+        meta = dict(self.var_meta[variable])
+        meta["cell_methods"] = f"time: {output_statistics[spec['statistic']]}"
+        meta["output_period"] = spec["period"]
+        return meta
+
     def __output_netcdf(self) -> None:
         """Output variable data for a time step
 
@@ -342,8 +568,12 @@ class StorageUnit(Accessor):
 
         """
         if self._output_netcdf:
-            for idx, variable in enumerate(self.variables):
-                if idx == 0 or self._separate_netcdf:
+            for idx, variable in enumerate(self._output_variables):
+                write_time = idx == 0 or self._separate_netcdf
+                if self._output_spec[variable] is not None:
+                    self._accumulate_output(variable, write_time)
+                    continue
+                if write_time:
                     self._netcdf[variable].add_simulation_time(
                         self._itime_step,
                         self._simulation_time,
@@ -355,10 +585,70 @@ class StorageUnit(Accessor):
                 )
         return
 
+    def _accumulate_output(self, variable: str, write_time: bool) -> None:
+        """Accumulate the statistic of a variable over its output period
+
+        The statistic of a period is written when the next period starts.
+        """
+        spec = self._output_spec[variable]
+        accum = self._output_accumulators[variable]
+        current_time = self.control.current_time
+        period = output_periods[spec["period"]](current_time)
+        if accum["count"] and (period != accum["period"]):
+            self._write_accumulated_output(variable, write_time)
+
+        value = getattr(self, variable)
+        if accum["value"] is None:
+            accum["value"] = np.array(value, dtype="float64")
+        if not accum["count"]:
+            accum["value"][:] = value
+            accum["period"] = period
+            accum["start"] = current_time
+        elif spec["statistic"] in ["mean", "sum"]:
+            np.add(accum["value"], value, out=accum["value"])
+        elif spec["statistic"] == "min":
+            np.minimum(accum["value"], value, out=accum["value"])
+        elif spec["statistic"] == "max":
+            np.maximum(accum["value"], value, out=accum["value"])
+        accum["count"] += 1
+        return
+
+    def _write_accumulated_output(self, variable: str, write_time: bool):
+        accum = self._output_accumulators[variable]
+        value = accum["value"]
+        if self._output_spec[variable]["statistic"] == "mean":
+            value = value / accum["count"]
+        if write_time:
+            # days since 1970-01-01, the default time units of NetCdfWrite
+            start_days = (
+                accum["start"] - np.datetime64("1970-01-01")
+            ) / np.timedelta64(1, "D")
+            self._netcdf[variable].add_simulation_time(
+                accum["index"], start_days
+            )
+        self._netcdf[variable].add_data(variable, accum["index"], value)
+        accum["index"] += 1
+        accum["count"] = 0
+        return
+
     def _finalize_netcdf(self) -> None:
         if self._output_netcdf:
-            for idx, variable in enumerate(self.variables):
-                self._netcdf[variable].close()
+            # write the statistics of the last (partial) periods
+            for idx, variable in enumerate(self._output_variables):
+                if self._output_accumulators.get(variable, {}).get("count"):
+                    self._write_accumulated_output(
+                        variable, idx == 0 or self._separate_netcdf
+                    )
+            # close all the files before raising any error from writing them
+            error = None
+            for idx, variable in enumerate(self._output_variables):
+                try:
+                    self._netcdf[variable].close()
+                except Exception as close_error:
+                    if error is None:
+                        error = close_error
                 if not self._separate_netcdf:
                     break
+            if error is not None:
+                raise error
         return
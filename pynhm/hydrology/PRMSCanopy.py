@@ -14,8 +14,8 @@ NEARZERO = 1.0e-6
 DNEARZERO = np.finfo(float).eps  # EPSILON(0.0D0)
 BARESOIL = CovType.BARESOIL.value
 GRASSES = CovType.GRASSES.value
-LAND = HruType.LAND
-LAKE = HruType.LAKE
+LAND = HruType.LAND.value
+LAKE = HruType.LAKE.value
 RAIN = 0
 SNOW = 1
 OFF = 0
@@ -44,6 +44,8 @@ class PRMSCanopy(StorageUnit):
         return
 
     def set_initial_conditions(self):
+        # set hru_type to LAND as this is only type supported in NHM
+        self._hru_type = np.full(self.nhru, LAND)
         return
 
     @staticmethod
@@ -138,18 +140,19 @@ class PRMSCanopy(StorageUnit):
         self.hru_intcpstor_old[:] = self.hru_intcpstor
         return
 
-    def _calculate(self, time_length, vectorized=False):
+    def _calculate(self, time_length, vectorized=True):
         """Calculate canopy terms for a time step
 
         Args:
             simulation_time: current simulation time
+            vectorized: boolean indicating if the vectorized (default) or
+                the procedural (per HRU) calculation should be used
 
         Returns:
             None
 
         """
         if vectorized:
-            # todo: not implemented yet
             self.calculate_vectorized(time_length)
         else:
             self.calculate_procedural(time_length)
@@ -169,9 +172,7 @@ class PRMSCanopy(StorageUnit):
         hru_snow = self.hru_snow
         intcp_form = self.intcp_form
         transp_on = self.transp_on
-
-        # set hrutype to LAND as this is only type supported in NHM
-        hru_type = np.array(self.nhru * [LAND])
+        hru_type = self._hru_type
 
         for i in range(self.nhru):
             harea = self.hru_area[i]
@@ -328,6 +329,119 @@ class PRMSCanopy(StorageUnit):
 
         return
 
+    def calculate_vectorized(self, time_length):
+        # Same as calculate_procedural but with masked array operations
+        # over all HRUs.
+        hru_ppt = self.hru_ppt
+        potet = self.potet
+        hru_rain = self.hru_rain
+        hru_snow = self.hru_snow
+        transp_on = self.transp_on
+        cov_type = self.cov_type
+
+        transp_active = transp_on == ACTIVE
+        cov = np.where(transp_active, self.covden_sum, self.covden_win)
+        stor_max_rain = np.where(
+            transp_active, self.srain_intcp, self.wrain_intcp
+        )
+
+        self.intcp_form[:] = np.where(hru_snow > 0.0, SNOW, RAIN)
+
+        netrain = hru_rain.astype(float)
+        netsnow = hru_snow.astype(float)
+        intcpstor = self.intcp_stor.copy()
+        intcpevap = np.zeros(self.nhru)
+
+        # lake or bare ground hrus
+        lake = self._hru_type == LAKE
+        baresoil = cov_type == BARESOIL
+        intcpstor[lake | baresoil] = 0.0
+
+        # go from summer to winter cover density and
+        # go from winter to summer cover density, excess = throughfall
+        to_winter = (transp_on == OFF) & (self.intcp_transp_on == ACTIVE)
+        to_summer = transp_active & (self.intcp_transp_on == OFF)
+        self.intcp_transp_on[to_winter] = OFF
+        self.intcp_transp_on[to_summer] = ACTIVE
+        covden_prev = np.where(to_winter, self.covden_sum, self.covden_win)
+        changing = (to_winter | to_summer) & (intcpstor > 0.0)
+        rescale = (
+            changing & (cov > 0.0) & (intcpstor * (covden_prev - cov) < 0.0)
+        )
+        intcpstor[rescale] = (
+            intcpstor[rescale] * covden_prev[rescale] / cov[rescale]
+        )
+        intcpstor[changing & ~(cov > 0.0)] = 0.0
+
+        # Determine the amount of interception from rain
+        # if there is no snowpack and no snowfall, then apparently, grasses
+        # can intercept rain.
+        rain_intcp = (~lake & ~baresoil & (hru_rain > 0.0) & (cov > 0.0)) & (
+            (cov_type > GRASSES)
+            | (
+                (cov_type == GRASSES)
+                & (self.pkwater_ante < DNEARZERO)
+                & (netsnow < NEARZERO)
+            )
+        )
+        self.update_net_precip(
+            hru_rain,
+            stor_max_rain,
+            cov,
+            intcpstor,
+            netrain,
+            np.where(rain_intcp),
+        )
+
+        # Determine amount of interception from snow
+        snow_intcp = (hru_snow > 0.0) & (cov > 0.0) & (cov_type > GRASSES)
+        self.update_net_precip(
+            hru_snow,
+            self.snow_intcp,
+            cov,
+            intcpstor,
+            netsnow,
+            np.where(snow_intcp),
+        )
+        snow_to_rain = snow_intcp & (netsnow < NEARZERO)
+        netrain[snow_to_rain] = netrain[snow_to_rain] + netsnow[snow_to_rain]
+        netsnow[snow_to_rain] = 0.0
+
+        # compute evaporation or sublimation of interception
+        # if precipitation assume no evaporation or sublimation
+        epan_coef = 1.0
+        evrn = potet / epan_coef
+        evsn = potet * self.potet_sublim
+        evap = np.where(self.intcp_form == SNOW, evsn, evrn)
+        evaporating = (intcpstor > 0.0) & (hru_ppt < NEARZERO)
+        remaining = intcpstor - evap
+        partial = evaporating & (remaining > 0.0)
+        total = evaporating & ~(remaining > 0.0)
+        intcpevap[partial] = evap[partial]
+        intcpstor[partial] = remaining[partial]
+        intcpevap[total] = intcpstor[total]
+        intcpstor[total] = 0.0
+
+        limit = intcpevap * cov > potet
+        last = intcpevap[limit]
+        intcpevap[limit] = np.where(
+            cov[limit] > 0.0,
+            potet[limit] / np.where(cov[limit] > 0.0, cov[limit], 1.0),
+            0.0,
+        )
+        intcpstor[limit] = intcpstor[limit] + last - intcpevap[limit]
+
+        # Store calculated values in output variables
+        self.intcp_evap[:] = intcpevap
+        self.intcp_stor[:] = intcpstor
+        self.net_rain[:] = netrain
+        self.net_snow[:] = netsnow
+        self.net_ppt[:] = netrain + netsnow
+        self.hru_intcpstor[:] = intcpstor * cov
+        self.hru_intcpevap[:] = intcpevap * cov
+
+        return
+
     @staticmethod
     def intercept(precip, stor_max, cov, intcp_stor, net_precip):
         net_precip = precip * (1.0 - cov)
@@ -343,8 +457,7 @@ class PRMSCanopy(StorageUnit):
     ):
         net_precip[idx] = precip[idx] * (1.0 - covden[idx])
         intcp_stor[idx] += precip[idx]
-        for i in idx[0]:
-            if intcp_stor[i] > stor_max[i]:
-                net_precip[i] += (intcp_stor[i] - stor_max[i]) * covden[i]
-                intcp_stor[i] = stor_max[i]
+        excess = np.maximum(intcp_stor[idx] - stor_max[idx], 0.0)
+        net_precip[idx] += excess * covden[idx]
+        intcp_stor[idx] = np.minimum(intcp_stor[idx], stor_max[idx])
         return
@@ -1,8 +1,7 @@
 from typing import Tuple, Union
 
-import networkx as nx
 import numpy as np
-from numba import jit
+from numba import jit, prange
 
 from pynhm.base.storageUnit import StorageUnit
 
@@ -14,6 +13,11 @@ FT2_PER_ACRE = 43560.0
 INCHES_PER_FOOT = 12.0
 SECS_PER_HOUR = 3600.0
 
+# Muskingum travel time bins (hours)
+TS_BIN_EDGES = np.array([1.0, 2.0, 3.0, 4.0, 6.0, 8.0, 12.0, 24.0])
+TS_BINS = np.array([1.0, 1.0, 2.0, 3.0, 4.0, 6.0, 8.0, 12.0, 24.0])
+TSI_BINS = np.array([-1, 1, 2, 3, 4, 6, 8, 12, 24], dtype=int)
+
 
 class PRMSChannel(StorageUnit):
     """PRMS channel flow (muskingum_mann)
@@ -63,6 +67,10 @@ class PRMSChannel(StorageUnit):
         sroff: surface runoff adapter object
         ssres_flow: subsurface (gravity) reservoir lateral flow adapter object
         gwres_flow: groundwater reservoir baseflow adapter object
+        calc_method: one of "numba" (default) or "numba_parallel". The
+            numba_parallel method routes the segments in each topological
+            level of the stream network in parallel and gives results that
+            are bit-identical to the serial numba method.
         verbose: verbose output boolean (default is False)
 
 
@@ -74,6 +82,7 @@ class PRMSChannel(StorageUnit):
         sroff: adaptable,
         ssres_flow: adaptable,
         gwres_flow: adaptable,
+        calc_method: str = None,
         verbose: bool = False,
     ) -> "PRMSChannel":
 
@@ -85,6 +94,12 @@ class PRMSChannel(StorageUnit):
 
         self.set_inputs(locals())
 
+        if calc_method is None:
+            calc_method = "numba"
+        if calc_method not in ["numba", "numba_parallel"]:
+            raise ValueError(f"Invalid calc_method: '{calc_method}'")
+        self._calc_method = calc_method
+
         # process channel data
         self._initialize_channel_data()
 
@@ -96,27 +111,18 @@ class PRMSChannel(StorageUnit):
         self.hru_segment -= 1
         self.tosegment -= 1
 
-        # calculate connectivity
-        connectivity = []
-        for iseg in range(self.nsegment):
-            tosegment = self.tosegment[iseg]
-            if tosegment < 0:
-                continue
-            connectivity.append(
-                (
-                    iseg,
-                    tosegment,
-                )
-            )
-
-        # use networkx to calculate the Directed Acyclic Graph
-        if self.nsegment > 1:
-            graph = nx.DiGraph()
-            graph.add_edges_from(connectivity)
-            segment_order = list(nx.topological_sort(graph))
-        else:
-            segment_order = [0]
-        self._segment_order = np.array(segment_order, dtype=int)
+        # calculate the routing order and the topological level of each
+        # segment. Segments in a level only receive flow from segments in
+        # lower levels so they can be routed independently of each other.
+        self._segment_order, self._segment_level = calculate_segment_order(
+            self.tosegment
+        )
+        (
+            self._level_ptr,
+            self._level_segments,
+            self._upstream_ptr,
+            self._upstream_segments,
+        ) = self._partition_segments()
 
         # calculate the Muskingum parameters
         velocity = (
@@ -148,38 +154,11 @@ class PRMSChannel(StorageUnit):
         Kcoef = np.where(Kcoef < 0.01, 0.01, Kcoef)
         self._Kcoef = np.where(Kcoef > 24.0, 24.0, Kcoef)
 
-        self._ts = np.ones(self.nsegment, dtype=float)
-        self._tsi = np.ones(self.nsegment, dtype=int)
-
-        # todo: vectorize this
-        for iseg in range(self.nsegment):
-            k = self._Kcoef[iseg]
-            if k < 1.0:
-                self._tsi[iseg] = -1
-            elif k < 2.0:
-                self._ts[iseg] = 1.0
-                self._tsi[iseg] = 1
-            elif k < 3.0:
-                self._ts[iseg] = 2.0
-                self._tsi[iseg] = 2
-            elif k < 4.0:
-                self._ts[iseg] = 3.0
-                self._tsi[iseg] = 3
-            elif k < 6.0:
-                self._ts[iseg] = 4.0
-                self._tsi[iseg] = 4
-            elif k < 8.0:
-                self._ts[iseg] = 6.0
-                self._tsi[iseg] = 6
-            elif k < 12.0:
-                self._ts[iseg] = 8.0
-                self._tsi[iseg] = 8
-            elif k < 24.0:
-                self._ts[iseg] = 12.0
-                self._tsi[iseg] = 12
-            else:
-                self._ts[iseg] = 24.0
-                self._tsi[iseg] = 24
+        # round the travel time down to an even divisor of 24 hours. Travel
+        # times less than one hour are flagged with a tsi of -1.
+        ibin = np.searchsorted(TS_BIN_EDGES, self._Kcoef, side="right")
+        self._tsi = TSI_BINS[ibin]
+        self._ts = TS_BINS[ibin]
 
         d = self._Kcoef - (self._Kcoef * self.x_coef) + (0.5 * self._ts)
         d = np.where(np.abs(d) < 1e-6, 0.0001, d)
@@ -207,15 +186,65 @@ class PRMSChannel(StorageUnit):
         self._outflow_ts = np.zeros(self.nsegment, dtype=float)
         self._seg_current_sum = np.zeros(self.nsegment, dtype=float)
 
-        # initialize internal sef_inflow variable
-        for iseg in range(self.nsegment):
-            jseg = self.tosegment[iseg]
-            if jseg < 0:
-                continue
-            self._seg_inflow[jseg] = self.seg_outflow[iseg]
+        # initialize internal seg_inflow variable as the sum of the outflow
+        # from the upstream segments
+        idx = self.tosegment >= 0
+        self._seg_inflow[:] = np.bincount(
+            self.tosegment[idx],
+            weights=self.seg_outflow[idx],
+            minlength=self.nsegment,
+        )
+
+        # HRU to segment mapping used to aggregate the lateral inflow
+        self._hru_active = np.where(self.hru_segment >= 0)[0]
+        self._hru_to_segment = self.hru_segment[self._hru_active]
 
         return
 
+    @property
+    def segment_order(self) -> np.ndarray:
+        """Topological routing order of the segments (zero-based)"""
+        return self._segment_order
+
+    @property
+    def segment_level(self) -> np.ndarray:
+        """Topological level (depth from the headwaters) of each segment"""
+        return self._segment_level
+
+    def _partition_segments(self) -> Tuple[np.ndarray, ...]:
+        """Compressed level and upstream connectivity for parallel routing
+
+        Returns:
+            level_ptr: start of each level in level_segments
+            level_segments: segments sorted by topological level
+            upstream_ptr: start of the upstream segments of each segment in
+                upstream_segments
+            upstream_segments: upstream segments of each segment in the
+                order the serial routing adds their outflow
+
+        """
+        nlevels = self._segment_level.max() + 1
+        level_ptr = np.zeros(nlevels + 1, dtype=int)
+        level_ptr[1:] = np.cumsum(
+            np.bincount(self._segment_level, minlength=nlevels)
+        )
+        level_segments = np.argsort(self._segment_level, kind="stable")
+
+        # upstream segments ordered by their position in segment_order so the
+        # upstream inflow is summed in the same order as the serial kernel
+        upstream = self._segment_order[
+            self.tosegment[self._segment_order] >= 0
+        ]
+        downstream = self.tosegment[upstream]
+        isort = np.argsort(downstream, kind="stable")
+        upstream_ptr = np.zeros(self.nsegment + 1, dtype=int)
+        upstream_ptr[1:] = np.cumsum(
+            np.bincount(downstream, minlength=self.nsegment)
+        )
+        upstream_segments = upstream[isort]
+
+        return level_ptr, level_segments, upstream_ptr, upstream_segments
+
     def set_initial_conditions(self) -> None:
         # initialize channel segment storage
         self.seg_outflow = self.segment_flow_init
@@ -317,17 +346,40 @@ class PRMSChannel(StorageUnit):
         in_to_cfs /= time_step_seconds
 
         # calculate lateral flow term
-        self.seg_lateral_inflow[:] = 0.0
-        for ihru in range(self.nhru):
-            iseg = self.hru_segment[ihru]
-            if iseg < 0:
-                continue
-            lateral_inflow = (
-                self.sroff[ihru]
-                + self.ssres_flow[ihru]
-                + self.gwres_flow[ihru]
-            ) * in_to_cfs[ihru]
-            self.seg_lateral_inflow[iseg] += lateral_inflow
+        lateral_inflow = (
+            self.sroff + self.ssres_flow + self.gwres_flow
+        ) * in_to_cfs
+        self.seg_lateral_inflow[:] = np.bincount(
+            self._hru_to_segment,
+            weights=lateral_inflow[self._hru_active],
+            minlength=self.nsegment,
+        )
+
+        if self._calc_method == "numba_parallel":
+            (
+                self.seg_upstream_inflow,
+                self.seg_outflow,
+            ) = muskingum_routing_parallel(
+                self._level_ptr,
+                self._level_segments,
+                self._upstream_ptr,
+                self._upstream_segments,
+                self.seg_lateral_inflow,
+                self.seg_upstream_inflow,
+                self._seg_inflow,
+                self._seg_inflow0,
+                self.seg_outflow,
+                self._seg_outflow0,
+                self._inflow_ts,
+                self._outflow_ts,
+                self._seg_current_sum,
+                self._tsi,
+                self._ts,
+                self._c0,
+                self._c1,
+                self._c2,
+            )
+            return
 
         self.seg_upstream_inflow, self.seg_outflow = muskingum_routing(
             self._segment_order,
@@ -351,6 +403,61 @@ class PRMSChannel(StorageUnit):
         return
 
 
+@jit(nopython=True)
+def calculate_segment_order(
+    to_segment: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Topological sort of the segment network (Kahn's algorithm)
+
+    Args:
+        to_segment: zero-based downstream segment for each segment (negative
+            for segments that leave the network)
+
+    Returns:
+        segment_order: segment routing order
+        segment_level: topological level of each segment, zero for
+            headwater segments and one more than the highest level of its
+            upstream segments otherwise
+
+    """
+    nsegment = to_segment.shape[0]
+    indegree = np.zeros(nsegment, dtype=np.int64)
+    for iseg in range(nsegment):
+        jseg = to_segment[iseg]
+        if jseg >= nsegment:
+            raise ValueError("tosegment exceeds the number of segments")
+        if jseg >= 0:
+            indegree[jseg] += 1
+
+    # segment_order is also the queue; headwater segments start it
+    segment_order = np.empty(nsegment, dtype=np.int64)
+    segment_level = np.zeros(nsegment, dtype=np.int64)
+    ntail = 0
+    for iseg in range(nsegment):
+        if indegree[iseg] == 0:
+            segment_order[ntail] = iseg
+            ntail += 1
+
+    nhead = 0
+    while nhead < ntail:
+        iseg = segment_order[nhead]
+        nhead += 1
+        jseg = to_segment[iseg]
+        if jseg < 0:
+            continue
+        segment_level[jseg] = max(segment_level[jseg], segment_level[iseg] + 1)
+        indegree[jseg] -= 1
+        if indegree[jseg] == 0:
+            segment_order[ntail] = jseg
+            ntail += 1
+
+    if ntail < nsegment:
+        raise ValueError("tosegment does not define an acyclic network")
+
+    return segment_order, segment_level
+
+
 @jit(nopython=True)
 def muskingum_routing(
     segment_order: np.ndarray,
@@ -477,3 +584,105 @@ def muskingum_routing(
     seg_upstream_inflow = seg_current_sum.copy() / 24.0
 
     return seg_upstream_inflow, seg_outflow
+
+
+@jit(nopython=True, parallel=True)
+def muskingum_routing_parallel(
+    level_ptr: np.ndarray,
+    level_segments: np.ndarray,
+    upstream_ptr: np.ndarray,
+    upstream_segments: np.ndarray,
+    seg_lateral_inflow: np.ndarray,
+    seg_upstream_inflow: np.ndarray,
+    seg_inflow: np.ndarray,
+    seg_inflow0: np.ndarray,
+    seg_outflow: np.ndarray,
+    seg_outflow0: np.ndarray,
+    inflow_ts: np.ndarray,
+    outflow_ts: np.ndarray,
+    seg_current_sum: np.ndarray,
+    tsi: np.ndarray,
+    ts: np.ndarray,
+    c0: np.ndarray,
+    c1: np.ndarray,
+    c2: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Muskingum routing function that routes the segments in each topological
+    level in parallel
+
+    The upstream inflow of a segment is gathered from the outflow of its
+    upstream segments, in the order the serial muskingum_routing adds them,
+    instead of being scattered to the downstream segment. The results are
+    bit-identical to muskingum_routing.
+
+    Args:
+        level_ptr: start of each level in level_segments
+        level_segments: segments sorted by topological level
+        upstream_ptr: start of the upstream segments of each segment in
+            upstream_segments
+        upstream_segments: upstream segments of each segment
+        seg_lateral_inflow: segment lateral inflow
+        seg_upstream_inflow: initial segment upstream inflow (set to 0)
+        seg_inflow: segment inflow variable (internal calculations)
+        seg_inflow0: previous segment inflow variable (internal calculations)
+        seg_outflow: initial segment outflow variable (set to 0)
+        seg_outflow0: previous outflow variable (internal calculations)
+        inflow_ts: inflow timeseries variable (internal calculations)
+        outflow_ts: outflow timeseries variable (internal calculations)
+        seg_current_sum: summation variable (internal calculations)
+        tsi: integer flood wave travel time
+        ts: float version of integer flood wave travel time
+        c0: Muskingum c0 variable
+        c1: Muskingum c1 variable
+        c2: Muskingum c2 variable
+
+    Returns:
+        seg_upstream_inflow: inflow for each segment for the current day
+        seg_outflow: outflow for each segment for the current day
+
+    """
+    seg_inflow[:] = 0.0
+    seg_outflow[:] = 0.0
+    inflow_ts[:] = 0.0
+    seg_current_sum[:] = 0.0
+
+    nlevels = level_ptr.shape[0] - 1
+    for ihr in range(24):
+        for ilevel in range(nlevels):
+            for idx in prange(level_ptr[ilevel], level_ptr[ilevel + 1]):
+                jseg = level_segments[idx]
+
+                upstream_inflow = 0.0
+                for kdx in range(upstream_ptr[jseg], upstream_ptr[jseg + 1]):
+                    upstream_inflow += outflow_ts[upstream_segments[kdx]]
+                seg_upstream_inflow[jseg] = upstream_inflow
+
+                seg_current_inflow = seg_lateral_inflow[jseg]
+                seg_current_inflow += upstream_inflow
+                seg_inflow[jseg] += seg_current_inflow
+                inflow_ts[jseg] += seg_current_inflow
+                seg_current_sum[jseg] += upstream_inflow
+
+                remainder = (ihr + 1) % tsi[jseg]
+                if remainder == 0:
+                    inflow_ts[jseg] /= ts[jseg]
+                    if tsi[jseg] > 0:
+                        outflow_ts[jseg] = (
+                            inflow_ts[jseg] * c0[jseg]
+                            + seg_inflow0[jseg] * c1[jseg]
+                            + outflow_ts[jseg] * c2[jseg]
+                        )
+                    else:
+                        outflow_ts[jseg] = inflow_ts[jseg]
+                    seg_inflow0[jseg] = inflow_ts[jseg]
+                    inflow_ts[jseg] = 0.0
+
+                seg_outflow[jseg] += outflow_ts[jseg]
+                seg_outflow0[jseg] = outflow_ts[jseg]
+
+    seg_outflow /= 24.0
+    seg_inflow /= 24.0
+    seg_upstream_inflow = seg_current_sum.copy() / 24.0
+
+    return seg_upstream_inflow, seg_outflow
@@ -1,4 +1,5 @@
 import numpy as np
+from numba import jit
 
 from pynhm.base.storageUnit import StorageUnit
 
@@ -253,12 +254,17 @@ class PRMSRunoff(StorageUnit):
 
         Args:
             simulation_time: current simulation time
+            vectorized: use the compiled (numba) runoff engine instead of
+                the per-HRU python methods
 
         Returns:
             None
 
         """
-        self.calculate_prms_style()
+        if vectorized:
+            self.calculate_numba()
+        else:
+            self.calculate_prms_style()
 
         self.hru_impervstor_change[:] = (
             self.hru_impervstor_old - self.hru_impervstor
@@ -595,6 +601,80 @@ class PRMSRunoff(StorageUnit):
 
         return
 
+    def calculate_numba(self):
+        """Compiled version of calculate_prms_style
+
+        The impervious, pervious and depression storage computations for
+        all HRUs are done in a single numba kernel that reproduces
+        calculate_prms_style, compute_infil, perv_comp, check_capacity,
+        imperv_et and dprst_comp.
+
+        """
+        _calculate_numba(
+            self.nhru,
+            self.hru_type,
+            self.hru_area,
+            self.hru_perv,
+            self.hru_frac_perv,
+            self.hru_imperv,
+            self.hru_percent_imperv,
+            self.imperv_stor_max,
+            self.snowinfil_max,
+            self.carea_max,
+            self.smidx_coef,
+            self.smidx_exp,
+            self.soil_moist_max,
+            self.dprst_area_max,
+            self.dprst_area_open_max,
+            self.dprst_area_clos_max,
+            self.dprst_vol_open_max,
+            self.dprst_vol_clos_max,
+            self.dprst_vol_thres_open,
+            self.dprst_frac_open,
+            self.dprst_frac_clos,
+            self.dprst_et_coef,
+            self.dprst_flow_coef,
+            self.dprst_seep_rate_open,
+            self.dprst_seep_rate_clos,
+            self.sro_to_dprst_perv,
+            self.sro_to_dprst_imperv,
+            self.va_open_exp,
+            self.va_clos_exp,
+            self.soil_moist_prev,
+            self.net_rain,
+            self.net_ppt,
+            self.net_snow,
+            self.potet,
+            self.snowmelt,
+            self.snow_evap,
+            self.pkwater_equiv,
+            self.pptmix_nopack,
+            self.snowcov_area,
+            self.hru_intcpevap,
+            self.intcp_changeover,
+            self.contrib_fraction,
+            self.infil,
+            self.sroff,
+            self.hru_sroffp,
+            self.hru_sroffi,
+            self.imperv_stor,
+            self.imperv_evap,
+            self.hru_impervevap,
+            self.hru_impervstor,
+            self.dprst_in,
+            self.dprst_vol_open,
+            self.dprst_vol_clos,
+            self.dprst_area_clos,
+            self.dprst_sroff_hru,
+            self.dprst_evap_hru,
+            self.dprst_insroff_hru,
+            self.dprst_vol_open_frac,
+            self.dprst_vol_clos_frac,
+            self.dprst_vol_frac,
+            self.dprst_stor_hru,
+        )
+        return
+
     def basin_init(self):
         """
         This is trying to replicate the prms basin_init function that calculates some of the
@@ -1651,3 +1731,575 @@ class PRMSRunoff(StorageUnit):
             sri,
             dprst_evap_hru,
         )
+
+
+# The numba kernels below are a transcription of calculate_prms_style and the
+# per-HRU methods it calls. Any change to the python methods needs to be
+# carried over to these functions (and vice versa).
+@jit(nopython=True)
+def _calculate_numba(
+    nhru: int,
+    hru_type: np.ndarray,
+    hru_area: np.ndarray,
+    hru_perv: np.ndarray,
+    hru_frac_perv: np.ndarray,
+    hru_imperv: np.ndarray,
+    hru_percent_imperv: np.ndarray,
+    imperv_stor_max: np.ndarray,
+    snowinfil_max: np.ndarray,
+    carea_max: np.ndarray,
+    smidx_coef: np.ndarray,
+    smidx_exp: np.ndarray,
+    soil_moist_max: np.ndarray,
+    dprst_area_max: np.ndarray,
+    dprst_area_open_max: np.ndarray,
+    dprst_area_clos_max: np.ndarray,
+    dprst_vol_open_max: np.ndarray,
+    dprst_vol_clos_max: np.ndarray,
+    dprst_vol_thres_open: np.ndarray,
+    dprst_frac_open: np.ndarray,
+    dprst_frac_clos: np.ndarray,
+    dprst_et_coef: np.ndarray,
+    dprst_flow_coef: np.ndarray,
+    dprst_seep_rate_open: np.ndarray,
+    dprst_seep_rate_clos: np.ndarray,
+    sro_to_dprst_perv: np.ndarray,
+    sro_to_dprst_imperv: np.ndarray,
+    va_open_exp: np.ndarray,
+    va_clos_exp: np.ndarray,
+    soil_moist_prev: np.ndarray,
+    net_rain: np.ndarray,
+    net_ppt: np.ndarray,
+    net_snow: np.ndarray,
+    potet: np.ndarray,
+    snowmelt: np.ndarray,
+    snow_evap: np.ndarray,
+    pkwater_equiv: np.ndarray,
+    pptmix_nopack: np.ndarray,
+    snowcov_area: np.ndarray,
+    hru_intcpevap: np.ndarray,
+    intcp_changeover: np.ndarray,
+    contrib_fraction: np.ndarray,
+    infil: np.ndarray,
+    sroff: np.ndarray,
+    hru_sroffp: np.ndarray,
+    hru_sroffi: np.ndarray,
+    imperv_stor: np.ndarray,
+    imperv_evap: np.ndarray,
+    hru_impervevap: np.ndarray,
+    hru_impervstor: np.ndarray,
+    dprst_in: np.ndarray,
+    dprst_vol_open: np.ndarray,
+    dprst_vol_clos: np.ndarray,
+    dprst_area_clos: np.ndarray,
+    dprst_sroff_hru: np.ndarray,
+    dprst_evap_hru: np.ndarray,
+    dprst_insroff_hru: np.ndarray,
+    dprst_vol_open_frac: np.ndarray,
+    dprst_vol_clos_frac: np.ndarray,
+    dprst_vol_frac: np.ndarray,
+    dprst_stor_hru: np.ndarray,
+):
+    infil[:] = 0.0
+    for i in range(nhru):
+        hruarea = hru_area[i]
+        runoff = 0.0
+        perv_area = hru_perv[i]
+        perv_frac = hru_frac_perv[i]
+        srp = 0.0
+        sri = 0.0
+        hru_sroffp[i] = 0.0
+        contrib_fraction[i] = 0.0
+        hruarea_imperv = hru_imperv[i]
+        imperv_frac = 0.0
+        if hruarea_imperv > 0.0:
+            imperv_frac = hru_percent_imperv[i]
+            hru_sroffi[i] = 0.0
+            imperv_evap[i] = 0.0
+            hru_impervevap[i] = 0.0
+
+        avail_et = potet[i] - snow_evap[i] - hru_intcpevap[i]
+        availh2o = intcp_changeover[i] + net_rain[i]
+
+        (
+            sri,
+            srp,
+            imperv_stor[i],
+            infil[i],
+            contrib_fraction[i],
+        ) = _compute_infil(
+            net_rain[i],
+            net_ppt[i],
+            imperv_stor[i],
+            imperv_stor_max[i],
+            snowmelt[i],
+            snowinfil_max[i],
+            net_snow[i],
+            pkwater_equiv[i],
+            infil[i],
+            hru_type[i],
+            intcp_changeover[i],
+            hruarea_imperv,
+            sri,
+            srp,
+            pptmix_nopack[i],
+            soil_moist_prev[i],
+            soil_moist_max[i],
+            carea_max[i],
+            smidx_coef[i],
+            smidx_exp[i],
+            contrib_fraction[i],
+        )
+
+        dprst_chk = OFF
+        dprst_in[i] = 0.0
+        if dprst_area_max[i] > 0.0:
+            dprst_chk = ACTIVE
+            (
+                dprst_in[i],
+                dprst_vol_open[i],
+                avail_et,
+                dprst_vol_clos[i],
+                dprst_sroff_hru[i],
+                srp,
+                sri,
+                dprst_evap_hru[i],
+            ) = _dprst_comp(
+                i,
+                dprst_vol_clos[i],
+                dprst_area_clos_max[i],
+                dprst_area_clos[i],
+                dprst_vol_open_max[i],
+                dprst_vol_open[i],
+                dprst_area_open_max[i],
+                sro_to_dprst_perv[i],
+                sro_to_dprst_imperv[i],
+                avail_et,
+                availh2o,
+                srp,
+                sri,
+                imperv_frac,
+                perv_frac,
+                hruarea,
+                pptmix_nopack[i],
+                snowmelt[i],
+                pkwater_equiv[i],
+                net_snow[i],
+                potet[i],
+                snowcov_area[i],
+                dprst_vol_clos_max[i],
+                dprst_vol_thres_open[i],
+                dprst_frac_open[i],
+                dprst_frac_clos[i],
+                dprst_et_coef[i],
+                dprst_flow_coef[i],
+                dprst_seep_rate_open[i],
+                dprst_seep_rate_clos[i],
+                va_open_exp[i],
+                va_clos_exp[i],
+                dprst_insroff_hru,
+                dprst_vol_open_frac,
+                dprst_vol_clos_frac,
+                dprst_vol_frac,
+                dprst_stor_hru,
+            )
+            runoff = runoff + dprst_sroff_hru[i] * hruarea
+
+        srunoff = 0.0
+        if hru_type[i] == LAND:
+            runoff = runoff + srp * perv_area + sri * hruarea_imperv
+            srunoff = runoff / hruarea
+            hru_sroffp[i] = srp * perv_frac
+
+        if hruarea_imperv > 0.0:
+            if imperv_stor[i] > 0.0:
+                imperv_stor[i], imperv_evap[i] = _imperv_et(
+                    imperv_stor[i],
+                    potet[i],
+                    imperv_evap[i],
+                    snowcov_area[i],
+                    avail_et,
+                    imperv_frac,
+                )
+                hru_impervevap[i] = imperv_evap[i] * imperv_frac
+                avail_et = avail_et - hru_impervevap[i]
+                if avail_et < 0.0:
+                    hru_impervevap[i] = hru_impervevap[i] + avail_et
+                    if hru_impervevap[i] < 0.0:
+                        hru_impervevap[i] = 0.0
+                    imperv_evap[i] = imperv_evap[i] / imperv_frac
+                    imperv_stor[i] = imperv_stor[i] - avail_et / imperv_frac
+                    avail_et = 0.0
+                hru_impervstor[i] = imperv_stor[i] * imperv_frac
+            hru_sroffi[i] = sri * imperv_frac
+
+        if dprst_chk == ACTIVE:
+            dprst_stor_hru[i] = (
+                dprst_vol_open[i] + dprst_vol_clos[i]
+            ) / hruarea
+
+        sroff[i] = srunoff
+
+    return
+
+
+@jit(nopython=True)
+def _imperv_et(imperv_stor, potet, imperv_evap, sca, avail_et, imperv_frac):
+    if sca < 1.0:
+        if potet < imperv_stor:
+            imperv_evap = potet * (1.0 - sca)
+        else:
+            imperv_evap = imperv_stor * (1.0 - sca)
+        if imperv_evap * imperv_frac > avail_et:
+            imperv_evap = avail_et / imperv_frac
+        imperv_stor = imperv_stor - imperv_evap
+    return imperv_stor, imperv_evap
+
+
+@jit(nopython=True)
+def _compute_infil(
+    net_rain,
+    net_ppt,
+    imperv_stor,
+    imperv_stor_max,
+    snowmelt,
+    snowinfil_max,
+    net_snow,
+    pkwater_equiv,
+    infil,
+    hru_type,
+    intcp_changeover,
+    hruarea_imperv,
+    sri,
+    srp,
+    pptmix_nopack,
+    soil_moist_prev,
+    soil_moist_max,
+    carea_max,
+    smidx_coef,
+    smidx_exp,
+    contrib_fraction,
+):
+    hru_flag = 0
+    if hru_type == LAND:
+        hru_flag = 1
+    avail_water = 0.0
+
+    if intcp_changeover > 0.0:
+        avail_water = avail_water + intcp_changeover
+        infil = infil + intcp_changeover
+        if hru_flag == 1:
+            infil, srp, contrib_fraction = _perv_comp(
+                intcp_changeover,
+                intcp_changeover,
+                infil,
+                srp,
+                soil_moist_prev,
+                carea_max,
+                smidx_coef,
+                smidx_exp,
+            )
+
+    if pptmix_nopack == ACTIVE:
+        avail_water = avail_water + net_rain
+        infil = infil + net_rain
+        if hru_flag == 1:
+            infil, srp, contrib_fraction = _perv_comp(
+                net_rain,
+                net_rain,
+                infil,
+                srp,
+                soil_moist_prev,
+                carea_max,
+                smidx_coef,
+                smidx_exp,
+            )
+
+    if snowmelt > 0.0:
+        avail_water = avail_water + snowmelt
+        infil = infil + snowmelt
+        if hru_flag == 1:
+            if pkwater_equiv > 0.0 or net_ppt - net_snow < NEARZERO:
+                infil, srp = _check_capacity(
+                    snowinfil_max, infil, srp, soil_moist_prev, soil_moist_max
+                )
+            else:
+                infil, srp, contrib_fraction = _perv_comp(
+                    snowmelt,
+                    net_ppt,
+                    infil,
+                    srp,
+                    soil_moist_prev,
+                    carea_max,
+                    smidx_coef,
+                    smidx_exp,
+                )
+    elif pkwater_equiv < DNEARZERO:
+        if net_snow < NEARZERO and net_rain > 0.0:
+            avail_water = avail_water + net_rain
+            infil = infil + net_rain
+            if hru_flag == 1:
+                infil, srp, contrib_fraction = _perv_comp(
+                    net_rain,
+                    net_rain,
+                    infil,
+                    srp,
+                    soil_moist_prev,
+                    carea_max,
+                    smidx_coef,
+                    smidx_exp,
+                )
+    elif infil > 0.0:
+        if hru_flag == 1:
+            infil, srp = _check_capacity(
+                snowinfil_max, infil, srp, soil_moist_prev, soil_moist_max
+            )
+
+    if hruarea_imperv > 0.0:
+        imperv_stor = imperv_stor + avail_water
+        if hru_flag == 1:
+            if imperv_stor > imperv_stor_max:
+                sri = imperv_stor - imperv_stor_max
+                imperv_stor = imperv_stor_max
+
+    return sri, srp, imperv_stor, infil, contrib_fraction
+
+
+@jit(nopython=True)
+def _perv_comp(
+    pptp,
+    ptc,
+    infil,
+    srp,
+    soil_moist_prev,
+    carea_max,
+    smidx_coef,
+    smidx_exp,
+):
+    smidx = soil_moist_prev + 0.5 * ptc
+    if smidx > 25.0:
+        ca_fraction = carea_max
+    else:
+        ca_fraction = smidx_coef * 10.0 ** (smidx_exp * smidx)
+    if ca_fraction > carea_max:
+        ca_fraction = carea_max
+    srpp = ca_fraction * pptp
+    infil = infil - srpp
+    srp = srp + srpp
+    return infil, srp, ca_fraction
+
+
+@jit(nopython=True)
+def _check_capacity(snowinfil_max, infil, srp, soil_moist_prev, soil_moist_max):
+    capacity = soil_moist_max - soil_moist_prev
+    excess = infil - capacity
+    if excess > snowinfil_max:
+        srp = srp + excess - snowinfil_max
+        infil = snowinfil_max + capacity
+    return infil, srp
+
+
+@jit(nopython=True)
+def _dprst_comp(
+    ihru,
+    dprst_vol_clos,
+    dprst_area_clos_max,
+    dprst_area_clos,
+    dprst_vol_open_max,
+    dprst_vol_open,
+    dprst_area_open_max,
+    sro_to_dprst_perv,
+    sro_to_dprst_imperv,
+    avail_et,
+    net_rain,
+    srp,
+    sri,
+    imperv_frac,
+    perv_frac,
+    hru_area,
+    pptmix_nopack,
+    snowmelt,
+    pkwater_equiv,
+    net_snow,
+    potet,
+    snowcov_area,
+    dprst_vol_clos_max,
+    dprst_vol_thres_open,
+    dprst_frac_open,
+    dprst_frac_clos,
+    dprst_et_coef,
+    dprst_flow_coef,
+    dprst_seep_rate_open,
+    dprst_seep_rate_clos,
+    va_open_exp,
+    va_clos_exp,
+    dprst_insroff_hru,
+    dprst_vol_open_frac,
+    dprst_vol_clos_frac,
+    dprst_vol_frac,
+    dprst_stor_hru,
+):
+    inflow = 0.0
+    if pptmix_nopack:
+        inflow = inflow + net_rain
+
+    if snowmelt:
+        inflow = inflow + snowmelt
+    elif pkwater_equiv < DNEARZERO:
+        if net_snow < NEARZERO and net_rain > 0.0:
+            inflow = inflow + net_rain
+
+    dprst_in = 0.0
+    if dprst_area_open_max > 0.0:
+        dprst_in = inflow * dprst_area_open_max
+        dprst_vol_open = dprst_vol_open + dprst_in
+
+    if dprst_area_clos_max > 0.0:
+        tmp1 = inflow * dprst_area_clos_max
+        dprst_vol_clos = dprst_vol_clos + tmp1
+        dprst_in = dprst_in + tmp1
+    dprst_in = dprst_in / hru_area
+
+    dprst_srp = 0.0
+    dprst_sri = 0.0
+    if srp > 0.0:
+        tmp = srp * perv_frac * sro_to_dprst_perv * hru_area
+        if dprst_area_open_max > 0.0:
+            dprst_srp_open = tmp * dprst_frac_open
+            dprst_srp = dprst_srp_open / hru_area
+            dprst_vol_open = dprst_vol_open + dprst_srp_open
+        if dprst_area_clos_max > 0.0:
+            dprst_srp_clos = tmp * dprst_frac_clos
+            dprst_srp = dprst_srp + dprst_srp_clos / hru_area
+            dprst_vol_clos = dprst_vol_clos + dprst_srp_clos
+        srp = srp - dprst_srp / perv_frac
+        if srp < 0.0:
+            if srp < -NEARZERO:
+                srp = 0.0
+
+    if sri > 0.0:
+        tmp = sri * imperv_frac * sro_to_dprst_imperv * hru_area
+        if dprst_area_open_max > 0.0:
+            dprst_sri_open = tmp * dprst_frac_open
+            dprst_sri = dprst_sri_open / hru_area
+            dprst_vol_open = dprst_vol_open + dprst_sri_open
+        if dprst_area_clos_max > 0.0:
+            dprst_sri_clos = tmp * dprst_frac_clos
+            dprst_sri = dprst_sri + dprst_sri_clos / hru_area
+            dprst_vol_clos = dprst_vol_clos + dprst_sri_clos
+        sri = sri - dprst_sri / imperv_frac
+        if sri < 0.0:
+            if sri < -NEARZERO:
+                sri = 0.0
+        dprst_insroff_hru[ihru] = dprst_srp + dprst_sri
+
+    dprst_area_open = 0.0
+    if dprst_vol_open > 0.0:
+        open_vol_r = dprst_vol_open / dprst_vol_open_max
+        if open_vol_r < NEARZERO:
+            frac_op_ar = 0.0
+        elif open_vol_r > 1.0:
+            frac_op_ar = 1.0
+        else:
+            frac_op_ar = np.exp(va_open_exp * np.log(open_vol_r))
+        dprst_area_open = dprst_area_open_max * frac_op_ar
+        if dprst_area_open > dprst_area_open_max:
+            dprst_area_open = dprst_area_open_max
+
+    if dprst_area_clos_max > 0.0:
+        dprst_area_clos = 0.0
+        if dprst_vol_clos > 0.0:
+            clos_vol_r = dprst_vol_clos / dprst_vol_clos_max
+            if clos_vol_r < NEARZERO:
+                frac_cl_ar = 0.0
+            elif clos_vol_r > 1.0:
+                frac_cl_ar = 1.0
+            else:
+                frac_cl_ar = np.exp(va_clos_exp * np.log(clos_vol_r))
+            dprst_area_clos = dprst_area_clos_max * frac_cl_ar
+            if dprst_area_clos > dprst_area_clos_max:
+                dprst_area_clos = dprst_area_clos_max
+            if dprst_area_clos < NEARZERO:
+                dprst_area_clos = 0.0
+
+    unsatisfied_et = avail_et
+    dprst_avail_et = potet * (1.0 - snowcov_area) * dprst_et_coef
+    dprst_evap_hru = 0.0
+    if dprst_avail_et > 0.0:
+        dprst_evap_open = 0.0
+        dprst_evap_clos = 0.0
+        if dprst_area_open > 0.0:
+            dprst_evap_open = min(
+                dprst_area_open * dprst_avail_et, dprst_vol_open
+            )
+            if dprst_evap_open / hru_area > unsatisfied_et:
+                dprst_evap_open = unsatisfied_et * hru_area
+            if dprst_evap_open > dprst_vol_open:
+                dprst_evap_open = dprst_vol_open
+            unsatisfied_et = unsatisfied_et - dprst_evap_open / hru_area
+            dprst_vol_open = dprst_vol_open - dprst_evap_open
+
+        if dprst_area_clos > 0.0:
+            dprst_evap_clos = min(
+                dprst_area_clos * dprst_avail_et, dprst_vol_clos
+            )
+            if dprst_evap_clos / hru_area > unsatisfied_et:
+                dprst_evap_clos = unsatisfied_et * hru_area
+            if dprst_evap_clos > dprst_vol_clos:
+                dprst_evap_clos = dprst_vol_clos
+            dprst_vol_clos = dprst_vol_clos - dprst_evap_clos
+
+        dprst_evap_hru = (dprst_evap_open + dprst_evap_clos) / hru_area
+
+    dprst_seep_hru = 0.0
+    if dprst_vol_open > 0.0:
+        seep_open = dprst_vol_open * dprst_seep_rate_open
+        dprst_vol_open = dprst_vol_open - seep_open
+        if dprst_vol_open < 0.0:
+            seep_open = seep_open + dprst_vol_open
+            dprst_vol_open = 0.0
+        dprst_seep_hru = seep_open / hru_area
+
+    dprst_sroff_hru = 0.0
+    if dprst_vol_open > 0.0:
+        dprst_sroff_hru = max(0.0, dprst_vol_open - dprst_vol_open_max)
+        dprst_sroff_hru = dprst_sroff_hru + max(
+            0.0,
+            (dprst_vol_open - dprst_sroff_hru - dprst_vol_thres_open)
+            * dprst_flow_coef,
+        )
+        dprst_vol_open = dprst_vol_open - dprst_sroff_hru
+        dprst_sroff_hru = dprst_sroff_hru / hru_area
+        if dprst_vol_open < 0.0:
+            dprst_vol_open = 0.0
+
+    if dprst_area_clos_max > 0.0:
+        if dprst_area_clos > NEARZERO:
+            seep_clos = dprst_vol_clos * dprst_seep_rate_clos
+            dprst_vol_clos = dprst_vol_clos - seep_clos
+            if dprst_vol_clos < 0.0:
+                seep_clos = seep_clos + dprst_vol_clos
+                dprst_vol_clos = 0.0
+            dprst_seep_hru = dprst_seep_hru + seep_clos / hru_area
+
+    avail_et = avail_et - dprst_evap_hru
+    if dprst_vol_open_max > 0.0:
+        dprst_vol_open_frac[ihru] = dprst_vol_open / dprst_vol_open_max
+    if dprst_vol_clos_max > 0.0:
+        dprst_vol_clos_frac[ihru] = dprst_vol_clos / dprst_vol_clos_max
+    if dprst_vol_open_max + dprst_vol_clos_max > 0.0:
+        dprst_vol_frac[ihru] = (dprst_vol_open + dprst_vol_clos) / (
+            dprst_vol_open_max + dprst_vol_clos_max
+        )
+    dprst_stor_hru[ihru] = (dprst_vol_open + dprst_vol_clos) / hru_area
+
+    return (
+        dprst_in,
+        dprst_vol_open,
+        avail_et,
+        dprst_vol_clos,
+        dprst_sroff_hru,
+        srp,
+        sri,
+        dprst_evap_hru,
+    )
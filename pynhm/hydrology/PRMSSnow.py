@@ -1,4 +1,5 @@
 import numpy as np
+from numba import jit
 
 from pynhm.base.storageUnit import StorageUnit
 
@@ -52,11 +53,15 @@ tcind = 0
 
 dbgind = 434
 
+LAKE = HruType.LAKE.value
+
 
 class PRMSSnow(StorageUnit):
     """PRMS snow pack
 
     Args:
+        calc_method: one of "python" (default) or "numba". The numba
+            method calculates all HRUs in a single compiled call.
 
     """
 
@@ -79,6 +84,7 @@ class PRMSSnow(StorageUnit):
         net_snow: adaptable,
         transp_on: adaptable,
         budget_type: str = None,
+        calc_method: str = None,
         verbose: bool = False,
     ) -> "PRMSSnow":
 
@@ -90,6 +96,12 @@ class PRMSSnow(StorageUnit):
         self.set_inputs(locals())
         self.set_budget(budget_type)
 
+        if calc_method is None:
+            calc_method = "python"
+        if calc_method not in ["python", "numba"]:
+            raise ValueError(f"Invalid calc_method: '{calc_method}'")
+        self._calc_method = calc_method
+
         return
 
     @staticmethod
@@ -395,9 +407,17 @@ class PRMSSnow(StorageUnit):
         # default assumption
         self.pptmix_nopack[:] = False
 
+        if self._calc_method == "numba":
+            self._calculate_numba()
+        else:
+            self._calculate_python()
+
+        return
+
+    def _calculate_python(self) -> None:
         for jj in range(self.nhru):
 
-            if self.hru_type[jj] == HruType.LAKE:
+            if self.hru_type[jj] == LAKE:
                 continue
 
             # <
@@ -560,7 +580,9 @@ class PRMSSnow(StorageUnit):
                         )
                     else:
                         self.pk_den[jj] = self.den_max
-                        self.pk_depth[jj] = pkwater_equiv[jj] * self.denmaxinv
+                        self.pk_depth[jj] = (
+                            self.pkwater_equiv[jj] * self.denmaxinv
+                        )
 
                     # <
                     self.pss[jj] = self.pkwater_equiv[jj]
@@ -610,6 +632,84 @@ class PRMSSnow(StorageUnit):
             # <<
         return
 
+    def _calculate_numba(self) -> None:
+        _calculate_numba(
+            self.nhru,
+            self.control.current_dowy,
+            self.control.current_doy,
+            self.control.current_month,
+            self.hru_type,
+            self.cov_type,
+            self.melt_force,
+            self.melt_look,
+            self.hru_deplcrv,
+            self.snarea_curve_2d,
+            self.snarea_thresh,
+            self.tmax_allsnow_c,
+            self.cecn_coef,
+            self.tstorm_mo,
+            self.emis_noppt,
+            self.freeh2o_cap,
+            self.potet_sublim,
+            self.rad_trncf,
+            self.canopy_covden,
+            self.albset_rna[0],
+            self.albset_rnm[0],
+            self.albset_sna[0],
+            self.albset_snm[0],
+            self.den_max[0],
+            self.deninv[0],
+            self.denmaxinv[0],
+            self.settle_const[0],
+            self.hru_intcpevap,
+            self.hru_ppt,
+            self.net_ppt,
+            self.net_rain,
+            self.net_snow,
+            self.newsnow,
+            self.orad_hru,
+            self.potet,
+            self.pptmix,
+            self.prmx,
+            self.soltab_horad_potsw,
+            self.swrad,
+            self.tavgc,
+            self.tmaxc,
+            self.tminc,
+            self.transp_on,
+            self.ai,
+            self.albedo,
+            self.frac_swe,
+            self.freeh2o,
+            self.iasw,
+            self.int_alb,
+            self.iso,
+            self.lso,
+            self.lst,
+            self.mso,
+            self.pk_def,
+            self.pk_den,
+            self.pk_depth,
+            self.pk_ice,
+            self.pk_precip,
+            self.pk_temp,
+            self.pksv,
+            self.pkwater_equiv,
+            self.pptmix_nopack,
+            self.pss,
+            self.pst,
+            self.salb,
+            self.scrv,
+            self.slst,
+            self.snow_evap,
+            self.snowcov_area,
+            self.snowcov_areasv,
+            self.snowmelt,
+            self.snsv,
+            self.tcal,
+        )
+        return
+
     @staticmethod
     def sca_deplcrv(snarea_curve: np.ndarray, frac_swe: float) -> float:
         """Interpolate along snow covered area depletion curve"""
@@ -1012,9 +1112,9 @@ class PRMSSnow(StorageUnit):
                         #    print *, 'snow density problem', pk_depth, pk_den, pss, pkwater_equiv
                         # call print_date(1)
 
-                        self.pk_den[jj] = self.den_max[jj]
+                        self.pk_den[jj] = self.den_max
                         self.pk_depth[jj] = (
-                            self.pkwater_equiv[jj] * self.denmaxinv[jj]
+                            self.pkwater_equiv[jj] * self.denmaxinv
                         )  # [inches]
 
                     # <
@@ -1907,7 +2007,7 @@ class PRMSSnow(StorageUnit):
                 # true, then the code for surface temperature=0 and cal=positive number
                 # would have run and the subroutine will have terminated.
                 if cal > zero:
-                    self.calin(cal, chru)
+                    self.calin(cal, jj)
 
         # <<<
         elif ts >= zero:
@@ -2033,17 +2133,20 @@ class PRMSSnow(StorageUnit):
 
         # <
         if self.snow_evap[jj] < zero:
-            self.pkwater_equiv[jj] = self.pkwater_equiv[jj] - snow_evap
+            self.pkwater_equiv[jj] = (
+                self.pkwater_equiv[jj] - self.snow_evap[jj]
+            )
 
             if self.pkwater_equiv[jj] < zero:
                 if self.verbose:
                     if self.pkwater_equiv[jj] < -epsilon64:
                         print(
-                            f"snowpack issue, negative pkwater_equiv in snowevap: {pkwater_equiv}"
+                            f"snowpack issue, negative pkwater_equiv in "
+                            f"snowevap: {self.pkwater_equiv[jj]}"
                         )
 
-                    #  <
-                    self.pkwater_equiv[jj] = zero
+                #  <
+                self.pkwater_equiv[jj] = zero
 
             # <<
             self.snow_evap[jj] = zero
@@ -2061,9 +2164,10 @@ class PRMSSnow(StorageUnit):
 
                 if self.pkwater_equiv[jj] < zero:
                     if self.verbose:
-                        if self.pkwater_equiv[kk] < -epsilon64:
+                        if self.pkwater_equiv[jj] < -epsilon64:
                             print(
-                                f"snowpack issue 2, negative pkwater_equiv in snowevap: {pkwater_equiv}"
+                                f"snowpack issue 2, negative pkwater_equiv "
+                                f"in snowevap: {self.pkwater_equiv[jj]}"
                             )
 
                     # <<
@@ -2071,7 +2175,1102 @@ class PRMSSnow(StorageUnit):
                     self.pkwater_equiv[jj] = zero
 
                 # <
-                snow_evap = zero
+                self.snow_evap[jj] = zero
 
         # <<
         return
+
+
+# Numba versions of the PRMSSnow methods. These are direct translations of
+# the per-HRU methods above operating on flat arrays. Parameters of dimension
+# one (den_max, settle_const, albset_*, etc.) are passed as scalars. The
+# verbose diagnostics of the python methods are not reproduced.
+_acum_init = np.array(acum_init)
+_amlt_init = np.array(amlt_init)
+
+
+@jit(nopython=True)
+def _calculate_numba(
+    nhru: int,
+    current_dowy: int,
+    current_doy: int,
+    current_month: int,
+    hru_type: np.ndarray,
+    cov_type: np.ndarray,
+    melt_force: np.ndarray,
+    melt_look: np.ndarray,
+    hru_deplcrv: np.ndarray,
+    snarea_curve_2d: np.ndarray,
+    snarea_thresh: np.ndarray,
+    tmax_allsnow_c: np.ndarray,
+    cecn_coef: np.ndarray,
+    tstorm_mo: np.ndarray,
+    emis_noppt: np.ndarray,
+    freeh2o_cap: np.ndarray,
+    potet_sublim: np.ndarray,
+    rad_trncf: np.ndarray,
+    canopy_covden: np.ndarray,
+    albset_rna: float,
+    albset_rnm: float,
+    albset_sna: float,
+    albset_snm: float,
+    den_max: float,
+    deninv: float,
+    denmaxinv: float,
+    settle_const: float,
+    hru_intcpevap: np.ndarray,
+    hru_ppt: np.ndarray,
+    net_ppt: np.ndarray,
+    net_rain: np.ndarray,
+    net_snow: np.ndarray,
+    newsnow: np.ndarray,
+    orad_hru: np.ndarray,
+    potet: np.ndarray,
+    pptmix: np.ndarray,
+    prmx: np.ndarray,
+    soltab_horad_potsw: np.ndarray,
+    swrad: np.ndarray,
+    tavgc: np.ndarray,
+    tmaxc: np.ndarray,
+    tminc: np.ndarray,
+    transp_on: np.ndarray,
+    ai: np.ndarray,
+    albedo: np.ndarray,
+    frac_swe: np.ndarray,
+    freeh2o: np.ndarray,
+    iasw: np.ndarray,
+    int_alb: np.ndarray,
+    iso: np.ndarray,
+    lso: np.ndarray,
+    lst: np.ndarray,
+    mso: np.ndarray,
+    pk_def: np.ndarray,
+    pk_den: np.ndarray,
+    pk_depth: np.ndarray,
+    pk_ice: np.ndarray,
+    pk_precip: np.ndarray,
+    pk_temp: np.ndarray,
+    pksv: np.ndarray,
+    pkwater_equiv: np.ndarray,
+    pptmix_nopack: np.ndarray,
+    pss: np.ndarray,
+    pst: np.ndarray,
+    salb: np.ndarray,
+    scrv: np.ndarray,
+    slst: np.ndarray,
+    snow_evap: np.ndarray,
+    snowcov_area: np.ndarray,
+    snowcov_areasv: np.ndarray,
+    snowmelt: np.ndarray,
+    snsv: np.ndarray,
+    tcal: np.ndarray,
+) -> None:
+    """Calculate snow pack terms for a time step for all HRUs
+
+    Numba equivalent of the python PRMSSnow.calculate HRU loop. All state
+    arrays are updated in place.
+
+    Args:
+        nhru: number of HRUs
+        current_dowy: current day of the water year
+        current_doy: current day of the year
+        current_month: current month
+        see PRMSSnow for the remaining parameters, inputs, and variables
+
+    Returns:
+        None
+
+    """
+    month_ind = current_month - 1
+    for jj in range(nhru):
+        if hru_type[jj] == LAKE:
+            continue
+
+        trd = orad_hru[jj] / soltab_horad_potsw[jj]
+
+        if current_dowy == 1:
+            pss[jj] = zero
+            iso[jj] = 1
+            mso[jj] = 1
+            lso[jj] = 0
+
+        pk_precip[jj] = zero
+        snowmelt[jj] = zero
+        snow_evap[jj] = zero
+        frac_swe[jj] = zero
+        ai[jj] = zero
+        tcal[jj] = zero
+
+        if current_doy == melt_force[jj]:
+            iso[jj] = 2
+
+        if current_doy == melt_look[jj]:
+            mso[jj] = 2
+
+        if pkwater_equiv[jj] < epsilon64:
+            if not newsnow[jj]:
+                snowcov_area[jj] = zero
+                continue
+            else:
+                snowcov_area[jj] = one
+
+        # step 1: precipitation
+        if (pkwater_equiv[jj] > zero and net_ppt[jj] > zero) or net_snow[
+            jj
+        ] > zero:
+            _ppt_to_pack(
+                jj,
+                tmax_allsnow_c[month_ind, jj],
+                freeh2o_cap[jj],
+                den_max,
+                denmaxinv,
+                net_rain[jj],
+                net_snow[jj],
+                pptmix[jj],
+                tavgc[jj],
+                tmaxc[jj],
+                tminc[jj],
+                freeh2o,
+                iasw,
+                pk_def,
+                pk_den,
+                pk_depth,
+                pk_ice,
+                pk_precip,
+                pk_temp,
+                pkwater_equiv,
+                pptmix_nopack,
+                pss,
+                pst,
+                snowcov_area,
+                snowmelt,
+            )
+
+        if pkwater_equiv[jj] > zero:
+            # step 2: snow covered area
+            _snowcov(
+                jj,
+                snarea_curve_2d[hru_deplcrv[jj] - 1, :],
+                snarea_thresh[jj],
+                net_snow[jj],
+                newsnow[jj],
+                ai,
+                frac_swe,
+                iasw,
+                pksv,
+                pkwater_equiv,
+                pst,
+                scrv,
+                snowcov_area,
+                snowcov_areasv,
+            )
+
+            # step 3: albedo
+            _snalbedo(
+                jj,
+                albset_rna,
+                albset_rnm,
+                albset_sna,
+                albset_snm,
+                net_snow[jj],
+                newsnow[jj],
+                pptmix[jj],
+                prmx[jj],
+                albedo,
+                int_alb,
+                iso,
+                lst,
+                salb,
+                slst,
+                snsv,
+            )
+
+            # step 4: radiation fluxes and energy balance
+            _step_4(
+                jj,
+                trd,
+                cecn_coef[month_ind, jj],
+                cov_type[jj],
+                emis_noppt[jj],
+                freeh2o_cap[jj],
+                rad_trncf[jj],
+                tstorm_mo[month_ind, jj],
+                canopy_covden[jj],
+                den_max,
+                deninv,
+                denmaxinv,
+                settle_const,
+                hru_ppt[jj],
+                net_snow[jj],
+                swrad[jj],
+                tavgc[jj],
+                tmaxc[jj],
+                tminc[jj],
+                albedo,
+                freeh2o,
+                iasw,
+                iso,
+                lso,
+                mso,
+                pk_def,
+                pk_den,
+                pk_depth,
+                pk_ice,
+                pk_temp,
+                pkwater_equiv,
+                pss,
+                pst,
+                snowcov_area,
+                snowmelt,
+                tcal,
+            )
+
+            # step 5: snowpack loss to evaporation
+            if pkwater_equiv[jj] > zero:
+                if (not transp_on[jj]) or (transp_on[jj] and cov_type[jj] < 2):
+                    _snowevap(
+                        jj,
+                        potet_sublim[jj],
+                        potet[jj],
+                        hru_intcpevap[jj],
+                        freeh2o,
+                        pk_def,
+                        pk_ice,
+                        pk_temp,
+                        pkwater_equiv,
+                        snow_evap,
+                        snowcov_area,
+                    )
+
+            elif pkwater_equiv[jj] < zero:
+                pkwater_equiv[jj] = zero
+
+            # clean-up
+            if pkwater_equiv[jj] > zero:
+                if pk_den[jj] > zero:
+                    pk_depth[jj] = pkwater_equiv[jj] / pk_den[jj]
+                else:
+                    pk_den[jj] = den_max
+                    pk_depth[jj] = pkwater_equiv[jj] * denmaxinv
+
+                pss[jj] = pkwater_equiv[jj]
+
+                if lst[jj]:
+                    snsv[jj] = snsv[jj] - snowmelt[jj]
+                    if snsv[jj] < zero:
+                        snsv[jj] = zero
+
+            if pkwater_equiv[jj] <= zero:
+                pkwater_equiv[jj] = zero
+                pk_depth[jj] = zero
+                pss[jj] = zero
+                snsv[jj] = zero
+                lst[jj] = False
+                pst[jj] = zero
+                iasw[jj] = False
+                albedo[jj] = zero
+                pk_den[jj] = zero
+                snowcov_area[jj] = zero
+                pk_def[jj] = zero
+                pk_temp[jj] = zero
+                pk_ice[jj] = zero
+                freeh2o[jj] = zero
+                snowcov_areasv[jj] = zero
+                ai[jj] = zero
+                frac_swe[jj] = zero
+
+    return
+
+
+@jit(nopython=True)
+def _sca_deplcrv(snarea_curve: np.ndarray, frac_swe: float) -> float:
+    """Interpolate along snow covered area depletion curve"""
+    if frac_swe > one:
+        res = snarea_curve[-1]
+    else:
+        idx = int(10.0 * (frac_swe + 0.2))
+        jdx = idx - 1
+        if idx > 11:
+            idx = 11
+        dify = (frac_swe * 10.0) - float(jdx - 1)
+        difx = snarea_curve[idx - 1] - snarea_curve[jdx - 1]
+        res = snarea_curve[jdx - 1] + dify * difx
+    return res
+
+
+@jit(nopython=True)
+def _ppt_to_pack(
+    jj,
+    tmax_allsnow_c,
+    freeh2o_cap,
+    den_max,
+    denmaxinv,
+    net_rain,
+    net_snow,
+    pptmix,
+    tavgc,
+    tmaxc,
+    tminc,
+    freeh2o,
+    iasw,
+    pk_def,
+    pk_den,
+    pk_depth,
+    pk_ice,
+    pk_precip,
+    pk_temp,
+    pkwater_equiv,
+    pptmix_nopack,
+    pss,
+    pst,
+    snowcov_area,
+    snowmelt,
+):
+    """Add rain and/or snow to snowpack."""
+    # In the python method train and tsnow keep the type of tavgc when
+    # they are set to it. numba unifies them to float64, so track when
+    # they are tavgc to preserve the (single precision) products of
+    # tavgc and net_rain or net_snow.
+    tsnow = tavgc
+    tsnow_is_tavgc = True
+    train_is_tavgc = False
+
+    if pptmix == 1:
+        train = (tmaxc + tmax_allsnow_c) * 0.5
+        if pkwater_equiv[jj] > zero:
+            tsnow = (tminc + tmax_allsnow_c) * 0.5
+            tsnow_is_tavgc = False
+        elif pkwater_equiv[jj] < zero:
+            pkwater_equiv[jj] = zero
+    else:
+        train = tavgc
+        train_is_tavgc = True
+        if train < epsilon32:
+            train = (tmaxc + tmax_allsnow_c) * 0.5
+            train_is_tavgc = False
+
+    if train < zero:
+        train = zero
+        train_is_tavgc = False
+    if tsnow > zero:
+        tsnow = zero
+        tsnow_is_tavgc = False
+
+    if pkwater_equiv[jj] > zero:
+        if net_rain > zero:
+            pkwater_equiv[jj] = pkwater_equiv[jj] + net_rain
+            pk_precip[jj] = pk_precip[jj] + net_rain
+
+            if pk_def[jj] > zero:
+                caln = (80.000 + train) * inch2cm
+                pndz = pk_def[jj] / caln
+
+                if abs(net_rain - pndz) < epsilon32:
+                    pk_def[jj] = zero
+                    pk_temp[jj] = zero
+                    pk_ice[jj] = pk_ice[jj] + net_rain
+
+                elif net_rain < pndz:
+                    pk_def[jj] = pk_def[jj] - (caln * net_rain)
+                    pk_temp[jj] = -1 * pk_def[jj] / (pkwater_equiv[jj] * 1.27)
+                    pk_ice[jj] = pk_ice[jj] + net_rain
+
+                else:
+                    pk_def[jj] = zero
+                    pk_temp[jj] = zero
+                    pk_ice[jj] = pk_ice[jj] + pndz
+                    freeh2o[jj] = net_rain - pndz
+                    calpr = train * (net_rain - pndz) * inch2cm
+                    _calin(
+                        calpr,
+                        jj,
+                        freeh2o_cap,
+                        den_max,
+                        denmaxinv,
+                        freeh2o,
+                        iasw,
+                        pk_def,
+                        pk_den,
+                        pk_depth,
+                        pk_ice,
+                        pk_temp,
+                        pkwater_equiv,
+                        pss,
+                        pst,
+                        snowcov_area,
+                        snowmelt,
+                    )
+
+            else:
+                freeh2o[jj] = freeh2o[jj] + net_rain
+                if train_is_tavgc:
+                    calpr = tavgc * net_rain * inch2cm
+                else:
+                    calpr = train * net_rain * inch2cm
+                _calin(
+                    calpr,
+                    jj,
+                    freeh2o_cap,
+                    den_max,
+                    denmaxinv,
+                    freeh2o,
+                    iasw,
+                    pk_def,
+                    pk_den,
+                    pk_depth,
+                    pk_ice,
+                    pk_temp,
+                    pkwater_equiv,
+                    pss,
+                    pst,
+                    snowcov_area,
+                    snowmelt,
+                )
+
+    elif net_rain > zero:
+        pptmix_nopack[jj] = True
+
+    if net_snow > zero:
+        pkwater_equiv[jj] = pkwater_equiv[jj] + net_snow
+        pk_precip[jj] = pk_precip[jj] + net_snow
+        pk_ice[jj] = pk_ice[jj] + net_snow
+
+        if tsnow >= zero:
+            pk_temp[jj] = -1 * pk_def[jj] / (pkwater_equiv[jj] * 1.27)
+
+        else:
+            if tsnow_is_tavgc:
+                calps = tavgc * net_snow * 1.27
+            else:
+                calps = tsnow * net_snow * 1.27
+            if freeh2o[jj] > zero:
+                _caloss(
+                    calps, jj, freeh2o, pk_def, pk_ice, pk_temp, pkwater_equiv
+                )
+            else:
+                pk_def[jj] = pk_def[jj] - calps
+                pk_temp[jj] = -1 * pk_def[jj] / (pkwater_equiv[jj] * 1.27)
+
+    return
+
+
+@jit(nopython=True)
+def _calin(
+    cal,
+    jj,
+    freeh2o_cap,
+    den_max,
+    denmaxinv,
+    freeh2o,
+    iasw,
+    pk_def,
+    pk_den,
+    pk_depth,
+    pk_ice,
+    pk_temp,
+    pkwater_equiv,
+    pss,
+    pst,
+    snowcov_area,
+    snowmelt,
+):
+    """Compute changes in snowpack when a net gain in heat energy has occurred."""
+    dif = cal - pk_def[jj]
+
+    if dif < zero:
+        pk_def[jj] = pk_def[jj] - cal
+        pk_temp[jj] = -1 * pk_def[jj] / (pkwater_equiv[jj] * 1.27)
+
+    elif abs(dif) < epsilon32:
+        pk_temp[jj] = zero
+        pk_def[jj] = zero
+
+    elif dif > zero:
+        pmlt = dif / 203.2
+        apmlt = pmlt * snowcov_area[jj]
+        pk_def[jj] = zero
+        pk_temp[jj] = zero
+
+        if snowcov_area[jj] > zero:
+            apk_ice = pk_ice[jj] / snowcov_area[jj]
+        else:
+            apk_ice = zero
+
+        if pmlt > apk_ice:
+            snowmelt[jj] = snowmelt[jj] + pkwater_equiv[jj]
+            pkwater_equiv[jj] = zero
+            iasw[jj] = False
+            pk_def[jj] = zero
+            pk_temp[jj] = zero
+            pk_ice[jj] = zero
+            freeh2o[jj] = zero
+            pk_depth[jj] = zero
+            pss[jj] = zero
+            pst[jj] = zero
+            pk_den[jj] = zero
+
+        else:
+            pk_ice[jj] = pk_ice[jj] - apmlt
+            freeh2o[jj] = freeh2o[jj] + apmlt
+            pwcap = freeh2o_cap * pk_ice[jj]
+            dif_water = freeh2o[jj] - pwcap
+
+            if dif_water > zero:
+                if dif_water > pkwater_equiv[jj]:
+                    dif_water = pkwater_equiv[jj]
+
+                pkwater_equiv[jj] = pkwater_equiv[jj] - dif_water
+                freeh2o[jj] = pwcap
+                if pk_den[jj] > zero:
+                    pk_depth[jj] = pkwater_equiv[jj] / pk_den[jj]
+                else:
+                    pk_den[jj] = den_max
+                    pk_depth[jj] = pkwater_equiv[jj] * denmaxinv
+
+                snowmelt[jj] = snowmelt[jj] + dif_water
+                pss[jj] = pkwater_equiv[jj]
+
+    return
+
+
+@jit(nopython=True)
+def _caloss(cal, jj, freeh2o, pk_def, pk_ice, pk_temp, pkwater_equiv):
+    """Compute change in snowpack when a net loss in heat energy has occurred."""
+    if freeh2o[jj] < epsilon32:
+        pk_def[jj] = pk_def[jj] - cal
+
+    else:
+        calnd = freeh2o[jj] * 203.2
+        dif = cal + calnd
+
+        if dif > zero:
+            pk_ice[jj] = pk_ice[jj] + (-cal / 203.2)
+            freeh2o[jj] = freeh2o[jj] - (-cal / 203.2)
+            return
+
+        else:
+            if dif < zero:
+                pk_def[jj] = -dif
+            pk_ice[jj] = pk_ice[jj] + freeh2o[jj]
+            freeh2o[jj] = zero
+
+    if pkwater_equiv[jj] > zero:
+        pk_temp[jj] = -1 * pk_def[jj] / (pkwater_equiv[jj] * 1.27)
+
+    elif pkwater_equiv[jj] < zero:
+        pkwater_equiv[jj] = zero
+
+    return
+
+
+@jit(nopython=True)
+def _snowcov(
+    jj,
+    snarea_curve,
+    snarea_thresh,
+    net_snow,
+    newsnow,
+    ai,
+    frac_swe,
+    iasw,
+    pksv,
+    pkwater_equiv,
+    pst,
+    scrv,
+    snowcov_area,
+    snowcov_areasv,
+):
+    """Compute snow-covered area"""
+    snowcov_area_ante = snowcov_area[jj]
+    snowcov_area[jj] = snarea_curve[11 - 1]
+
+    if pkwater_equiv[jj] > pst[jj]:
+        pst[jj] = pkwater_equiv[jj]
+
+    ai[jj] = pst[jj]
+    if ai[jj] > snarea_thresh:
+        ai[jj] = snarea_thresh
+
+    if ai[jj] == zero:
+        frac_swe[jj] = zero
+    else:
+        frac_swe[jj] = pkwater_equiv[jj] / ai[jj]
+
+    if pkwater_equiv[jj] >= ai[jj]:
+        iasw[jj] = False
+
+    else:
+        if newsnow:
+            if iasw[jj]:
+                scrv[jj] = scrv[jj] + (0.75 * net_snow)
+            else:
+                iasw[jj] = True
+                snowcov_areasv[jj] = snowcov_area_ante
+                pksv[jj] = pkwater_equiv[jj] - net_snow
+                scrv[jj] = pkwater_equiv[jj] - (0.25 * net_snow)
+            return
+
+        elif iasw[jj]:
+            if pkwater_equiv[jj] > scrv[jj]:
+                return
+
+            if pkwater_equiv[jj] >= pksv[jj]:
+                difx = snowcov_area[jj] - snowcov_areasv[jj]
+                dify = scrv[jj] - pksv[jj]
+                fracy = zero
+                if dify > zero:
+                    fracy = (pkwater_equiv[jj] - pksv[jj]) / dify
+                snowcov_area[jj] = snowcov_areasv[jj] + fracy * difx
+                return
+
+            else:
+                iasw[jj] = False
+
+        snowcov_area[jj] = _sca_deplcrv(snarea_curve, frac_swe[jj])
+
+    return
+
+
+@jit(nopython=True)
+def _snalbedo(
+    jj,
+    albset_rna,
+    albset_rnm,
+    albset_sna,
+    albset_snm,
+    net_snow,
+    newsnow,
+    pptmix,
+    prmx,
+    albedo,
+    int_alb,
+    iso,
+    lst,
+    salb,
+    slst,
+    snsv,
+):
+    """Compute snowpack albedo"""
+    if not newsnow:
+        if lst[jj]:
+            slst[jj] = salb[jj] - 3.0
+            if slst[jj] < one:
+                slst[jj] = one
+            if iso[jj] != 2:
+                if slst[jj] > 5.0:
+                    slst[jj] = 5.0
+            lst[jj] = False
+            snsv[jj] = zero
+
+    elif iso[jj] == 2:
+        if prmx < albset_rnm:
+            if net_snow > albset_snm:
+                slst[jj] = zero
+                lst[jj] = False
+                snsv[jj] = zero
+            else:
+                snsv[jj] = snsv[jj] + net_snow
+                if snsv[jj] > albset_snm:
+                    slst[jj] = zero
+                    lst[jj] = False
+                    snsv[jj] = zero
+                else:
+                    if not lst[jj]:
+                        salb[jj] = slst[jj]
+                    slst[jj] = zero
+                    lst[jj] = True
+
+    else:
+        if pptmix < one:
+            slst[jj] = zero
+            lst[jj] = False
+        elif prmx >= albset_rna:
+            lst[jj] = False
+        elif net_snow >= albset_sna:
+            slst[jj] = zero
+            lst[jj] = False
+        else:
+            slst[jj] = slst[jj] - 3.0
+            if slst[jj] < zero:
+                slst[jj] = zero
+            if slst[jj] > 5.0:
+                slst[jj] = 5.0
+            lst[jj] = False
+
+        snsv[jj] = zero
+
+    ll = int(slst[jj] + 0.5)
+    slst[jj] = slst[jj] + 1.0
+
+    if ll > 0:
+        if int_alb[jj] == 2:
+            if ll > maxalb:
+                ll = maxalb
+            albedo[jj] = _amlt_init[ll - 1]
+        elif ll <= maxalb:
+            albedo[jj] = _acum_init[ll - 1]
+        else:
+            ll = ll - 12
+            if ll > maxalb:
+                ll = maxalb
+            albedo[jj] = _amlt_init[ll - 1]
+
+    elif iso[jj] == 2:
+        albedo[jj] = 0.72
+        int_alb[jj] = 2
+
+    else:
+        albedo[jj] = 0.91
+        int_alb[jj] = 1
+
+    return
+
+
+@jit(nopython=True)
+def _step_4(
+    jj,
+    trd,
+    cecn_coef,
+    cov_type,
+    emis_noppt,
+    freeh2o_cap,
+    rad_trncf,
+    tstorm_mo,
+    canopy_covden,
+    den_max,
+    deninv,
+    denmaxinv,
+    settle_const,
+    hru_ppt,
+    net_snow,
+    swrad,
+    tavgc,
+    tmaxc,
+    tminc,
+    albedo,
+    freeh2o,
+    iasw,
+    iso,
+    lso,
+    mso,
+    pk_def,
+    pk_den,
+    pk_depth,
+    pk_ice,
+    pk_temp,
+    pkwater_equiv,
+    pss,
+    pst,
+    snowcov_area,
+    snowmelt,
+    tcal,
+):
+    """SNOWPACK RADIATION FLUXES ENERGY BALANCE"""
+    emis = emis_noppt
+    if hru_ppt > zero:
+        emis = one
+    esv = emis
+
+    swn = swrad * (one - albedo[jj]) * rad_trncf
+
+    cec = cecn_coef * 0.5
+    if cov_type > 2:
+        cec = cec * 0.5
+
+    pss[jj] = pss[jj] + net_snow
+    dpt_before_settle = pk_depth[jj] + net_snow * deninv
+    dpt1 = dpt_before_settle + settle_const * (
+        (pss[jj] * denmaxinv) - dpt_before_settle
+    )
+    pk_depth[jj] = dpt1
+
+    if dpt1 > zero:
+        pk_den[jj] = pkwater_equiv[jj] / dpt1
+    else:
+        pk_den[jj] = zero
+
+    effk = 0.0154 * pk_den[jj]
+    cst = pk_den[jj] * (np.sqrt(effk * 13751.0))
+
+    if iso[jj] == 1:
+        if mso[jj] == 2:
+            if pk_temp[jj] >= zero:
+                lso[jj] = lso[jj] + 1
+                if lso[jj] > 4:
+                    iso[jj] = 2
+                    lso[jj] = 0
+            else:
+                lso[jj] = 0
+
+    # night
+    niteda = 1
+    sw = zero
+    temp = (tminc + tavgc) * 0.5
+    cals = _snowbal(
+        jj,
+        niteda,
+        cec,
+        cst,
+        esv,
+        sw,
+        temp,
+        trd,
+        emis_noppt,
+        freeh2o_cap,
+        tstorm_mo,
+        canopy_covden,
+        den_max,
+        denmaxinv,
+        hru_ppt,
+        freeh2o,
+        iasw,
+        pk_def,
+        pk_den,
+        pk_depth,
+        pk_ice,
+        pk_temp,
+        pkwater_equiv,
+        pss,
+        pst,
+        snowcov_area,
+        snowmelt,
+    )
+    tcal[jj] = cals
+
+    # day
+    if pkwater_equiv[jj] > zero:
+        niteda = 2
+        sw = swn
+        temp = (tmaxc + tavgc) * 0.5
+        cals = _snowbal(
+            jj,
+            niteda,
+            cec,
+            cst,
+            esv,
+            sw,
+            temp,
+            trd,
+            emis_noppt,
+            freeh2o_cap,
+            tstorm_mo,
+            canopy_covden,
+            den_max,
+            denmaxinv,
+            hru_ppt,
+            freeh2o,
+            iasw,
+            pk_def,
+            pk_den,
+            pk_depth,
+            pk_ice,
+            pk_temp,
+            pkwater_equiv,
+            pss,
+            pst,
+            snowcov_area,
+            snowmelt,
+        )
+        tcal[jj] = tcal[jj] + cals
+
+    return
+
+
+@jit(nopython=True)
+def _snowbal(
+    jj,
+    niteda,
+    cec,
+    cst,
+    esv,
+    sw,
+    temp,
+    trd,
+    emis_noppt,
+    freeh2o_cap,
+    tstorm_mo,
+    canopy_covden,
+    den_max,
+    denmaxinv,
+    hru_ppt,
+    freeh2o,
+    iasw,
+    pk_def,
+    pk_den,
+    pk_depth,
+    pk_ice,
+    pk_temp,
+    pkwater_equiv,
+    pss,
+    pst,
+    snowcov_area,
+    snowmelt,
+):
+    """Snowpack energy balance: 1st call is for night period, 2nd call for day period."""
+    air = 0.585e-7 * ((temp + 273.16) ** 4.0)
+    emis = esv
+
+    if temp < zero:
+        ts = temp
+        sno = air
+    else:
+        ts = zero
+        sno = 325.7
+
+    if hru_ppt > zero:
+        if tstorm_mo == 1:
+            if niteda == 1:
+                emis = 0.85
+                if trd > ONETHIRD:
+                    emis = emis_noppt
+            else:
+                if trd > ONETHIRD:
+                    emis = 1.29 - (0.882 * trd)
+                if trd >= 0.5:
+                    emis = 0.95 - (0.2 * trd)
+
+    sky = (one - canopy_covden) * ((emis * air) - sno)
+    can = canopy_covden * (air - sno)
+
+    cecsub = zero
+    if (temp > zero) and (hru_ppt > zero):
+        cecsub = cec * temp
+
+    cal = sky + can + cecsub + sw
+
+    if (ts >= zero) and (cal > zero):
+        _calin(
+            cal,
+            jj,
+            freeh2o_cap,
+            den_max,
+            denmaxinv,
+            freeh2o,
+            iasw,
+            pk_def,
+            pk_den,
+            pk_depth,
+            pk_ice,
+            pk_temp,
+            pkwater_equiv,
+            pss,
+            pst,
+            snowcov_area,
+            snowmelt,
+        )
+        return cal
+
+    qcond = cst * (ts - pk_temp[jj])
+
+    if qcond < zero:
+        if pk_temp[jj] < zero:
+            pk_def[jj] = pk_def[jj] - qcond
+            pk_temp[jj] = -1 * pk_def[jj] / (pkwater_equiv[jj] * 1.27)
+        else:
+            _caloss(qcond, jj, freeh2o, pk_def, pk_ice, pk_temp, pkwater_equiv)
+
+    elif qcond < epsilon32:
+        if pk_temp[jj] >= zero:
+            if cal > zero:
+                _calin(
+                    cal,
+                    jj,
+                    freeh2o_cap,
+                    den_max,
+                    denmaxinv,
+                    freeh2o,
+                    iasw,
+                    pk_def,
+                    pk_den,
+                    pk_depth,
+                    pk_ice,
+                    pk_temp,
+                    pkwater_equiv,
+                    pss,
+                    pst,
+                    snowcov_area,
+                    snowmelt,
+                )
+
+    elif ts >= zero:
+        pk_defsub = pk_def[jj] - qcond
+        if pk_defsub < zero:
+            pk_def[jj] = zero
+            pk_temp[jj] = zero
+        else:
+            pk_def[jj] = pk_defsub
+            pk_temp[jj] = -pk_defsub / (pkwater_equiv[jj] * 1.27)
+
+    else:
+        pkt = -ts * (pkwater_equiv[jj] * 1.27)
+        pks = pk_def[jj] - pkt
+        pk_defsub = pks - qcond
+        if pk_defsub < zero:
+            pk_def[jj] = pkt
+            pk_temp[jj] = ts
+        else:
+            pk_def[jj] = pk_defsub + pkt
+            pk_temp[jj] = -1 * pk_def[jj] / (pkwater_equiv[jj] * 1.27)
+
+    return cal
+
+
+@jit(nopython=True)
+def _snowevap(
+    jj,
+    potet_sublim,
+    potet,
+    hru_intcpevap,
+    freeh2o,
+    pk_def,
+    pk_ice,
+    pk_temp,
+    pkwater_equiv,
+    snow_evap,
+    snowcov_area,
+):
+    """Compute snow pack evaporation"""
+    ez = potet_sublim * potet * snowcov_area[jj] - hru_intcpevap
+
+    if ez < epsilon32:
+        snow_evap[jj] = 0.0
+
+    elif ez >= pkwater_equiv[jj]:
+        snow_evap[jj] = pkwater_equiv[jj]
+        pkwater_equiv[jj] = zero
+        pk_ice[jj] = zero
+        pk_def[jj] = zero
+        freeh2o[jj] = zero
+        pk_temp[jj] = zero
+
+    else:
+        pk_ice[jj] = pk_ice[jj] - ez
+        if pk_ice[jj] < zero:
+            pk_ice[jj] = zero
+            pk_def[jj] = zero
+            pk_temp[jj] = zero
+        else:
+            cal = pk_temp[jj] * ez * 1.27
+            pk_def[jj] = pk_def[jj] + cal
+
+        pkwater_equiv[jj] = pkwater_equiv[jj] - ez
+        snow_evap[jj] = ez
+
+    if snow_evap[jj] < zero:
+        pkwater_equiv[jj] = pkwater_equiv[jj] - snow_evap[jj]
+        if pkwater_equiv[jj] < zero:
+            pkwater_equiv[jj] = zero
+        snow_evap[jj] = zero
+
+    avail_et = potet - hru_intcpevap - snow_evap[jj]
+    if avail_et < zero:
+        snow_evap[jj] = snow_evap[jj] + avail_et
+        pkwater_equiv[jj] = pkwater_equiv[jj] - avail_et
+
+        if snow_evap[jj] < zero:
+            pkwater_equiv[jj] = pkwater_equiv[jj] - snow_evap[jj]
+            if pkwater_equiv[jj] < zero:
+                pkwater_equiv[jj] = zero
+            snow_evap[jj] = zero
+
+    return
@@ -1,6 +1,7 @@
 from typing import Union
 
 import numpy as np
+from numba import jit, prange
 
 from pynhm.base.storageUnit import StorageUnit
 
@@ -11,11 +12,22 @@ from ..constants import ETType, HruType, SoilType, epsilon, nan, one, zero
 ONETHIRD = 1 / 3
 TWOTHIRDS = 2 / 3
 
+LAND = HruType.LAND.value
+EVAP_ONLY = ETType.EVAP_ONLY.value
+EVAP_PLUS_TRANSP = ETType.EVAP_PLUS_TRANSP.value
+SAND = SoilType.SAND.value
+LOAM = SoilType.LOAM.value
+CLAY = SoilType.CLAY.value
+
 
 class PRMSSoilzone(StorageUnit):
     """PRMS soil zone
 
     Args:
+        calc_method: one of "python" (default), "numba" or
+            "numba_parallel". The numba methods calculate all HRUs in a
+            single compiled call, "numba_parallel" distributes the HRUs
+            over threads with prange.
     """
 
     def __init__(
@@ -32,6 +44,7 @@ class PRMSSoilzone(StorageUnit):
         snow_evap: adaptable,
         snowcov_area: adaptable,
         budget_type: str = None,
+        calc_method: str = None,
         verbose: bool = False,
     ) -> "PRMSSoilzone":
 
@@ -44,6 +57,12 @@ class PRMSSoilzone(StorageUnit):
         self.set_inputs(locals())
         self.set_budget(budget_type)
 
+        if calc_method is None:
+            calc_method = "python"
+        if calc_method not in ["python", "numba", "numba_parallel"]:
+            raise ValueError(f"Invalid calc_method: '{calc_method}'")
+        self._calc_method = calc_method
+
         return
 
     @staticmethod
@@ -400,10 +419,6 @@ class PRMSSoilzone(StorageUnit):
             self.soil_moist_ante = self.soil_moist
             self.ssres_stor_ante = self.ssres_stor
 
-        # <
-        gwin = zero
-        update_potet = 0
-
         # diagnostic state resets
         self.soil_to_gw[:] = zero
         self.soil_to_ssr[:] = zero
@@ -426,6 +441,35 @@ class PRMSSoilzone(StorageUnit):
             self.hru_actet = self.hru_actet + self.dprst_evap_hru
 
         # <
+        if self._calc_method == "numba":
+            self._calculate_numba(_calculate_numba)
+        elif self._calc_method == "numba_parallel":
+            self._calculate_numba(_calculate_numba_parallel)
+        else:
+            self._calculate_python()
+
+        # refactor with np.where
+        wh_lower_stor_max_gt_zero = np.where(self.soil_lower_stor_max > zero)
+        self.soil_lower_ratio[wh_lower_stor_max_gt_zero] = (
+            self.soil_lower[wh_lower_stor_max_gt_zero]
+            / self.soil_lower_stor_max[wh_lower_stor_max_gt_zero]
+        )
+        # if self.control.current_time == np.datetime64("1979-03-18T00:00:00"):
+        # asdf
+
+        self.soil_moist_tot = (
+            self.ssres_stor + self.soil_moist * self.hru_frac_perv
+        )
+        self.recharge = self.soil_to_gw + self.ssr_to_gw
+
+        if self.control.config["dprst_flag"] == 1:
+            self.recharge = self.recharge + self.dprst_seep_hru
+
+        # <
+        return
+
+    def _calculate_python(self) -> None:
+        gwin = zero
         for hh in range(self.nhru):
 
             dunnianflw = zero
@@ -731,25 +775,59 @@ class PRMSSoilzone(StorageUnit):
             self.unused_potet[hh] = self.potet[hh] - self.hru_actet[hh]
 
         # <
+        return
 
-        # refactor with np.where
-        wh_lower_stor_max_gt_zero = np.where(self.soil_lower_stor_max > zero)
-        self.soil_lower_ratio[wh_lower_stor_max_gt_zero] = (
-            self.soil_lower[wh_lower_stor_max_gt_zero]
-            / self.soil_lower_stor_max[wh_lower_stor_max_gt_zero]
-        )
-        # if self.control.current_time == np.datetime64("1979-03-18T00:00:00"):
-        # asdf
-
-        self.soil_moist_tot = (
-            self.ssres_stor + self.soil_moist * self.hru_frac_perv
+    def _calculate_numba(self, kernel) -> None:
+        kernel(
+            self.nhru,
+            self.hru_type,
+            self.cov_type,
+            self.soil_type,
+            self._soil2gw_flag,
+            self._pref_flow_flag,
+            self.hru_frac_perv,
+            self.soil_moist_max,
+            self.soil_rechr_max,
+            self.soil2gw_max,
+            self.pref_flow_thrsh,
+            self.pref_flow_max,
+            self.sat_threshold,
+            self.slowcoef_lin,
+            self.slowcoef_sq,
+            self.ssr2gw_rate,
+            self.ssr2gw_exp,
+            self.infil,
+            self.potet,
+            self.transp_on,
+            self.snow_free,
+            self.sroff,
+            self.hru_actet,
+            self.cap_infil_tot,
+            self.cap_waterin,
+            self.soil_moist,
+            self.soil_rechr,
+            self.soil_to_gw,
+            self.soil_to_ssr,
+            self.slow_stor,
+            self.slow_flow,
+            self.ssr_to_gw,
+            self.pref_flow_in,
+            self.pref_flow_infil,
+            self.pref_flow_stor,
+            self.pref_flow,
+            self._gvr2pfr,
+            self.potet_rechr,
+            self.potet_lower,
+            self.perv_actet,
+            self.soil_lower,
+            self.dunnian_flow,
+            self.ssres_flow,
+            self.ssres_stor,
+            self.swale_actet,
+            self.ssres_in,
+            self._grav_dunnian_flow,
+            self.unused_potet,
         )
-        self.recharge = self.soil_to_gw + self.ssr_to_gw
-
-        if self.control.config["dprst_flag"] == 1:
-            self.recharge = self.recharge + self.dprst_seep_hru
-
-        # <
         return
 
     @staticmethod
@@ -1028,3 +1106,350 @@ class PRMSSoilzone(StorageUnit):
             potet_lower,
             et,
         )
+
+
+# Compiled version of PRMSSoilzone._calculate_python and the static methods
+# it calls. The HRUs are independent so the loop can be run with prange.
+# The python method compares hru_type against the HruType enum members (not
+# their values) when checking for swales and for land HRUs without
+# preferential flow, so those branches are never taken there; they are
+# omitted here to reproduce the reference results.
+def _soilzone_kernel(
+    nhru: int,
+    hru_type: np.ndarray,
+    cov_type: np.ndarray,
+    soil_type: np.ndarray,
+    soil2gw_flag: np.ndarray,
+    pref_flow_flag: np.ndarray,
+    hru_frac_perv: np.ndarray,
+    soil_moist_max: np.ndarray,
+    soil_rechr_max: np.ndarray,
+    soil2gw_max: np.ndarray,
+    pref_flow_thrsh: np.ndarray,
+    pref_flow_max: np.ndarray,
+    sat_threshold: np.ndarray,
+    slowcoef_lin: np.ndarray,
+    slowcoef_sq: np.ndarray,
+    ssr2gw_rate: np.ndarray,
+    ssr2gw_exp: np.ndarray,
+    infil: np.ndarray,
+    potet: np.ndarray,
+    transp_on: np.ndarray,
+    snow_free: np.ndarray,
+    sroff: np.ndarray,
+    hru_actet: np.ndarray,
+    cap_infil_tot: np.ndarray,
+    cap_waterin: np.ndarray,
+    soil_moist: np.ndarray,
+    soil_rechr: np.ndarray,
+    soil_to_gw: np.ndarray,
+    soil_to_ssr: np.ndarray,
+    slow_stor: np.ndarray,
+    slow_flow: np.ndarray,
+    ssr_to_gw: np.ndarray,
+    pref_flow_in: np.ndarray,
+    pref_flow_infil: np.ndarray,
+    pref_flow_stor: np.ndarray,
+    pref_flow: np.ndarray,
+    gvr2pfr: np.ndarray,
+    potet_rechr: np.ndarray,
+    potet_lower: np.ndarray,
+    perv_actet: np.ndarray,
+    soil_lower: np.ndarray,
+    dunnian_flow: np.ndarray,
+    ssres_flow: np.ndarray,
+    ssres_stor: np.ndarray,
+    swale_actet: np.ndarray,
+    ssres_in: np.ndarray,
+    grav_dunnian_flow: np.ndarray,
+    unused_potet: np.ndarray,
+) -> None:
+    gwin = 0.0
+    for hh in prange(nhru):
+        dunnianflw_pfr = 0.0
+        dunnianflw_gvr = 0.0
+        prefflow = 0.0
+
+        avail_potet = max(0.0, potet[hh] - hru_actet[hh])
+
+        capwater_maxin = infil[hh]
+        cap_infil_tot[hh] = capwater_maxin * hru_frac_perv[hh]
+        cap_waterin[hh] = capwater_maxin
+
+        if (capwater_maxin + soil_moist[hh]) > 0.0:
+            (
+                cap_waterin[hh],
+                soil_moist[hh],
+                soil_rechr[hh],
+                soil_to_gw[hh],
+                soil_to_ssr[hh],
+            ) = _compute_soilmoist(
+                soil2gw_flag[hh],
+                hru_frac_perv[hh],
+                soil_moist_max[hh],
+                soil_rechr_max[hh],
+                soil2gw_max[hh],
+                cap_waterin[hh],
+                soil_moist[hh],
+                soil_rechr[hh],
+                soil_to_gw[hh],
+                soil_to_ssr[hh],
+            )
+            cap_waterin[hh] = cap_waterin[hh] * hru_frac_perv[hh]
+
+        topfr = 0.0
+        availh2o = slow_stor[hh] + soil_to_ssr[hh]
+
+        if hru_type[hh] == LAND:
+            topfr = max(0.0, availh2o - pref_flow_thrsh[hh])
+            ssresin = soil_to_ssr[hh] - topfr
+            slow_stor[hh] = max(0.0, availh2o - topfr)
+            if slow_stor[hh] > epsilon:
+                slow_stor[hh], slow_flow[hh] = _compute_interflow(
+                    slowcoef_lin[hh],
+                    slowcoef_sq[hh],
+                    ssresin,
+                    slow_stor[hh],
+                )
+
+        if (slow_stor[hh] > epsilon) and (ssr2gw_rate[hh] > 0.0):
+            ssr_to_gw[hh], slow_stor[hh] = _compute_gwflow(
+                ssr2gw_rate[hh],
+                ssr2gw_exp[hh],
+                slow_stor[hh],
+            )
+
+        if pref_flow_flag[hh]:
+            availh2o = pref_flow_stor[hh] + topfr
+            dunnianflw_gvr = max(0.0, availh2o - pref_flow_max[hh])
+            if dunnianflw_gvr > 0.0:
+                topfr = max(0.0, topfr - dunnianflw_gvr)
+            pref_flow_in[hh] = pref_flow_infil[hh] + topfr
+            pref_flow_stor[hh] = pref_flow_stor[hh] + topfr
+            # the python method discards the interflow calculated from
+            # pref_flow_stor, so prefflow remains zero
+
+        gvr2pfr[hh] = topfr
+        pervactet = 0.0
+
+        if soil_moist[hh] > 0.0:
+            (
+                soil_moist[hh],
+                soil_rechr[hh],
+                avail_potet,
+                potet_rechr[hh],
+                potet_lower[hh],
+                pervactet,
+            ) = _compute_szactet(
+                transp_on[hh],
+                cov_type[hh],
+                soil_type[hh],
+                soil_moist_max[hh],
+                soil_rechr_max[hh],
+                snow_free[hh],
+                soil_moist[hh],
+                soil_rechr[hh],
+                avail_potet,
+                potet_rechr[hh],
+                potet_lower[hh],
+            )
+
+        hru_actet[hh] = hru_actet[hh] + pervactet * hru_frac_perv[hh]
+        perv_actet[hh] = pervactet
+        soil_lower[hh] = soil_moist[hh] - soil_rechr[hh]
+
+        if hru_type[hh] == LAND:
+            dunnian_flow[hh] = dunnianflw_gvr + dunnianflw_pfr
+            ssres_flow[hh] = slow_flow[hh]
+            if pref_flow_flag[hh]:
+                pref_flow[hh] = prefflow
+                ssres_flow[hh] = ssres_flow[hh] + prefflow
+            sroff[hh] = sroff[hh] + dunnian_flow[hh]
+            ssres_stor[hh] = slow_stor[hh] + pref_flow_stor[hh]
+
+        else:
+            availh2o = slow_stor[hh] - sat_threshold[hh]
+            swale_actet[hh] = 0.0
+            if availh2o > 0.0:
+                unsatisfied_et = potet[hh] - hru_actet[hh]
+                if unsatisfied_et > 0.0:
+                    availh2o = min(availh2o, unsatisfied_et)
+                    swale_actet[hh] = availh2o
+                    hru_actet[hh] = hru_actet[hh] + swale_actet[hh]
+                    slow_stor[hh] = slow_stor[hh] - swale_actet[hh]
+            ssres_stor[hh] = slow_stor[hh]
+
+        ssres_in[hh] = soil_to_ssr[hh] + pref_flow_infil[hh] + gwin
+        grav_dunnian_flow[hh] = dunnianflw_gvr
+        unused_potet[hh] = potet[hh] - hru_actet[hh]
+
+    return
+
+
+_calculate_numba = jit(nopython=True)(_soilzone_kernel)
+_calculate_numba_parallel = jit(nopython=True, parallel=True)(
+    _soilzone_kernel
+)
+
+
+@jit(nopython=True)
+def _compute_soilmoist(
+    soil2gw_flag,
+    perv_frac,
+    soil_moist_max,
+    soil_rechr_max,
+    soil2gw_max,
+    infil,
+    soil_moist,
+    soil_rechr,
+    soil_to_gw,
+    soil_to_ssr,
+):
+    soil_rechr = min(soil_rechr + infil, soil_rechr_max)
+    excess = soil_moist + infil
+    soil_moist = min(excess, soil_moist_max)
+    excess = (excess - soil_moist_max) * perv_frac
+
+    if excess > 0.0:
+        if soil2gw_flag:
+            soil_to_gw = min(soil2gw_max, excess)
+            excess = excess - soil_to_gw
+        if excess > (infil * perv_frac):
+            infil = 0.0
+        else:
+            infil = infil - (excess / perv_frac)
+        soil_to_ssr = max(0.0, excess)
+
+    return infil, soil_moist, soil_rechr, soil_to_gw, soil_to_ssr
+
+
+@jit(nopython=True)
+def _compute_interflow(coef_lin, coef_sq, ssres_in, storage):
+    if (coef_lin <= 0.0) and (ssres_in <= 0.0):
+        c1 = coef_sq * storage
+        inter_flow = storage * (c1 / (1.0 + c1))
+
+    elif (coef_lin > 0.0) and (coef_sq <= 0.0):
+        c2 = 1.0 - np.exp(-coef_lin)
+        inter_flow = ssres_in * (1.0 - c2 / coef_lin) + storage * c2
+
+    elif coef_sq > 0.0:
+        c3 = np.sqrt(coef_lin**2.0 + 4.0 * coef_sq * ssres_in)
+        sos = storage - ((c3 - coef_lin) / (2.0 * coef_sq))
+        if c3 == 0.0:
+            raise RuntimeError(
+                "ERROR, in compute_interflow sos=0, "
+                "please contact code developers"
+            )
+        c1 = coef_sq * sos / c3
+        c2 = 1.0 - np.exp(-c3)
+        if 1.0 + c1 * c2 > 0.0:
+            inter_flow = ssres_in + ((sos * (1.0 + c1) * c2) / (1.0 + c1 * c2))
+        else:
+            inter_flow = ssres_in
+
+    else:
+        inter_flow = 0.0
+
+    inter_flow = min(inter_flow, storage)
+    storage = storage - inter_flow
+    return storage, inter_flow
+
+
+@jit(nopython=True)
+def _compute_gwflow(ssr2gw_rate, ssr2gw_exp, slow_stor):
+    ssr_to_gw = max(0.0, ssr2gw_rate * slow_stor**ssr2gw_exp)
+    ssr_to_gw = min(ssr_to_gw, slow_stor)
+    slow_stor = slow_stor - ssr_to_gw
+    return ssr_to_gw, slow_stor
+
+
+@jit(nopython=True)
+def _compute_szactet(
+    transp_on,
+    cov_type,
+    soil_type,
+    soil_moist_max,
+    soil_rechr_max,
+    snow_free,
+    soil_moist,
+    soil_rechr,
+    avail_potet,
+    potet_rechr,
+    potet_lower,
+):
+    if avail_potet < epsilon:
+        et_type = 1
+        avail_potet = 0.0
+    elif not transp_on:
+        if snow_free < 0.01:
+            et_type = 1
+        else:
+            et_type = EVAP_ONLY
+    elif cov_type > 0:
+        et_type = EVAP_PLUS_TRANSP
+    elif snow_free < 0.01:
+        et_type = 1
+    else:
+        et_type = EVAP_ONLY
+
+    if (et_type == EVAP_ONLY) or (et_type == EVAP_PLUS_TRANSP):
+        pcts = soil_moist / soil_moist_max
+        pctr = soil_rechr / soil_rechr_max
+        potet_lower = avail_potet
+        potet_rechr = avail_potet
+
+        if soil_type == SAND:
+            if pcts < 0.25:
+                potet_lower = 0.5 * pcts * avail_potet
+            if pctr < 0.25:
+                potet_rechr = 0.5 * pctr * avail_potet
+
+        elif soil_type == LOAM:
+            if pcts < 0.5:
+                potet_lower = pcts * avail_potet
+            if pctr < 0.5:
+                potet_rechr = pctr * avail_potet
+
+        elif soil_type == CLAY:
+            if (pcts < TWOTHIRDS) and (pcts > ONETHIRD):
+                potet_lower = pcts * avail_potet
+            elif pcts <= ONETHIRD:
+                potet_lower = 0.5 * pcts * avail_potet
+            if (pctr < TWOTHIRDS) and (pctr > ONETHIRD):
+                potet_rechr = pctr * avail_potet
+            elif pctr <= ONETHIRD:
+                potet_rechr = 0.5 * pctr * avail_potet
+
+        if et_type == EVAP_ONLY:
+            potet_rechr = potet_rechr * snow_free
+
+        if potet_rechr > soil_rechr:
+            potet_rechr = soil_rechr
+            soil_rechr = 0.0
+        else:
+            soil_rechr = soil_rechr - potet_rechr
+
+        if (et_type == EVAP_ONLY) or (potet_rechr >= potet_lower):
+            if potet_rechr > soil_moist:
+                potet_rechr = soil_moist
+                soil_moist = 0.0
+            else:
+                soil_moist = soil_moist - potet_rechr
+            et = potet_rechr
+
+        elif potet_lower > soil_moist:
+            et = soil_moist
+            soil_moist = 0.0
+
+        else:
+            soil_moist = soil_moist - potet_lower
+            et = potet_lower
+
+        if soil_rechr > soil_moist:
+            soil_rechr = soil_moist
+
+    else:
+        et = 0.0
+
+    return soil_moist, soil_rechr, avail_potet, potet_rechr, potet_lower, et
@@ -1,6 +1,7 @@
 from .control import ControlVariables
 from .csv_utils import CsvFile
 from .netcdf_utils import NetCdfCompare, NetCdfRead, NetCdfWrite
+from .npy_utils import NpyRead, cbh_netcdf_to_npy
 from .parameters import PrmsParameters
 from .prms5_file_util import PrmsFile
 from .prms5util import (
@@ -9,4 +10,6 @@ from .prms5util import (
     load_prms_statscsv,
     load_wbl_output,
 )
+from .timing import PhaseTimers
 from .utils import timer
+from .zarr_utils import ZarrRead, ZarrWrite, cbh_netcdf_to_zarr
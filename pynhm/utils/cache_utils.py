@@ -0,0 +1,90 @@
+import hashlib
+import os
+import pathlib as pl
+import tempfile
+from typing import Union
+
+import numpy as np
+
+fileish = Union[str, pl.Path]
+
+
+def cache_key(*items, file_contents: bool = False) -> str:
+    """Hash items into a key for a content-addressed cache.
+
+    Args:
+        items: the things the cached values depend on. Arrays are hashed on
+            their dtype, shape and data. Paths (pathlib.Path) are hashed on
+            their resolved name and on either their size and modification
+            time or their contents. dicts are hashed on their sorted items.
+            Anything else is hashed on its repr.
+        file_contents: hash the contents of paths instead of their size and
+            modification time.
+
+    Returns:
+        A hexadecimal digest.
+    """
+    hasher = hashlib.sha256()
+    _update_hash(hasher, items, file_contents)
+    return hasher.hexdigest()
+
+
+def _update_hash(hasher, item, file_contents: bool) -> None:
+    if isinstance(item, np.ndarray):
+        hasher.update(f"ndarray{item.dtype.str}{item.shape}".encode())
+        hasher.update(np.ascontiguousarray(item).tobytes())
+    elif isinstance(item, pl.Path):
+        path = item.resolve()
+        hasher.update(f"path{path}".encode())
+        if file_contents:
+            with open(path, "rb") as file:
+                for block in iter(lambda: file.read(2**20), b""):
+                    hasher.update(block)
+        else:
+            stat = path.stat()
+            hasher.update(f"{stat.st_size},{stat.st_mtime_ns}".encode())
+    elif isinstance(item, dict):
+        hasher.update(b"dict")
+        for key in sorted(item.keys()):
+            _update_hash(hasher, key, file_contents)
+            _update_hash(hasher, item[key], file_contents)
+    elif isinstance(item, (list, tuple)):
+        hasher.update(f"sequence{len(item)}".encode())
+        for sub_item in item:
+            _update_hash(hasher, sub_item, file_contents)
+    else:
+        hasher.update(repr(item).encode())
+    return
+
+
+def cache_path(cache_dir: fileish, key: str) -> pl.Path:
+    return pl.Path(cache_dir) / f"{key}.npz"
+
+
+def load_cached_arrays(cache_dir: fileish, key: str) -> Union[dict, None]:
+    """Load the arrays cached under key, None if they are not cached."""
+    path = cache_path(cache_dir, key)
+    if not path.exists():
+        return None
+    with np.load(path) as npz:
+        return {name: npz[name] for name in npz.files}
+
+
+def save_cached_arrays(cache_dir: fileish, key: str, arrays: dict) -> pl.Path:
+    """Cache a dict of arrays under key.
+
+    The file is written to a temporary name and then moved into place so that
+    concurrent readers never see a partial file.
+    """
+    path = cache_path(cache_dir, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+    return path
@@ -31,6 +31,9 @@ class CsvFile:
         self.convert = convert
         self._variables = None
         self._coordinates = None
+        self._dates = None
+        self._arrays = None
+        self._variable_coordinates = {}
         self._data = None
         self.meta = Meta()
 
@@ -83,13 +86,41 @@ class CsvFile:
     def data(self) -> np.recarray:
         """Get csv output data as a numpy recarray
 
+        The recarray has a date field and a field for each variable and id,
+        named f"{variable_name}_{id}". It is only built when requested.
+
         Returns:
             data : numpy recarray containing all of the csv data
 
         """
         self._lazy_data_evaluation()
+        if self._data is None:
+            self._data = self._get_recarray()
         return self._data
 
+    @property
+    def dates(self) -> np.ndarray:
+        """Get the dates of the csv output data
+
+        Returns:
+            dates: numpy datetime64 array of the dates
+
+        """
+        self._lazy_data_evaluation()
+        return self._dates
+
+    @property
+    def arrays(self) -> dict:
+        """Get the csv output data as dense arrays
+
+        Returns:
+            arrays: dictionary of (time, nids) numpy arrays of the variables
+                with columns in the order of the nhm_id or nhm_seg ids
+
+        """
+        self._lazy_data_evaluation()
+        return self._arrays
+
     def add_path(
         self,
         path: fileish,
@@ -114,7 +145,18 @@ class CsvFile:
 
         """
         self._lazy_data_evaluation()
-        df = pd.DataFrame(self._data).set_index("date")
+        dates = pd.Index(self._dates, name="date")
+        df = pd.concat(
+            [
+                pd.DataFrame(
+                    arr,
+                    index=dates,
+                    columns=self._column_names(variable_name),
+                )
+                for variable_name, arr in self._arrays.items()
+            ],
+            axis=1,
+        )
         return df
 
     def to_netcdf(
@@ -151,21 +193,17 @@ class CsvFile:
 
         # Dimensions
         # None for the len argument gives an unlimited dim
-        ntimes = self._data.shape[0]
+        ntimes = self._dates.shape[0]
         ds.createDimension("time", ntimes)
         for key, value in self._coordinates.items():
             ds.createDimension(key, len(value))
 
         # Dim Variables
         time = ds.createVariable("datetime", "f4", ("time",))
-        start_date = self._data["date"][0].strftime("%Y-%m-%d %H:%M:%S")
-        time_units = f"days since {start_date}"
+        start_date = self._dates[0].astype(dt.datetime)
+        time_units = f"days since {start_date:%Y-%m-%d %H:%M:%S}"
         time.units = time_units
-        time[:] = nc4.date2num(
-            self._data["date"].astype(dt.datetime),
-            units=time_units,
-            calendar="standard",
-        )
+        time[:] = (self._dates - self._dates[0]) / np.timedelta64(1, "D")
 
         for key, value in self._coordinates.items():
             coord_id = ds.createVariable(key, "i4", (key))
@@ -183,14 +221,9 @@ class CsvFile:
                     dim_name = "nhm_seg"
                 else:
                     dim_name = "nhm_id"
-                dtype = meta_numpy_type(meta_dict[variable_name])
             else:
                 variable_type = "f4"
                 dim_name = "nhm_id"
-                dtype = np.float32
-
-            ids = self._coordinates[dim_name]
-            nids = len(ids)
 
             var = ds.createVariable(
                 variable_name,
@@ -211,11 +244,7 @@ class CsvFile:
                         continue
                     ds.variables[variable_name].setncattr(key, val)
 
-            arr = np.zeros((ntimes, nids), dtype=dtype)
-            for idx, on_id in enumerate(ids):
-                key = f"{variable_name}_{on_id}"
-                arr[:, idx] = self._data[key][:]
-            ds.variables[variable_name][:, :] = arr
+            ds.variables[variable_name][:, :] = self._arrays[variable_name]
 
         ds.close()
         print(f"Wrote netcdf file: {name}")
@@ -237,34 +266,49 @@ class CsvFile:
             raise TypeError(f"{name} must be a string or pathlib.Path object")
 
     def _lazy_data_evaluation(self):
-        if self._data is None:
+        if self._arrays is None:
             self._get_data()
 
+    def _column_names(self, variable_name: str) -> list:
+        coordinate_name = self._variable_coordinates[variable_name]
+        return [
+            f"{variable_name}_{idx}"
+            for idx in self._coordinates[coordinate_name]
+        ]
+
+    @staticmethod
+    def _read_csv(path: pl.Path, dtype) -> (list, np.ndarray, np.ndarray):
+        """Read the ids, dates and (time, nids) data of a PRMS csv file
+
+        The dates and the data are parsed in bulk by numpy in C.
+        """
+        with open(path) as csv_file:
+            header = csv_file.readline()
+        ids = [idx.strip() for idx in header.split(",")[1:]]
+        kwargs = {"delimiter": ",", "skiprows": 1}
+        dates = np.loadtxt(
+            path, usecols=0, dtype="datetime64[D]", ndmin=1, **kwargs
+        )
+        arr = np.loadtxt(
+            path,
+            usecols=range(1, len(ids) + 1),
+            dtype=np.float64,
+            ndmin=2,
+            **kwargs,
+        )
+        return ids, dates.astype("datetime64[s]"), arr.astype(dtype)
+
     def _get_data(self) -> None:
-        """Read csv data into a single numpy recarray
+        """Read csv data into a dense (time, nids) array for each variable
 
         Returns:
             None
 
         """
-        str2date = lambda x: dt.datetime.strptime(
-            x.decode("utf-8"), "%Y-%m-%d"
-        )
-        all_data = []
-        ntimes = 0
-        dtype = [("date", dt.datetime)]
+        arrays = {}
         for variable_name, path in self.paths.items():
-            if path.exists():
-                try:
-                    arr = np.genfromtxt(
-                        path,
-                        dtype=None,
-                        names=True,
-                        delimiter=",",
-                        converters={0: str2date},
-                    )
-                except:
-                    raise IOError(f"numpy could not parse...'{path}'")
+            if not path.exists():
+                raise IOError(f"csv file does not exist...'{path}'")
 
             if self._variables is None:
                 self._variables = [variable_name]
@@ -287,33 +331,52 @@ class CsvFile:
                 variable_type = np.float32
                 coordinate_name = "nhm_id"
 
+            try:
+                ids, dates, arr = self._read_csv(path, variable_type)
+            except Exception:
+                raise IOError(f"numpy could not parse...'{path}'")
+
             # set coordinates
             if self._coordinates is None:
                 self._coordinates = {}
             if coordinate_name not in list(self._coordinates.keys()):
-                self._coordinates[coordinate_name] = [
-                    idx for idx in arr.dtype.names[1:]
+                self._coordinates[coordinate_name] = ids
+            elif ids != self._coordinates[coordinate_name]:
+                # order the columns as the ids of the first file
+                columns = {idx: icol for icol, idx in enumerate(ids)}
+                arr = arr[
+                    :,
+                    [
+                        columns[idx]
+                        for idx in self._coordinates[coordinate_name]
+                    ],
                 ]
+            self._variable_coordinates[variable_name] = coordinate_name
+
+            # the dates are from the longest file
+            if self._dates is None or dates.shape[0] > self._dates.shape[0]:
+                self._dates = dates
+            arrays[variable_name] = arr
+
+        # shorter files are padded with zeros
+        ntimes = self._dates.shape[0]
+        for variable_name, arr in arrays.items():
+            if arr.shape[0] < ntimes:
+                padded = np.zeros((ntimes,) + arr.shape[1:], dtype=arr.dtype)
+                padded[: arr.shape[0]] = arr
+                arrays[variable_name] = padded
+        self._arrays = arrays
+        return
 
-            column_names = [
-                f"{variable_name}_{idx.strip()}" for idx in arr.dtype.names[1:]
-            ]
-            arr.dtype.names = ["date"] + column_names
-
-            # add additional column names to the dtype
-            for name in column_names:
-                dtype.append((name, variable_type))
-
-            all_data.append(arr)
-
-            # reset ntimes, if necessary
-            ntimes = max(arr.shape[0], ntimes)
-
-        self._data = np.zeros(ntimes, dtype=dtype)
-        for idx, arr in enumerate(all_data):
-            if idx == 0:
-                i0 = 0
-            else:
-                i0 = 1
-            for name in arr.dtype.names[i0:]:
-                self._data[name][:] = arr[name][:]
+    def _get_recarray(self) -> np.recarray:
+        """Build the recarray of the data, with a field for each column"""
+        dtype = [("date", dt.datetime)]
+        for variable_name, arr in self._arrays.items():
+            for name in self._column_names(variable_name):
+                dtype.append((name, arr.dtype))
+        data = np.zeros(self._dates.shape[0], dtype=dtype)
+        data["date"][:] = self._dates.astype(dt.datetime)
+        for variable_name, arr in self._arrays.items():
+            for idx, name in enumerate(self._column_names(variable_name)):
+                data[name][:] = arr[:, idx]
+        return data
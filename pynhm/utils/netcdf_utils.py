@@ -1,4 +1,10 @@
+import functools
+import multiprocessing
+import os
 import pathlib as pl
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
 from typing import Union
 
 import netCDF4 as nc4
@@ -13,6 +19,22 @@ listish = Union[list, tuple]
 arrayish = Union[list, tuple, np.ndarray]
 ATOL = np.finfo(np.float32).eps
 
+# The netcdf-c library is not thread-safe. Any access to netcdf files which
+# may happen concurrently with access from another thread (e.g. prefetching
+# reads or background writes) must hold this lock.
+nc4_lock = threading.RLock()
+
+
+def nc4_locked(func):
+    # Use as a decorator to hold nc4_lock during the passed function
+    @functools.wraps(func)
+    def wrap_func(*args, **kwargs):
+        with nc4_lock:
+            return func(*args, **kwargs)
+
+    return wrap_func
+
+
 # JLM TODO: start_time: np.datetime64 = None ?
 #     Still need some mechanism for initial itime_step for datetime coordinate
 #     variables
@@ -31,14 +53,21 @@ class NetCdfRead(Accessor):
         self._itime_step = {}
         for variable in self.variables:
             self._itime_step[variable] = 0
+        # The variables read for each time step by get_time_step and their
+        # data for the last time step read
+        self._time_step_variables = {}
+        self._time_step_data = {}
+        self._time_step_data_itime = None
 
     def __del__(self):
         self.close()
 
+    @nc4_locked
     def close(self):
         if self.dataset.isopen():
             self.dataset.close()
 
+    @nc4_locked
     def _open_nc_file(self):
         self.dataset = nc4.Dataset(self._nc_file, "r")
         self.ds_var_list = list(self.dataset.variables.keys())
@@ -183,6 +212,48 @@ class NetCdfRead(Accessor):
         """
         return self._variables
 
+    def time_chunk_size(self, variable: str) -> Union[int, None]:
+        """Get the chunk size of the time dimension of a variable
+
+        Args:
+            variable: variable name
+
+        Returns:
+            chunk_size: the number of time steps in a chunk of the variable,
+                None if the variable is not chunked
+
+        """
+        chunking = self.ds_var_chunking[variable]
+        if chunking == "contiguous":
+            return None
+        return chunking[0]
+
+    @nc4_locked
+    def get_block(
+        self,
+        variable: str,
+        start: int,
+        end: int,
+    ) -> np.ndarray:
+        """Get data for a variable for a block of time steps
+
+        Args:
+            variable: variable name
+            start: first time step of the block
+            end: time step after the last time step of the block
+
+        Returns:
+            arr: numpy array with the data for the time steps [start, end)
+                of the variable
+
+        """
+        if variable not in self._nc_read_vars:
+            raise ValueError(
+                f"'{variable}' not in list of available variables"
+            )
+        return np.ma.getdata(self.dataset[variable][start:end, :])
+
+    @nc4_locked
     def get_data(
         self,
         variable: str,
@@ -213,6 +284,42 @@ class NetCdfRead(Accessor):
                 )
             return self.dataset[variable][itime_step, :]
 
+    @nc4_locked
+    def get_time_step(self, variable: str, itime_step: int) -> np.ndarray:
+        """Get data for a variable for a time step
+
+        All the variables requested from get_time_step are read together for
+        a time step and kept until another time step is requested, so
+        several users of a NetCdfRead read each time step once.
+
+        Args:
+            variable: variable name
+            itime_step: time step to return
+
+        Returns:
+            arr: numpy array with the data for the variable for the time step
+
+        """
+        if variable not in self._nc_read_vars:
+            raise ValueError(
+                f"'{variable}' not in list of available variables"
+            )
+        if itime_step >= self._ntimes:
+            raise ValueError(
+                f"requested time step {itime_step} but only "
+                + f"{self._ntimes} time steps are available."
+            )
+        self._time_step_variables[variable] = None
+        if (itime_step != self._time_step_data_itime) or (
+            variable not in self._time_step_data
+        ):
+            self._time_step_data = {
+                var: np.ma.getdata(self.dataset[var][itime_step, :])
+                for var in self._time_step_variables.keys()
+            }
+            self._time_step_data_itime = itime_step
+        return self._time_step_data[variable]
+
     def advance(
         self, variable: str, current_time: np.datetime64 = None
     ) -> np.ndarray:
@@ -243,6 +350,55 @@ class NetCdfRead(Accessor):
         return arr
 
 
+# NetCdfReads shared by all users of a file, keyed by the resolved path
+_netcdf_read_pool = {}
+
+
+@nc4_locked
+def pooled_netcdf_read(name: fileish) -> NetCdfRead:
+    """Get the shared NetCdfRead of a file, opening it if needed.
+
+    Args:
+        name: path of the netcdf file
+
+    Returns:
+        The NetCdfRead of the file shared by all callers
+    """
+    key = pl.Path(name).resolve()
+    nc_read = _netcdf_read_pool.get(key)
+    if nc_read is None or not nc_read.dataset.isopen():
+        nc_read = NetCdfRead(key)
+        _netcdf_read_pool[key] = nc_read
+    return nc_read
+
+
+@nc4_locked
+def close_pooled_netcdf_reads() -> None:
+    """Close and forget all the shared NetCdfReads."""
+    for nc_read in _netcdf_read_pool.values():
+        nc_read.close()
+    _netcdf_read_pool.clear()
+    return
+
+
+# Asynchronous NetCdfWrite blocks are written by a single background thread
+# shared by all files, since writes are serialized by nc4_lock anyway. At
+# most MAX_PENDING_WRITES blocks wait to be written, after which adding
+# blocks waits for the writer.
+MAX_PENDING_WRITES = 16
+_write_executor = None
+_write_slots = threading.BoundedSemaphore(MAX_PENDING_WRITES)
+
+
+def _get_write_executor() -> ThreadPoolExecutor:
+    global _write_executor
+    if _write_executor is None:
+        _write_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="NetCdfWrite"
+        )
+    return _write_executor
+
+
 class NetCdfWrite(Accessor):
     """Output the csv output data to a netcdf file
 
@@ -254,8 +410,18 @@ class NetCdfWrite(Accessor):
             (default is True)
         complevel: compression level (default is 4)
         chunk_sizes: dictionary defining chunk sizes for the data
+        buffer_size: the number of time steps of each variable collected in
+            memory by add_data and add_simulation_time before they are
+            written to the file as one block. The default (None) is the time
+            chunk size. Buffered data are written by flush and close.
+        async_write: write the blocks of buffered time steps in a background
+            thread. flush and close wait for the writes to finish and raise
+            any exception from them.
     """
 
+    file_extension = ".nc"
+
+    @nc4_locked
     def __init__(
         self,
         name: fileish,
@@ -267,6 +433,8 @@ class NetCdfWrite(Accessor):
         zlib: bool = True,
         complevel: int = 4,
         chunk_sizes: dict = {"time": 30, "hruid": 0},
+        buffer_size: int = None,
+        async_write: bool = False,
     ) -> "NetCdfWrite":
 
         self.dataset = nc4.Dataset(name, "w", clobber=clobber)
@@ -375,6 +543,13 @@ class NetCdfWrite(Accessor):
                     continue
                 self.variables[var_name].setncattr(key, val)
 
+        if buffer_size is None:
+            buffer_size = chunk_sizes.get("time", 1)
+        self._buffer_size = max(buffer_size, 1)
+        self._buffers = {}
+        self._async_write = async_write
+        self._pending_writes = []
+
         return
 
     def __del__(self):
@@ -383,13 +558,108 @@ class NetCdfWrite(Accessor):
 
     def close(self):
         if self.dataset.isopen():
-            self.dataset.close()
+            try:
+                self.flush()
+            finally:
+                with nc4_lock:
+                    self.dataset.close()
             return
 
+    def flush(self) -> None:
+        """Write all buffered time steps to the file
+
+        With async_write, this waits for all writes to finish and raises the
+        first exception from them, if any.
+        """
+        for name in list(self._buffers.keys()):
+            self._flush_buffer(name)
+        self._check_writes(wait=True)
+        return
+
+    def _check_writes(self, wait: bool = False) -> None:
+        """Forget finished asynchronous writes, raising their exceptions."""
+        if wait:
+            wait_futures(self._pending_writes)
+        pending = []
+        error = None
+        for future in self._pending_writes:
+            if not future.done():
+                pending.append(future)
+            elif error is None and future.exception() is not None:
+                error = future.exception()
+        self._pending_writes = pending
+        if error is not None:
+            raise error
+        return
+
+    def _buffer_time_step(
+        self, name: str, target, itime_step: int, value
+    ) -> None:
+        """Buffer a time step of a variable.
+
+        The buffers hold blocks of time steps aligned to the buffer size and
+        are written when a time step outside the block is added.
+        """
+        buffer = self._buffers.get(name)
+        if buffer is not None and not (
+            buffer["start"] <= itime_step < buffer["start"] + buffer["size"]
+        ):
+            self._flush_buffer(name)
+            buffer = None
+        if buffer is None:
+            start = (itime_step // self._buffer_size) * self._buffer_size
+            size = self._buffer_size
+            with nc4_lock:
+                time_dim = self.dataset.dimensions[target.dimensions[0]]
+                if not time_dim.isunlimited():
+                    size = min(size, time_dim.size - start)
+                row_shape = target.shape[1:]
+            buffer = {
+                "target": target,
+                "start": start,
+                "size": size,
+                "data": np.zeros((size,) + row_shape, target.dtype),
+                "written": np.zeros(size, dtype=bool),
+            }
+            self._buffers[name] = buffer
+        offset = itime_step - buffer["start"]
+        buffer["data"][offset] = value
+        buffer["written"][offset] = True
+        return
+
+    def _flush_buffer(self, name: str) -> None:
+        buffer = self._buffers.pop(name)
+        if not self._async_write:
+            self._write_buffer(buffer)
+            return
+        # surface errors from earlier writes as soon as possible
+        self._check_writes()
+        _write_slots.acquire()
+        future = _get_write_executor().submit(self._write_buffer, buffer)
+        future.add_done_callback(lambda _: _write_slots.release())
+        self._pending_writes.append(future)
+        return
+
+    @nc4_locked
+    def _write_buffer(self, buffer: dict) -> None:
+        written = np.flatnonzero(buffer["written"])
+        # write each contiguous run of time steps, usually the whole block
+        runs = np.split(written, np.where(np.diff(written) != 1)[0] + 1)
+        for run in runs:
+            if not len(run):
+                continue
+            first, last = run[0], run[-1] + 1
+            buffer["target"][
+                buffer["start"] + first : buffer["start"] + last
+            ] = buffer["data"][first:last]
+        return
+
     def add_simulation_time(self, itime_step: int, simulation_time: float):
         # var = self.variables["datetime"]
         # var[itime_step] = simulation_time
-        self.datetime[itime_step] = simulation_time
+        self._buffer_time_step(
+            "datetime", self.datetime, itime_step, simulation_time
+        )
         return
 
     def add_data(
@@ -406,8 +676,9 @@ class NetCdfWrite(Accessor):
         """
         if name not in self.variables.keys():
             raise KeyError(f"{name} not a valid variable name")
-        var = self.variables[name]
-        var[itime_step, :] = current[:]
+        self._buffer_time_step(
+            name, self.variables[name], itime_step, current[:]
+        )
         return
 
     def add_all_data(
@@ -425,17 +696,102 @@ class NetCdfWrite(Accessor):
         Returns:
 
         """
-        self[time_coord][:] = time_data
+        self.flush()
         if name not in self.variables.keys():
             raise KeyError(f"{name} not a valid variable name")
-        self.variables[name][:, :] = data[:, :]
+        with nc4_lock:
+            self[time_coord][:] = time_data
+            self.variables[name][:, :] = data[:, :]
 
         return
 
 
+# The number of time steps compared at once for variables that are not
+# chunked in the base file
+COMPARE_TIME_BLOCK = 366
+
+
+def _compare_variable(
+    base_pth: fileish,
+    compare_pth: fileish,
+    variable: str,
+    atol: float,
+    rtol: float,
+) -> dict:
+    """Compare a variable in two netcdf files a block of time steps at a
+    time. Values are close, as in numpy allclose, if
+    abs(compare - base) <= atol + rtol * abs(base).
+
+    This is run in worker processes by NetCdfCompare, so it opens the files
+    itself and returns only plain values.
+    """
+    with nc4_lock:
+        base_ds = nc4.Dataset(base_pth, "r")
+        compare_ds = nc4.Dataset(compare_pth, "r")
+        base_var = base_ds[variable]
+        compare_var = compare_ds[variable]
+        shape = base_var.shape
+        chunking = base_var.chunking()
+    if compare_var.shape != shape:
+        base_ds.close()
+        compare_ds.close()
+        raise ValueError(
+            f"'{variable}' has shape {compare_var.shape} in {compare_pth} "
+            f"and {shape} in {base_pth}"
+        )
+    if chunking == "contiguous":
+        block_size = COMPARE_TIME_BLOCK
+    else:
+        block_size = chunking[0]
+
+    stats = {
+        "max_abs_error": 0.0,
+        "max_rel_error": 0.0,
+        "worst_time_index": None,
+        "worst_space_index": None,
+        "n_over_tolerance": 0,
+        "n_values": int(np.prod(shape)),
+    }
+    for start in range(0, shape[0], block_size):
+        end = min(start + block_size, shape[0])
+        with nc4_lock:
+            base_arr = np.ma.getdata(base_var[start:end]).astype("float64")
+            compare_arr = np.ma.getdata(compare_var[start:end]).astype(
+                "float64"
+            )
+        base_abs = np.abs(base_arr)
+        diff = np.abs(compare_arr - base_arr)
+        # nan differences are never close, as in allclose
+        over = ~(diff <= atol + rtol * base_abs)
+        stats["n_over_tolerance"] += int(np.count_nonzero(over))
+
+        diff = np.where(np.isnan(diff), -1.0, diff)
+        iworst = np.unravel_index(np.argmax(diff), diff.shape)
+        if diff[iworst] > stats["max_abs_error"] or (
+            stats["worst_time_index"] is None and diff[iworst] >= 0.0
+        ):
+            stats["max_abs_error"] = float(diff[iworst])
+            stats["worst_time_index"] = start + int(iworst[0])
+            stats["worst_space_index"] = int(iworst[-1])
+        rel = np.divide(
+            diff, base_abs, out=np.zeros_like(diff), where=base_abs > 0.0
+        )
+        stats["max_rel_error"] = max(stats["max_rel_error"], float(rel.max()))
+
+    with nc4_lock:
+        base_ds.close()
+        compare_ds.close()
+    return stats
+
+
 class NetCdfCompare(Accessor):
     """Compare variables in two NetCDF files
 
+    The variables are compared a block of time steps (the time chunks of
+    the base file) at a time, so the files are never read into memory at
+    once, and different variables are compared in parallel in a pool of
+    processes.
+
     Args:
         base_pth: path to base NetCDF file
         compare_pth: path to NetCDF file that will be compared to
@@ -450,56 +806,118 @@ class NetCdfCompare(Accessor):
         compare_pth: fileish,
         verbose: bool = False,
     ) -> None:
+        self._base_pth = base_pth
+        self._compare_pth = compare_pth
         self._base = NetCdfRead(base_pth)
         self._compare = NetCdfRead(compare_pth)
         self._verbose = verbose
+        self._statistics = {}
         if not self.__validate_comparison:
             raise KeyError(
                 f"Variables in {compare_pth} do not exist in {base_pth}"
             )
 
     def __del__(self):
-        if self._base.dataset.isopen():
-            self._base.dataset.close()
-        if self._compare.dataset.isopen():
-            self._compare.dataset.close()
+        self._base.close()
+        self._compare.close()
 
     def compare(
         self,
         atol: float = ATOL,
+        rtol: float = 1.0e-5,
+        max_workers: int = None,
     ) -> (bool, dict):
         """
 
         Args:
             atol: absolute tolerance to use in numpy allclose (default
                 is single precision machine precisions ~1e-7)
+            rtol: relative tolerance to use in numpy allclose (default is
+                the numpy default 1e-5)
+            max_workers: the number of processes comparing variables. The
+                default (None) is the number of variables or processors,
+                whichever is smaller. Variables are compared in this process
+                if it is 1.
 
         Returns:
             success: boolean indicating if comparisons for all variables
                 in the NetCDF file passed
-            failures: dictionary with the maximum absolute difference for
-                each variable in the NetCDF file.
+            failures: dictionary with the maximum absolute difference, the
+                absolute tolerance and the column of the maximum difference
+                for each variable that failed. The statistics of all the
+                variables are available from the statistics property.
 
         """
-        return self.__compare(atol=atol)
+        return self.__compare(atol=atol, rtol=rtol, max_workers=max_workers)
+
+    @property
+    def statistics(self) -> dict:
+        """Get the statistics of the differences of the variables from the
+        last compare
+
+        Returns:
+            statistics: a dictionary for each variable with the
+                max_abs_error, max_rel_error, the worst_time_index,
+                worst_time (datetime), worst_space_index and worst_space_id
+                of the maximum absolute error, the n_over_tolerance count
+                of values that are not close and the number of n_values
+                compared.
+
+        """
+        return self._statistics
 
     def __compare(
         self,
         atol: float = ATOL,
+        rtol: float = 1.0e-5,
+        max_workers: int = None,
     ):
+        variables = self._compare.variables
+        if max_workers is None:
+            max_workers = min(len(variables), os.cpu_count() or 1)
+        args = [
+            (self._base_pth, self._compare_pth, variable, atol, rtol)
+            for variable in variables
+        ]
+        if max_workers > 1 and len(variables) > 1:
+            # spawn, as forked children inherit the state of nc4_lock
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                results = list(executor.map(_compare_variable, *zip(*args)))
+        else:
+            results = [_compare_variable(*arg) for arg in args]
+
         success = True
         failures = {}
-        for variable in self._compare.variables:
-            base_arr = self._base.get_data(variable)
-            compare_arr = self._compare.get_data(variable)
-            if not np.allclose(compare_arr, base_arr, atol=atol):
+        self._statistics = {}
+        date_times = getattr(self._base, "_datetime", None)
+        spatial_ids = list(self._base.spatial_ids.values())
+        for variable, stats in zip(variables, results):
+            itime = stats["worst_time_index"]
+            ispace = stats["worst_space_index"]
+            stats["worst_time"] = None
+            if itime is not None and date_times is not None:
+                stats["worst_time"] = date_times[itime]
+            stats["worst_space_id"] = None
+            if ispace is not None:
+                # the hru or segment ids, whichever the variable has
+                nspace = self._base.dataset[variable].shape[-1]
+                for ids in spatial_ids:
+                    if len(ids) == nspace:
+                        stats["worst_space_id"] = int(ids[ispace])
+                        break
+            self._statistics[variable] = stats
+            if stats["n_over_tolerance"]:
                 success = False
-                diff = np.abs(compare_arr - base_arr)
                 failures[variable] = (
-                    np.max(diff),
+                    stats["max_abs_error"],
                     atol,
-                    np.argmax(np.max(diff, axis=0)),
+                    ispace,
                 )
+            if self._verbose:
+                print(f"{variable}: {stats}")
         return success, failures
 
     @property
@@ -0,0 +1,151 @@
+import pathlib as pl
+from typing import Union
+
+import numpy as np
+
+from ..base.accessor import Accessor
+from .netcdf_utils import NetCdfRead
+
+fileish = Union[str, pl.Path]
+
+# The arrays of a npy directory that are not data variables
+npy_coordinate_names = ["datetime", "nhm_id", "nhm_seg"]
+
+
+class NpyRead(Accessor):
+    """Read the variables of a directory of .npy files
+
+    A npy directory, as written by cbh_netcdf_to_npy, has a (time, space)
+    <variable>.npy file for each variable, a datetime.npy file with the
+    datetime64 of the time steps and nhm_id.npy or nhm_seg.npy files with
+    the spatial ids. The variables are memory mapped read-only, so only
+    the time steps used are read from disk, without any decoding, and the
+    page cache is shared by all the processes reading a file. The data are
+    returned as views of the memory maps.
+
+    Args:
+        name: a npy directory or a <variable>.npy file in one
+    """
+
+    def __init__(self, name: fileish) -> "NpyRead":
+        path = pl.Path(name)
+        if path.suffix == ".npy":
+            path = path.parent
+        self._npy_dir = path
+
+        self._datetime = None
+        datetime_file = path / "datetime.npy"
+        if datetime_file.exists():
+            self._datetime = np.load(datetime_file).astype("datetime64[s]")
+
+        self._spatial_ids = {}
+        for spatial_id_name in npy_coordinate_names[1:]:
+            spatial_id_file = path / f"{spatial_id_name}.npy"
+            if spatial_id_file.exists():
+                self._spatial_ids[spatial_id_name] = np.load(spatial_id_file)
+
+        self._variables = sorted(
+            npy_file.stem
+            for npy_file in path.glob("*.npy")
+            if npy_file.stem not in npy_coordinate_names
+        )
+        self._data = {}
+        return
+
+    def close(self) -> None:
+        # dropping the references closes the memory maps
+        self._data = {}
+        return
+
+    @property
+    def variables(self) -> list:
+        """Get a list of variable names, excluding the coordinates"""
+        return self._variables
+
+    @property
+    def date_times(self) -> np.ndarray:
+        """Get the datetimes of the time steps"""
+        return self._datetime
+
+    @property
+    def ntimes(self) -> int:
+        """Get the number of time steps"""
+        return self.get_variable(self._variables[0]).shape[0]
+
+    def get_variable(self, variable: str) -> np.ndarray:
+        """Get the read-only memory map of a variable
+
+        Args:
+            variable: variable name
+
+        Returns:
+            arr: the (time, space) memory mapped array of the variable
+        """
+        if variable not in self._variables:
+            raise ValueError(
+                f"'{variable}' not in list of available variables"
+            )
+        if variable not in self._data:
+            self._data[variable] = np.load(
+                self._npy_dir / f"{variable}.npy", mmap_mode="r"
+            )
+        return self._data[variable]
+
+    def time_chunk_size(self, variable: str) -> None:
+        """The data are not chunked"""
+        return None
+
+    def get_block(self, variable: str, start: int, end: int) -> np.ndarray:
+        """Get a view of a variable for the time steps [start, end)"""
+        return self.get_variable(variable)[start:end]
+
+    def get_time_step(self, variable: str, itime_step: int) -> np.ndarray:
+        """Get a view of a variable for a time step"""
+        return self.get_variable(variable)[itime_step]
+
+
+def cbh_netcdf_to_npy(
+    nc_file: fileish,
+    npy_dir: fileish,
+    variables: list = None,
+) -> pl.Path:
+    """Convert a (cbh) netcdf file to a npy directory for NpyRead
+
+    The variables are copied a time chunk at a time, so files larger than
+    memory can be converted.
+
+    Args:
+        nc_file: the netcdf file
+        npy_dir: the npy directory to write, created if it does not exist
+        variables: the variables to convert, all by default
+
+    Returns:
+        npy_dir: the path of the npy directory
+    """
+    npy_dir = pl.Path(npy_dir)
+    npy_dir.mkdir(parents=True, exist_ok=True)
+    nc_data = NetCdfRead(nc_file)
+    if variables is None:
+        variables = nc_data.variables
+
+    np.save(npy_dir / "datetime.npy", nc_data.date_times)
+    for spatial_id_name, spatial_ids in nc_data.spatial_ids.items():
+        np.save(npy_dir / f"{spatial_id_name}.npy", np.ma.getdata(spatial_ids))
+
+    for variable in variables:
+        nc_var = nc_data.dataset[variable]
+        block_size = nc_data.time_chunk_size(variable) or nc_var.shape[0]
+        npy_var = np.lib.format.open_memmap(
+            npy_dir / f"{variable}.npy",
+            mode="w+",
+            dtype=nc_var.dtype,
+            shape=nc_var.shape,
+        )
+        for start in range(0, nc_var.shape[0], block_size):
+            end = min(start + block_size, nc_var.shape[0])
+            npy_var[start:end] = nc_data.get_block(variable, start, end)
+        npy_var.flush()
+        del npy_var
+
+    nc_data.close()
+    return npy_dir
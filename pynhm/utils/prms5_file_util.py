@@ -1,5 +1,6 @@
 import io
 import pathlib as pl
+import warnings
 from enum import Enum
 from typing import Tuple, Union
 
@@ -36,6 +37,9 @@ class PrmsFile:
         self.file_type = file_type
         self.file_object = None
         self.line_number = None
+        self._buffer = None
+        self._line_starts = None
+        self._line_ends = None
         self.section = PrmsFileSection.UNDEFINED
         self.eof = None
         self.set_file_type(file_type)
@@ -86,13 +90,25 @@ class PrmsFile:
     def _get_file_object(
         self,
     ) -> None:
-        """Get an open file object"""
+        """Read the file into memory and index its lines
+
+        The lines are located with numpy, so the values of a variable or
+        parameter, one per line, can be converted with a single call.
+        """
         if isinstance(self.file_path, (str, pl.Path)):
-            self.file_object = open(self.file_path, "r")
+            with open(self.file_path, "rb") as file_object:
+                self._buffer = file_object.read()
             self.line_number = 0
             self.eof = False
         else:
             raise TypeError("file_path must be a file path")
+        line_ends = np.flatnonzero(
+            np.frombuffer(self._buffer, dtype=np.uint8) == ord("\n")
+        )
+        if len(self._buffer) and not self._buffer.endswith(b"\n"):
+            line_ends = np.append(line_ends, len(self._buffer))
+        self._line_ends = line_ends
+        self._line_starts = np.concatenate(([0], line_ends[:-1] + 1))
         return
 
     def _get_control_variables(
@@ -125,7 +141,6 @@ class PrmsFile:
                     elif key in ("initial_deltat",):
                         value = np.timedelta64(int(value[0]), "h")
                     variable_dict[key] = value
-        self.file_object.close()
         return variable_dict
 
     def _get_dimensions_parameters(self):
@@ -135,7 +150,7 @@ class PrmsFile:
         parameters_full_dict = {}
         parameter_dimensions_full_dict = {}
         while True:
-            current_position = self.file_object.tell()
+            current_position = self.line_number
             line = self._get_line()
             if line == "** Dimensions **":
                 dimensions_start = current_position
@@ -144,8 +159,8 @@ class PrmsFile:
                 break
 
         # read dimensions data
-        self.file_object.seek(dimensions_start)
-        while self.file_object.tell() < parameters_start:
+        self.line_number = dimensions_start
+        while self.line_number < parameters_start:
             dim_temp = self._get_next_variable()
             if dim_temp is None:
                 break
@@ -154,7 +169,7 @@ class PrmsFile:
                     dimensions_dict[key] = value
 
         # read parameter data
-        self.file_object.seek(parameters_start)
+        self.line_number = parameters_start
         self.section = PrmsFileSection.PARAMETER
         self.dimensions = dimensions_dict
         while True:
@@ -184,12 +199,68 @@ class PrmsFile:
         return parameters_dict
 
     def _get_line(self) -> str:
-        line = self.file_object.readline()
-        if line == "":
+        if self.line_number >= len(self._line_ends):
             self.eof = True
+            return ""
+        line = self._buffer[
+            self._line_starts[self.line_number] : self._line_ends[
+                self.line_number
+            ]
+        ]
+        self.line_number += 1
+        return line.decode().rstrip()
+
+    def _read_values(
+        self,
+        num_values: int,
+        data_type: int,
+    ) -> np.ndarray:
+        """Read the values of a variable or parameter, one per line
+
+        Numeric values are converted by numpy in a single call on the text
+        of all of their lines.
+
+        Args:
+            num_values: the number of values
+            data_type: the PrmsDataType value of the values
+
+        Returns:
+            arr: numpy array of the values, int, float or object (str)
+
+        """
+        first = self.line_number
+        last = first + num_values
+        if last > len(self._line_ends):
+            self.line_number = len(self._line_ends)
+            raise ValueError("unexpected end of file")
+        self.line_number = last
+        if num_values:
+            text = self._buffer[
+                self._line_starts[first] : self._line_ends[last - 1]
+            ]
         else:
-            self.line_number += 1
-        return line.rstrip()
+            text = b""
+
+        if data_type == PrmsDataType.CHARACTER.value:
+            arr = np.empty(num_values, dtype=object)
+            arr[:] = [line.split()[0] for line in text.decode().splitlines()]
+            return arr
+
+        if data_type == PrmsDataType.INTEGER.value:
+            dtype = int
+        else:
+            dtype = float
+        with warnings.catch_warnings(record=True) as parse_warnings:
+            # fromstring warns if it cannot parse all of the text
+            warnings.simplefilter("always", DeprecationWarning)
+            arr = np.fromstring(text, dtype=dtype, sep=" ")
+        if parse_warnings or arr.shape[0] != num_values:
+            # lines with more than a value or values that are not numbers
+            arr = np.array(
+                [line.split()[0] for line in text.decode().splitlines()],
+                dtype=dtype,
+            )
+        return arr
 
     def _get_next_variable(
         self,
@@ -255,18 +326,8 @@ class PrmsFile:
         try:
             num_values = int(self._get_line().split()[0])
             data_type = int(self._get_line().rstrip().split()[0])
-            if data_type == PrmsDataType.INTEGER.value:
-                arr = np.zeros(num_values, dtype=int)
-                for idx in range(num_values):
-                    arr[idx] = int(self._get_line().split()[0])
-            elif data_type == PrmsDataType.FLOAT.value:
-                arr = np.zeros(num_values, dtype=float)
-                for idx in range(num_values):
-                    arr[idx] = float(self._get_line().split()[0])
-            elif data_type == PrmsDataType.CHARACTER.value:
-                arr = np.zeros(num_values, dtype=np.chararray)
-                for idx in range(num_values):
-                    arr[idx] = self._get_line().split()[0]
+            if data_type in [item.value for item in PrmsDataType]:
+                arr = self._read_values(num_values, data_type)
             else:
                 raise TypeError(
                     f"data type ({data_type}) can only be "
@@ -274,12 +335,12 @@ class PrmsFile:
                     + f"float ({PrmsDataType.FLOAT.value}), "
                     + f"or character ({PrmsDataType.CHARACTER.value}). "
                     + f"Error on line {self.line_number} in PRMS "
-                    + f"input file '{self.file_object.name}'."
+                    + f"input file '{self.file_path}'."
                 )
         except:
             raise ValueError(
                 f"Error on line {self.line_number} in PRMS "
-                + f"input file '{self.file_object.name}'."
+                + f"input file '{self.file_path}'."
             )
         return arr
 
@@ -297,7 +358,7 @@ class PrmsFile:
         except:
             raise ValueError(
                 f"Error on line {self.line_number} in PRMS "
-                + f"input file '{self.file_object.name}'."
+                + f"input file '{self.file_path}'."
             )
         return dimension
 
@@ -325,18 +386,8 @@ class PrmsFile:
             dim_names = tuple(dim_names[::-1])
             len_array = int(self._get_line().split()[0])
             data_type = int(self._get_line().rstrip().split()[0])
-            if data_type == PrmsDataType.INTEGER.value:
-                arr = np.zeros(len_array, dtype=int)
-                for idx in range(len_array):
-                    arr[idx] = int(self._get_line().split()[0])
-            elif data_type == PrmsDataType.FLOAT.value:
-                arr = np.zeros(len_array, dtype=float)
-                for idx in range(len_array):
-                    arr[idx] = float(self._get_line().split()[0])
-            elif data_type == PrmsDataType.CHARACTER.value:
-                arr = np.zeros(len_array, dtype=np.chararray)
-                for idx in range(len_array):
-                    arr[idx] = self._get_line().split()[0]
+            if data_type in [item.value for item in PrmsDataType]:
+                arr = self._read_values(len_array, data_type)
             else:
                 raise TypeError(
                     f"data type ({data_type}) can only be "
@@ -344,12 +395,12 @@ class PrmsFile:
                     + f"float ({PrmsDataType.FLOAT.value}), "
                     + f"or character ({PrmsDataType.CHARACTER.value}). "
                     + f"Error on line {self.line_number} in PRMS "
-                    + f"input file '{self.file_object.name}'."
+                    + f"input file '{self.file_path}'."
                 )
         except:
             raise ValueError(
                 f"Error on line {self.line_number} in PRMS "
-                + f"input file '{self.file_object.name}'."
+                + f"input file '{self.file_path}'."
             )
         if len(shape) == 2:
             arr = arr.reshape(shape)
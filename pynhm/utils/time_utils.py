@@ -28,3 +28,8 @@ def datetime_dowy(datetime: np.datetime64):
         year_start -= 1
     diff = datetime - np.datetime64(f"{year_start}-10-01")
     return diff.astype("timedelta64[D]").astype(int)
+
+
+def datetime_water_year(datetime: np.datetime64):
+    """Get the water year (starting October 1) from np.datetime64"""
+    return datetime_year(datetime) + (datetime_month(datetime) >= 10)
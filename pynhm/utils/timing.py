@@ -0,0 +1,195 @@
+import json
+import math
+import pathlib as pl
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Union
+
+fileish = Union[str, pl.Path]
+
+
+class _PhaseRecord:
+    """The accumulated time of a phase of a component"""
+
+    def __init__(self):
+        self.total = 0.0
+        self.n_calls = 0
+        self.n_steps = 0
+        self.step_total = 0.0
+        self.step_sum_squares = 0.0
+        self.step_min = math.inf
+        self.step_max = 0.0
+        self.current_step = 0.0
+        self.in_step = False
+
+    def add(self, seconds: float) -> None:
+        self.total += seconds
+        self.n_calls += 1
+        self.current_step += seconds
+        self.in_step = True
+        return
+
+    def end_step(self) -> None:
+        if not self.in_step:
+            return
+        seconds = self.current_step
+        self.n_steps += 1
+        self.step_total += seconds
+        self.step_sum_squares += seconds * seconds
+        self.step_min = min(self.step_min, seconds)
+        self.step_max = max(self.step_max, seconds)
+        self.current_step = 0.0
+        self.in_step = False
+        return
+
+    def statistics(self) -> dict:
+        stats = {
+            "total_seconds": self.total,
+            "n_calls": self.n_calls,
+            "n_steps": self.n_steps,
+            "mean_step_seconds": None,
+            "std_step_seconds": None,
+            "min_step_seconds": None,
+            "max_step_seconds": None,
+        }
+        if self.n_steps:
+            mean = self.step_total / self.n_steps
+            variance = self.step_sum_squares / self.n_steps - mean * mean
+            stats["mean_step_seconds"] = mean
+            stats["std_step_seconds"] = math.sqrt(max(variance, 0.0))
+            stats["min_step_seconds"] = self.step_min
+            stats["max_step_seconds"] = self.step_max
+        return stats
+
+
+class PhaseTimers:
+    """Accumulate the time spent in the phases of the components of a model
+
+    Time is accumulated by component and phase (e.g. "advance", "inputs",
+    "calculate", "budget", "output"). Timed phases can be nested, the time
+    of a phase excludes the time of the phases timed inside it, so the times
+    of all the phases add up to the time timed. Each thread has its own
+    nesting, so components can be timed concurrently.
+
+    Besides the accumulated time, the statistics of the time per time step
+    are kept: end_step folds the time of each phase in the step just ended
+    into its per-step mean, standard deviation, minimum and maximum.
+
+    Examples:
+        timers = PhaseTimers()
+        with timers.time("PRMSCanopy", "calculate"):
+            canopy.calculate(1.0)
+        timers.end_step()
+        timers.to_json("timing.json")
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._n_steps = 0
+        self._local = threading.local()
+        return
+
+    def reset(self) -> None:
+        """Discard all the accumulated times"""
+        self._records = {}
+        self._n_steps = 0
+        return
+
+    @property
+    def n_steps(self) -> int:
+        """The number of time steps ended"""
+        return self._n_steps
+
+    def _record(self, component: str, phase: str) -> _PhaseRecord:
+        key = (component, phase)
+        record = self._records.get(key)
+        if record is None:
+            record = self._records.setdefault(key, _PhaseRecord())
+        return record
+
+    def add(self, component: str, phase: str, seconds: float) -> None:
+        """Add time to a phase of a component
+
+        Args:
+            component: the component name
+            phase: the phase name
+            seconds: the time to add
+        """
+        self._record(component, phase).add(seconds)
+        return
+
+    @contextmanager
+    def time(self, component: str, phase: str):
+        """Context manager timing a phase of a component
+
+        The time of phases timed inside the context, in the same thread, is
+        not included.
+
+        Args:
+            component: the component name
+            phase: the phase name
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        # the time of the nested phases
+        stack.append(0.0)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.add(component, phase, elapsed - nested)
+
+    def end_step(self) -> None:
+        """End a time step, updating the per-step statistics"""
+        for record in self._records.values():
+            record.end_step()
+        self._n_steps += 1
+        return
+
+    def to_dict(self) -> dict:
+        """Get the timing statistics
+
+        Returns:
+            A dict with the number of time steps ("n_steps"), the total time
+            of all the phases ("total_seconds") and, for each component and
+            phase, the statistics of the phase in "components", e.g.
+            ["components"]["PRMSCanopy"]["calculate"]. The statistics are
+            the total time ("total_seconds"), its fraction of the total time
+            of all phases ("fraction"), the number of times the phase was
+            timed ("n_calls"), the number of time steps it was timed in
+            ("n_steps") and the mean, standard deviation, minimum and
+            maximum time per time step. Times are in seconds.
+        """
+        total = sum(record.total for record in self._records.values())
+        components = {}
+        for (component, phase), record in self._records.items():
+            stats = record.statistics()
+            stats["fraction"] = record.total / total if total else None
+            components.setdefault(component, {})[phase] = stats
+        return {
+            "n_steps": self._n_steps,
+            "total_seconds": total,
+            "components": components,
+        }
+
+    def to_json(self, path: fileish = None, indent: int = 2) -> str:
+        """Export the timing statistics as JSON
+
+        Args:
+            path: the file to write, if any
+            indent: the JSON indentation
+
+        Returns:
+            The JSON of to_dict
+        """
+        timing_json = json.dumps(self.to_dict(), indent=indent)
+        if path is not None:
+            with open(path, "w") as file:
+                file.write(timing_json)
+        return timing_json
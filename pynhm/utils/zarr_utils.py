@@ -0,0 +1,489 @@
+import os
+import pathlib as pl
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from typing import Union
+
+import netCDF4 as nc4
+import numpy as np
+
+from ..base.accessor import Accessor
+from ..base.meta import meta_dimensions, meta_netcdf_type
+from .netcdf_utils import NetCdfRead
+
+try:
+    import zarr
+except ImportError:  # pragma: no cover
+    zarr = None
+
+fileish = Union[str, pl.Path]
+listish = Union[list, tuple]
+
+# Unlike netCDF-C, zarr writes each chunk to its own file and needs no global
+# lock, so the blocks of time steps are written by a pool of threads
+MAX_WRITE_WORKERS = min(8, os.cpu_count() or 1)
+_write_executor = None
+_write_executor_lock = threading.Lock()
+
+
+def _get_write_executor() -> ThreadPoolExecutor:
+    global _write_executor
+    with _write_executor_lock:
+        if _write_executor is None:
+            _write_executor = ThreadPoolExecutor(
+                max_workers=MAX_WRITE_WORKERS,
+                thread_name_prefix="pynhm-zarr-write",
+            )
+    return _write_executor
+
+
+def _create_zarr_array(
+    group,
+    name: str,
+    shape: tuple,
+    chunks: tuple,
+    dtype: str,
+    dimensions: tuple,
+    fill_value=None,
+):
+    if hasattr(group, "create_array"):  # zarr >= 3
+        return group.create_array(
+            name,
+            shape=shape,
+            chunks=chunks,
+            dtype=dtype,
+            fill_value=fill_value,
+            dimension_names=dimensions,
+        )
+    array = group.create_dataset(
+        name,
+        shape=shape,
+        chunks=chunks,
+        dtype=dtype,
+        fill_value=fill_value,
+    )
+    # the dimension convention of xarray for zarr version 2 stores
+    array.attrs["_ARRAY_DIMENSIONS"] = list(dimensions)
+    return array
+
+
+class ZarrWrite(Accessor):
+    """Output data to a zarr directory store
+
+    ZarrWrite has the same interface as NetCdfWrite and writes the same
+    variables, coordinates and metadata attributes. Dimension names are
+    stored so the store can be opened with xarray.open_zarr, which can also
+    read the time steps written so far while a simulation is running.
+
+    Args:
+        name: path for the zarr directory store
+        coordinates: dictionary of the nhm_id and nhm_seg coordinates
+        variables: the names of the variables to output
+        var_meta: the metadata of the variables
+        time_units: the units of the datetime coordinate
+        clobber: boolean indicating if an existing store should be
+            overwritten
+        chunk_sizes: dictionary defining chunk sizes for the data, a size
+            of 0 is the whole dimension
+        buffer_size: the number of time steps of each variable collected in
+            memory before they are written as one block. The default (None)
+            is the time chunk size so that whole chunks are written.
+        async_write: write the blocks of buffered time steps in a pool of
+            background threads. flush and close wait for the writes to
+            finish and raise any exception from them.
+    """
+
+    file_extension = ".zarr"
+
+    def __init__(
+        self,
+        name: fileish,
+        coordinates: dict,
+        variables: listish,
+        var_meta: dict,
+        time_units: str = "days since 1970-01-01 00:00:00",
+        clobber: bool = True,
+        chunk_sizes: dict = {"time": 30, "hruid": 0},
+        buffer_size: int = None,
+        async_write: bool = False,
+    ) -> "ZarrWrite":
+        if zarr is None:
+            raise ImportError("zarr is required for zarr output")
+
+        mode = "w" if clobber else "w-"
+        self.group = zarr.open_group(str(name), mode=mode)
+        self.group.attrs["Description"] = "PYNHM output data"
+
+        ndays_time_vars = [
+            "soltab_potsw",
+            "soltab_horad_potsw",
+            "soltab_sunhrs",
+        ]
+        time_chunk = chunk_sizes.get("time", 1)
+
+        self.variables = {}
+        self.datetime = None
+        self._fixed_time_variables = []
+        spatial_coordinates = {}
+        for var_name in variables:
+            dimension_name = meta_dimensions(var_meta[var_name])
+            if "nsegment" in dimension_name:
+                spatial_coordinate = "hru_seg"
+                ids = coordinates["nhm_seg"]
+            else:
+                spatial_coordinate = "hru_id"
+                ids = coordinates["nhm_id"]
+            if spatial_coordinate not in spatial_coordinates:
+                ids = np.array(ids, dtype="int32")
+                spatial_coordinates[spatial_coordinate] = len(ids)
+                _create_zarr_array(
+                    self.group,
+                    spatial_coordinate,
+                    ids.shape,
+                    ids.shape,
+                    "int32",
+                    (spatial_coordinate,),
+                )[:] = ids
+
+            if var_name in ndays_time_vars:
+                time_dim = "ndays"
+                if "doy" not in self.group:
+                    self.doy = _create_zarr_array(
+                        self.group, "doy", (366,), (366,), "int32", ("ndays",)
+                    )
+                    self.doy.attrs["units"] = "Day of year"
+                ntimes = 366
+                self._fixed_time_variables.append(var_name)
+            else:
+                time_dim = "time"
+                if self.datetime is None:
+                    # time is unlimited, the arrays grow as blocks are written
+                    self.datetime = _create_zarr_array(
+                        self.group,
+                        "datetime",
+                        (0,),
+                        (time_chunk,),
+                        "float32",
+                        ("time",),
+                    )
+                    self.datetime.attrs["units"] = time_units
+                ntimes = 0
+
+            nspace = spatial_coordinates[spatial_coordinate]
+            space_chunk = chunk_sizes.get("hruid", 0) or nspace
+            variabletype = meta_netcdf_type(var_meta[var_name])
+            self.variables[var_name] = _create_zarr_array(
+                self.group,
+                var_name,
+                (ntimes, nspace),
+                (time_chunk, min(space_chunk, nspace)),
+                variabletype,
+                (time_dim, spatial_coordinate),
+                fill_value=nc4.default_fillvals[variabletype],
+            )
+            self.variables[var_name].attrs.update(
+                {
+                    key: val
+                    for key, val in var_meta[var_name].items()
+                    if not isinstance(val, dict)
+                }
+            )
+
+        if buffer_size is None:
+            buffer_size = time_chunk
+        self._buffer_size = max(buffer_size, 1)
+        self._buffers = {}
+        self._async_write = async_write
+        self._pending_writes = []
+        self._open = True
+
+        return
+
+    def __del__(self):
+        self.close()
+        return
+
+    def close(self) -> None:
+        if getattr(self, "_open", False):
+            self._open = False
+            self.flush()
+        return
+
+    def flush(self) -> None:
+        """Write all buffered time steps to the store
+
+        With async_write, this waits for all writes to finish and raises the
+        first exception from them, if any.
+        """
+        for name in list(self._buffers.keys()):
+            self._flush_buffer(name)
+        self._check_writes(wait=True)
+        return
+
+    def _check_writes(self, wait: bool = False) -> None:
+        """Forget finished asynchronous writes, raising their exceptions."""
+        if wait:
+            wait_futures(self._pending_writes)
+        pending = []
+        error = None
+        for future in self._pending_writes:
+            if not future.done():
+                pending.append(future)
+            elif error is None and future.exception() is not None:
+                error = future.exception()
+        self._pending_writes = pending
+        if error is not None:
+            raise error
+        return
+
+    def _buffer_time_step(
+        self, name: str, target, itime_step: int, value
+    ) -> None:
+        """Buffer a time step of a variable in a block aligned to the
+        buffer size, writing the previous block when the time step is
+        outside of it."""
+        buffer = self._buffers.get(name)
+        if buffer is not None and not (
+            buffer["start"] <= itime_step < buffer["start"] + buffer["size"]
+        ):
+            self._flush_buffer(name)
+            buffer = None
+        if buffer is None:
+            start = (itime_step // self._buffer_size) * self._buffer_size
+            size = self._buffer_size
+            if name in self._fixed_time_variables:
+                size = min(size, target.shape[0] - start)
+            buffer = {
+                "target": target,
+                "start": start,
+                "size": size,
+                "data": np.zeros((size,) + target.shape[1:], target.dtype),
+                "written": np.zeros(size, dtype=bool),
+            }
+            self._buffers[name] = buffer
+        offset = itime_step - buffer["start"]
+        buffer["data"][offset] = value
+        buffer["written"][offset] = True
+        return
+
+    def _flush_buffer(self, name: str) -> None:
+        buffer = self._buffers.pop(name)
+        # grow the time dimension here, not in the write threads, so that
+        # concurrent writes never shrink an array
+        end = buffer["start"] + np.flatnonzero(buffer["written"])[-1] + 1
+        target = buffer["target"]
+        if target.shape[0] < end:
+            target.resize((end,) + target.shape[1:])
+        if not self._async_write:
+            self._write_buffer(buffer)
+            return
+        # surface errors from earlier writes as soon as possible
+        self._check_writes()
+        self._pending_writes.append(
+            _get_write_executor().submit(self._write_buffer, buffer)
+        )
+        return
+
+    @staticmethod
+    def _write_buffer(buffer: dict) -> None:
+        written = np.flatnonzero(buffer["written"])
+        # write each contiguous run of time steps, usually the whole block
+        runs = np.split(written, np.where(np.diff(written) != 1)[0] + 1)
+        for run in runs:
+            if not len(run):
+                continue
+            first, last = run[0], run[-1] + 1
+            buffer["target"][
+                buffer["start"] + first : buffer["start"] + last
+            ] = buffer["data"][first:last]
+        return
+
+    def add_simulation_time(self, itime_step: int, simulation_time: float):
+        self._buffer_time_step(
+            "datetime", self.datetime, itime_step, simulation_time
+        )
+        return
+
+    def add_data(
+        self, name: str, itime_step: int, current: np.ndarray
+    ) -> None:
+        """Add data for a time step to a zarr array
+
+        Args:
+            name: the name of the variable
+            itime_step: the index of the time step
+            current: the values of the variable at the time step
+
+        Returns:
+            None
+        """
+        if name not in self.variables.keys():
+            raise KeyError(f"{name} not a valid variable name")
+        self._buffer_time_step(
+            name, self.variables[name], itime_step, current[:]
+        )
+        return
+
+
+class ZarrRead(Accessor):
+    """Read the variables of a zarr store
+
+    The store has the layout written by ZarrWrite and cbh_netcdf_to_zarr: a
+    datetime array with units, nhm_id or nhm_seg (or hru_id or hru_seg)
+    spatial ids and (time, space) variables. Blocks of time steps are read
+    a chunk at a time and decompressed without any global lock.
+
+    Args:
+        name: path of the zarr store
+    """
+
+    def __init__(self, name: fileish) -> "ZarrRead":
+        if zarr is None:
+            raise ImportError("zarr is required to read zarr stores")
+        self._zarr_store = name
+        self.group = zarr.open_group(str(name), mode="r")
+        names = list(self.group.array_keys())
+
+        self._datetime = None
+        if "datetime" in names:
+            datetime = self.group["datetime"]
+            self._datetime = np.asarray(
+                nc4.num2date(
+                    datetime[:],
+                    units=datetime.attrs["units"],
+                    calendar="standard",
+                    only_use_cftime_datetimes=False,
+                )
+            ).astype("datetime64[s]")
+
+        spatial_id_names = [
+            name
+            for name in ["nhm_id", "hru_id", "nhm_seg", "hru_seg"]
+            if name in names
+        ]
+        self._spatial_ids = {
+            name: self.group[name][:] for name in spatial_id_names
+        }
+        self._variables = [
+            name
+            for name in names
+            if name != "datetime" and name not in spatial_id_names
+        ]
+        return
+
+    def close(self) -> None:
+        return
+
+    @property
+    def variables(self) -> list:
+        """Get a list of variable names, excluding the coordinates"""
+        return self._variables
+
+    @property
+    def date_times(self) -> np.ndarray:
+        """Get the datetimes of the time steps"""
+        return self._datetime
+
+    @property
+    def ntimes(self) -> int:
+        """Get the number of time steps"""
+        return self.group[self._variables[0]].shape[0]
+
+    def _get_array(self, variable: str):
+        if variable not in self._variables:
+            raise ValueError(
+                f"'{variable}' not in list of available variables"
+            )
+        return self.group[variable]
+
+    def time_chunk_size(self, variable: str) -> int:
+        """Get the chunk size of the time dimension of a variable"""
+        return self._get_array(variable).chunks[0]
+
+    def get_block(self, variable: str, start: int, end: int) -> np.ndarray:
+        """Get data for a variable for the time steps [start, end)"""
+        return self._get_array(variable)[start:end]
+
+    def get_time_step(self, variable: str, itime_step: int) -> np.ndarray:
+        """Get data for a variable for a time step"""
+        return self._get_array(variable)[itime_step]
+
+
+def cbh_netcdf_to_zarr(
+    nc_file: fileish,
+    zarr_store: fileish,
+    variables: list = None,
+    time_chunk: int = None,
+) -> pl.Path:
+    """Convert a (cbh) netcdf file to a zarr store for ZarrRead
+
+    The variables are copied a time chunk at a time, so files larger than
+    memory can be converted.
+
+    Args:
+        nc_file: the netcdf file
+        zarr_store: the zarr store to write, overwritten if it exists
+        variables: the variables to convert, all by default
+        time_chunk: the chunk size of the time dimension, by default the
+            time chunk size of each variable in the netcdf file or 30 if the
+            variable is not chunked
+
+    Returns:
+        zarr_store: the path of the zarr store
+    """
+    if zarr is None:
+        raise ImportError("zarr is required to write zarr stores")
+    nc_data = NetCdfRead(nc_file)
+    if variables is None:
+        variables = nc_data.variables
+    group = zarr.open_group(str(zarr_store), mode="w")
+    group.attrs["Description"] = "PYNHM input data"
+
+    nc_datetime = nc_data.dataset["datetime"]
+    datetime = _create_zarr_array(
+        group,
+        "datetime",
+        nc_datetime.shape,
+        nc_datetime.shape,
+        nc_datetime.dtype,
+        ("time",),
+    )
+    datetime[:] = np.ma.getdata(nc_datetime[:])
+    datetime.attrs["units"] = nc_datetime.units
+    for spatial_id_name, spatial_ids in nc_data.spatial_ids.items():
+        spatial_ids = np.ma.getdata(spatial_ids)
+        _create_zarr_array(
+            group,
+            spatial_id_name,
+            spatial_ids.shape,
+            spatial_ids.shape,
+            spatial_ids.dtype,
+            (spatial_id_name,),
+        )[:] = spatial_ids
+
+    for variable in variables:
+        nc_var = nc_data.dataset[variable]
+        block_size = time_chunk or nc_data.time_chunk_size(variable) or 30
+        array = _create_zarr_array(
+            group,
+            variable,
+            nc_var.shape,
+            (block_size,) + nc_var.shape[1:],
+            nc_var.dtype,
+            ("time", list(nc_data.spatial_ids.keys())[0]),
+        )
+        # numpy attribute values are not json serializable
+        array.attrs.update(
+            {
+                key: np.asarray(nc_var.getncattr(key)).tolist()
+                for key in nc_var.ncattrs()
+                if key != "_FillValue"
+            }
+        )
+        for start in range(0, nc_var.shape[0], block_size):
+            end = min(start + block_size, nc_var.shape[0])
+            array[start:end] = nc_data.get_block(variable, start, end)
+
+    nc_data.close()
+    return pl.Path(zarr_store)